@@ -0,0 +1,248 @@
+"""
+Benchmarks of the engine hot paths.
+
+Every case builds it's own board with fixed seed, so cases do not depend on each other, then times one engine
+function several times and records peak of memory allocated by the timed call (tracemalloc, separate run).
+Cases changing the board (TUPLE_STATEFUL_CASES) get a fresh board for every timed call, other cases are called
+once untimed before timing. Fixed pure Python workload is timed right before every timed call and cases are
+compared with baseline by median of their times relative to it, so slowdown of the whole machine is not reported
+as regression. Results are stored as JSON and may be compared with a stored baseline:
+
+    python benchmarks/bench_engine.py --suite quick --output results.json
+    python benchmarks/bench_engine.py --suite quick --output results.json --baseline baseline.json --threshold 0.2
+
+Exit code is 1 when any case is slower than baseline by more than threshold.
+"""
+
+import argparse
+import gc
+import json
+import pathlib
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import main
+from classes.field_pattern import FieldPattern
+from classes.ground import TUPLE_GROUND_TILES
+from classes.rng import RandomService
+from classes import terrain_grid
+
+
+INT_DEFAULT_SEED = 20240101
+FLOAT_DEFAULT_THRESHOLD = 0.2
+FLOAT_NOISE_SECONDS = 0.001  # cases faster than this in baseline are reported but never counted as regressions
+INT_DEFAULT_REPEAT = 10
+INT_CALIBRATION_STEPS = 20000  # size of calibration workload, a few milliseconds
+
+# suite -> list of (board side with borders, creatures count, compact)
+DICT_SUITES = {
+    "quick": [
+        (5, 1, False,),
+        (50, 100, False,),
+        (50, 100, True,),
+        (200, 1000, True,),
+    ],
+    "full": [
+        (5, 1, False,),
+        (50, 100, False,),
+        (200, 1000, False,),
+        (500, 10000, False,),
+        (200, 1000, True,),
+        (1000, 100000, True,),
+        (4000, 1000000, True,),
+    ],
+}
+
+TUPLE_CASES = ("set_illumination", "redraw", "eng_fill_field", "get_occupied_blocks_count", "tick",)
+TUPLE_STATEFUL_CASES = ("eng_fill_field", "tick",)  # timed call changes the board, so every sample needs a new one
+
+
+class BenchState(object):
+    """
+    DESCR: Prepared board of one case of benchmark point. Tick case gets it's scheduler here and runs the first tick,
+           which illuminates the whole board, so timed calls are ordinary ticks and do not include building it.
+    """
+
+    def __init__(self, case: str, size: int, creatures_count: int, compact: bool, seed: int) -> None:
+        self.random_service = RandomService(seed)
+        self.field, self.lighter_path = main.main_prepare_field(self.random_service, size, max(size // 4, 1),
+                                                                creatures_count, compact)
+        field_x, field_y = self.field.get_field_size()
+        ground_types = self.random_service.stream("pattern").get_ints(field_x * field_y, 0, len(TUPLE_GROUND_TILES) - 1)
+        self.pattern = FieldPattern(field_x, field_y, bytes(ground_types))
+        self.scheduler = None
+        if case == "tick":
+            self.scheduler = main.main_build_scheduler(self.field, self.lighter_path, self.random_service)
+            self.scheduler.run_tick()
+
+        return None
+
+
+def _run_case(case: str, state: BenchState) -> None:
+    field = state.field
+    if case == "set_illumination":
+        # lighter is moved first, otherwise repeated calls measure light cache hits only
+        main.eng_move_lighter_on_field(field, state.lighter_path)
+        field.set_illumination()
+    elif case == "redraw":
+        field.renderer.mark_all()
+        field.redraw_changes()
+    elif case == "eng_fill_field":
+        main.eng_fill_field(field, state.pattern)
+    elif case == "get_occupied_blocks_count":
+        field._get_occupied_blocks_count()
+    elif case == "tick":
+        state.scheduler.run_tick()
+
+    return None
+
+
+def _calibrate() -> float:
+    """
+    DESCR: Time fixed workload of dictionary, integer and string operations, typical for the engine
+    RETURN: seconds
+    """
+    time_start = time.perf_counter()
+    values = {}
+    for i in range(INT_CALIBRATION_STEPS):
+        values[i & 255] = (i, str(i),)
+
+    return time.perf_counter() - time_start
+
+
+def bench_case(case: str, get_state, repeat: int) -> dict:
+    """
+    DESCR: Time case repeat times and measure peak of memory allocated by one more call. Stateful cases
+           are timed on a new board every time, other cases share one board and are called once before timing.
+    ARGS:
+        - get_state: callable without arguments building BenchState of the case
+    RETURN: dictionary with min, median seconds, min seconds of calibration workload, median of times relative
+            to calibration workload, peak bytes and seconds spent building the first board
+    """
+    time_start = time.perf_counter()
+    state = get_state()
+    setup_seconds = time.perf_counter() - time_start
+    is_stateful = case in TUPLE_STATEFUL_CASES
+    if not is_stateful:
+        _run_case(case, state)
+
+    timings = []
+    calibrations = []
+    for _ in range(repeat):
+        if is_stateful and timings:
+            del state
+            state = get_state()
+        gc.collect()
+        calibrations.append(_calibrate())
+        time_start = time.perf_counter()
+        _run_case(case, state)
+        timings.append(time.perf_counter() - time_start)
+
+    if is_stateful:
+        del state
+        state = get_state()
+    tracemalloc.start()
+    _run_case(case, state)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "seconds_min": min(timings),
+        "seconds_median": statistics.median(timings),
+        "calibration_seconds": min(calibrations),
+        "relative_median": statistics.median(timing / calibration for timing, calibration in zip(timings, calibrations)),
+        "peak_bytes": peak,
+        "setup_seconds": setup_seconds,
+    }
+
+
+def run_suite(suite: str, repeat: int, seed: int, cases: tuple=TUPLE_CASES) -> dict:
+    """
+    RETURN: results: meta information and case key -> measurements
+    """
+    results = {
+        "meta": {
+            "suite": suite,
+            "seed": seed,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": terrain_grid.numpy is not None,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "cases": {},
+    }
+
+    for size, creatures_count, compact in DICT_SUITES[suite]:
+        for case in cases:
+            key = f"{case}/size={size}/creatures={creatures_count}/compact={int(compact)}"
+            result = bench_case(case, lambda: BenchState(case, size, creatures_count, compact, seed), repeat)
+            results["cases"][key] = result
+            print(f"{key:<64} min {result['seconds_min'] * 1000:10.3f} ms  peak {result['peak_bytes'] / 1024:10.1f} KiB",
+                  flush=True)
+            gc.collect()
+
+    # ru_maxrss is reported in kilobytes on Linux
+    results["meta"]["max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    return results
+
+
+def compare_results(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    DESCR: Compare cases found in both results by their times relative to calibration workload of the same run,
+           minimal times are compared for baselines stored without calibration
+    RETURN: list of regressions (case key, baseline seconds, current seconds)
+    """
+    regressions = []
+    for key, current in results["cases"].items():
+        previous = baseline.get("cases", {}).get(key)
+        if previous is None:
+            continue
+        field = "relative_median" if "relative_median" in previous else "seconds_min"
+        ratio = current[field] / previous[field] if previous[field] > 0 else 1.0
+        mark = "REGRESSION" if ratio > 1 + threshold and previous["seconds_min"] >= FLOAT_NOISE_SECONDS else ""
+        print(f"{key:<64} {previous['seconds_min'] * 1000:10.3f} -> {current['seconds_min'] * 1000:10.3f} ms  x{ratio:5.2f} {mark}")
+        if mark:
+            regressions.append((key, previous["seconds_min"], current["seconds_min"],))
+
+    return regressions
+
+
+def parse_arguments(argv: list) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks of the engine hot paths")
+    parser.add_argument("--suite", default="quick", choices=sorted(DICT_SUITES), help="set of board sizes")
+    parser.add_argument("--case", nargs='+', default=list(TUPLE_CASES), choices=TUPLE_CASES, help="functions to time")
+    parser.add_argument("--repeat", type=int, default=INT_DEFAULT_REPEAT, help="timed calls per case")
+    parser.add_argument("--seed", type=int, default=INT_DEFAULT_SEED, help="random seed of boards")
+    parser.add_argument("--output", type=pathlib.Path, default=None, help="JSON file for results")
+    parser.add_argument("--baseline", type=pathlib.Path, default=None, help="JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=FLOAT_DEFAULT_THRESHOLD,
+                        help="allowed slowdown, 0.2 means 20 percent")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_arguments(sys.argv[1:])
+    results = run_suite(args.suite, args.repeat, args.seed, tuple(args.case))
+
+    if args.output is not None:
+        with open(args.output, mode='wt', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, mode='rt', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}.")
+            sys.exit(1)
+
+    sys.exit(0)
@@ -1,5 +1,7 @@
 import logging
 
+from classes import tracing
+
 
 logger = logging.getLogger(__name__)
 
@@ -7,56 +9,36 @@ logger = logging.getLogger(__name__)
 class BasicObject(object):
     """
     DESCR: Basic class for all objects in model.
+    NOTE: model classes declare __slots__, use _get_state() instead of vars() to inspect them
     """
 
-    def _general_logger(method, *args, **kwargs):  # what type will it return?
+    __slots__ = ("x", "y", "tile",)
+
+    def _general_logger(method, *args, **kwargs):
         """
-        DESCR: method used for debug purposses, does nothing but describes the execution
+        DESCR: method used for debug purposses, describes the execution when tracing is enabled for the method.
+               Resolved at decoration time: not traced methods are returned as is. See classes.tracing.
         """
-        result = None
-        line = ""
-        def decoration(self, *args, **kwargs) -> None:
-            global result
-            global line
-
-            line = "Object {obj} at {id} calling \"{mth}\" with args:{a}, and kwargs:{kw}." 
-            line = line.format(obj=self, id=id(self), mth=method.__name__, a=args, kw=kwargs)
-            #print(line)
-            logger.debug(line)
-            try:
-                result = method(self, *args, **kwargs)
-                line = "The result of {obj}.{mth} is: {r}."
-                line = line.format(obj=id(self), mth=method.__name__, r=result)
-                #print(line)
-                logger.debug(line)
-            except Exception as e:
-                line = "Exception occured while executing {obj}.{mth}. " +\
-                       "Cause: {ex_ca} ; Class: {ex_cl} ; Context: {ex_co} ; Args: {ex_ar} ; Trace: {ex_tr}. " +\
-                       "None will be returned." 
-                line = line.format(obj=id(self), mth=method.__name__, ex_ca=e.__cause__, ex_cl=e.__class__,
-                                  ex_co=e.__context__, ex_ar=e.args, ex_tr=e.with_traceback)
-                #print(line)
-                logger.error(line)
-                result = None
-            
-            return result
-        
-        return decoration
+
+        return tracing.traced(method)
     
 
     @_general_logger
     def __del__(self) -> None:
-        logger.debug(f"Object {self} at {id(self)} state before deletion: {vars(self)}.")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Object {self} at {id(self)} state before deletion: {self._get_state()}.")
         return None
 
     @_general_logger
     def __init__(self, position_x: int, position_y: int) -> None:
-        logger.debug(f"Object {self} at {id(self)} calling ancestor's method \"{super(object, self).__init__.__name__}\"")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Object {self} at {id(self)} calling ancestor's method \"{super(object, self).__init__.__name__}\"")
         super(BasicObject, self).__init__()
         self.x = position_x
         self.y = position_y
 
-        logger.debug(f"BasicObject instance {self} at {id(self)} state after initialization: {vars(self)}.")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"BasicObject instance {self} at {id(self)} state after initialization: {self._get_state()}.")
 
         return None
 
@@ -72,6 +54,21 @@ class BasicObject(object):
         return instance
 
 
+    @_general_logger
+    def _get_state(self,) -> dict:
+        """
+        DESCR: Get current attributes of this object, both from __slots__ and __dict__
+        RETURN: dictionary attribute name -> value
+        """
+        state = {}
+        for cls in reversed(type(self).__mro__):
+            for name in cls.__dict__.get("__slots__", ()):
+                if hasattr(self, name):
+                    state[name] = getattr(self, name)
+        state.update(getattr(self, "__dict__", {}))
+
+        return state
+
     @_general_logger
     def redraw(self,) -> str:
         """
@@ -0,0 +1,391 @@
+import array
+import json
+import logging
+import operator
+import os
+import queue
+import struct
+import sys
+import threading
+
+from classes.field_board import FieldBoard
+from classes.ground import Ground, TUPLE_GROUND_TILES
+from classes.illumination import compute_lights_field
+from classes.lighter import Lighter
+from classes.rng import RandomService
+from classes.species import get_species
+from classes.terrain_grid import TerrainGrid
+
+
+logger = logging.getLogger(__name__)
+
+
+BYTES_CHECKPOINT_MAGIC = b"FCCK"
+INT_CHECKPOINT_FORMAT_VERSION = 1
+STR_CHECKPOINT_HEADER_FORMAT = "<4sHBBQII"  # magic, version, byte order (0 - little, 1 - big), compact flag, tick, board x, board y
+INT_CHECKPOINT_HEADER_SIZE = struct.calcsize(STR_CHECKPOINT_HEADER_FORMAT)
+STR_BLOCK_SIZE_FORMAT = "<Q"
+INT_BLOCK_SIZE_SIZE = struct.calcsize(STR_BLOCK_SIZE_FORMAT)
+
+# integer attributes of every unit stored as columns, hunger, health and life state are read through Population
+TUPLE_UNIT_COLUMNS = ("x", "y", "damage_value", "moving_speed", "health_value", "hunger_value", "sight_value",
+                      "generation", "is_ready_to_reproduce", "is_alive",)
+DICT_POPULATION_UNIT_COLUMNS = {"hunger_value": "hunger", "health_value": "health", "is_alive": "alive"}  # column -> Population column
+
+
+class Snapshot(object):
+    """
+    DESCR: State of the simulation captured between ticks. Capture is cheap, the file buffers are built from it
+           by write_snapshot on background thread while simulation goes on:
+            - terrain layers are copied only when terrain version changes and shared by later snapshots,
+            - illumination is kept as lighters it is made of and calculated again when written,
+            - unit columns are gathered attribute by attribute without per unit python code, population columns
+              are copied, species, genomes and names are kept as lists of references.
+    """
+
+    __slots__ = ("tick", "size", "is_compact", "terrain_key", "layers", "light", "columns", "species", "genomes",
+                 "names", "meta",)
+
+    def __init__(self, tick: int, size: tuple, is_compact: bool, terrain_key: tuple, layers: dict, light: tuple,
+                 columns: dict, species: list, genomes: list, names: list, meta: dict) -> None:
+        self.tick = tick
+        self.size = size  # board size with borders
+        self.is_compact = is_compact
+        self.terrain_key = terrain_key  # (board id, terrain version) layers have been copied at
+        self.layers = layers  # TerrainGrid layer name -> bytes, shared between snapshots, must not be changed
+        self.light = light  # (lighters (x, y, power), metric) of current illumination, None when layers keep it
+        self.columns = columns  # TUPLE_UNIT_COLUMNS item -> array, units are in order of the board population
+        self.species = species  # classes of units
+        self.genomes = genomes
+        self.names = names
+        self.meta = meta  # JSON serializable part: lighters, random streams
+
+        return None
+
+
+def _get_terrain_layers(field: FieldBoard) -> dict:
+    """
+    DESCR: Copy terrain layers, legacy boards are converted into TerrainGrid layers
+    """
+    if field.is_compact:
+        return {name: bytes(field.field.layers[name]) for name in TerrainGrid.DICT_LAYER_TYPECODES}
+
+    grid = TerrainGrid(field.field_x, field.field_y, use_numpy=False)
+    for y, line in enumerate(field.field):
+        for x, block in enumerate(line):
+            if block is not None:
+                grid.store_ground(x, y, block)
+
+    return {name: bytes(grid.layers[name]) for name in TerrainGrid.DICT_LAYER_TYPECODES}
+
+
+def take_snapshot(field: FieldBoard, random_service: RandomService, tick: int, previous: Snapshot=None) -> Snapshot:
+    """
+    DESCR: Capture state of the simulation, must be called between ticks. Units are captured in order
+           of the board population, so resumed simulation makes the same moves.
+    ARGS:
+        - field: simulated board
+        - random_service: random numbers service of the simulation
+        - tick: count of ticks done
+        - previous: earlier snapshot of the board, it's terrain layers are reused while terrain is the same
+    RETURN: Snapshot
+    NOTE: terrain is copied synchronously on first capture and after FieldBoard.mark_terrain_changed only,
+          so terrain writers must call it
+    """
+    terrain_key = (id(field), field.terrain_version,)
+    illumination_state = field.illumination_state
+    light = None
+    if illumination_state is not None and illumination_state[1] == field.terrain_version:
+        light = (field.illumination_sources, illumination_state[2],)
+    if light is not None and previous is not None and previous.terrain_key == terrain_key:
+        layers = previous.layers
+    else:
+        layers = _get_terrain_layers(field)
+
+    population = field.population
+    meta = {
+        "lighters": [[lighter.x, lighter.y, lighter.power] for lighter in field.lighters],
+        "light_metric": field.light_metric,
+        "random": {
+            "seed": random_service.seed,
+            "path": list(random_service.path),
+            "streams": {name: [state[0], list(state[1]), state[2]] for name, state in random_service.get_state().items()},
+        },
+    }
+
+    units = population.units
+    columns = {}
+    for name in TUPLE_UNIT_COLUMNS:
+        if name in DICT_POPULATION_UNIT_COLUMNS:
+            columns[name] = getattr(population, DICT_POPULATION_UNIT_COLUMNS[name])[:]
+            continue
+        try:
+            columns[name] = array.array('i', map(operator.attrgetter(name), units))
+        except TypeError:
+            # attribute is not set for some units
+            columns[name] = array.array('i', (getattr(unit, name) or 0 for unit in units))
+
+    return Snapshot(tick, field.get_size(), field.is_compact, terrain_key, layers, light, columns,
+                    list(map(operator.attrgetter("__class__"), units)),
+                    list(map(operator.attrgetter("genome_set"), units)),
+                    list(map(operator.attrgetter("instance_name"), units)), meta)
+
+
+def _get_snapshot_layers(snapshot: Snapshot) -> dict:
+    """
+    RETURN: TerrainGrid layer name -> bytes, illumination is calculated from snapshot lighters
+    """
+    if snapshot.light is None:
+        return snapshot.layers
+
+    sources, metric = snapshot.light
+    layers = dict(snapshot.layers)
+    width, height = snapshot.size[0] - 2, snapshot.size[1] - 2
+    raster = compute_lights_field(width, height, sources, metric, Ground.INT_ILLUMINATION_VALUE_MIN,
+                                  Ground.INT_ILLUMINATION_VALUE_MAX, use_numpy=False)
+    layers["illumination"] = raster.tobytes()
+
+    return layers
+
+
+def _write_block(f, data: bytes) -> None:
+    f.write(struct.pack(STR_BLOCK_SIZE_FORMAT, len(data)))
+    f.write(data)
+
+    return None
+
+
+def _read_block(f) -> bytes:
+    header = f.read(INT_BLOCK_SIZE_SIZE)
+    if len(header) != INT_BLOCK_SIZE_SIZE:
+        raise ValueError("Checkpoint file is truncated.")
+    size, = struct.unpack(STR_BLOCK_SIZE_FORMAT, header)
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Checkpoint file is truncated.")
+
+    return data
+
+
+def write_snapshot(snapshot: Snapshot, path: str) -> int:
+    """
+    DESCR: Serialize snapshot into binary checkpoint file. File is written next to the target and replaced atomically,
+           so crash during writing keeps previous checkpoint.
+           Layout: header, JSON meta block, terrain layer blocks in TerrainGrid.DICT_LAYER_TYPECODES order,
+           unit column blocks in TUPLE_UNIT_COLUMNS order. Blocks are prefixed with their size.
+    RETURN: size of the file in bytes
+    """
+    meta = dict(snapshot.meta)
+    meta["species"] = [species.__name__ for species in snapshot.species]
+    meta["genomes"] = snapshot.genomes
+    meta["names"] = snapshot.names
+    layers = _get_snapshot_layers(snapshot)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, mode='wb') as f:
+        f.write(struct.pack(STR_CHECKPOINT_HEADER_FORMAT, BYTES_CHECKPOINT_MAGIC, INT_CHECKPOINT_FORMAT_VERSION,
+                            0 if sys.byteorder == "little" else 1, 1 if snapshot.is_compact else 0,
+                            snapshot.tick, snapshot.size[0], snapshot.size[1]))
+        _write_block(f, json.dumps(meta, separators=(',', ':')).encode("utf-8"))
+        for name in TerrainGrid.DICT_LAYER_TYPECODES:
+            _write_block(f, layers[name])
+        for name in TUPLE_UNIT_COLUMNS:
+            _write_block(f, array.array('i', snapshot.columns[name]).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(temporary, path)
+
+    return size
+
+
+def read_checkpoint(path: str) -> tuple:
+    """
+    DESCR: Restore simulation from checkpoint file
+    RETURN: tuple (FieldBoard with lighters and creatures, RandomService with restored streams, count of ticks done)
+    NOTE: ValueError is raised for files of unknown format, species of units must be registered
+    """
+    with open(path, mode='rb') as f:
+        header = f.read(INT_CHECKPOINT_HEADER_SIZE)
+        if len(header) != INT_CHECKPOINT_HEADER_SIZE:
+            raise ValueError(f"File \"{path}\" is not a checkpoint file.")
+        magic, version, byte_order, is_compact, tick, size_x, size_y = struct.unpack(STR_CHECKPOINT_HEADER_FORMAT, header)
+        if magic != BYTES_CHECKPOINT_MAGIC or version != INT_CHECKPOINT_FORMAT_VERSION:
+            raise ValueError(f"File \"{path}\" is not a checkpoint file of version {INT_CHECKPOINT_FORMAT_VERSION}.")
+        is_swapped = byte_order != (0 if sys.byteorder == "little" else 1)
+
+        meta = json.loads(_read_block(f).decode("utf-8"))
+        layers = {}
+        for name, typecode in TerrainGrid.DICT_LAYER_TYPECODES.items():
+            layers[name] = array.array(typecode, _read_block(f))
+        columns = {}
+        for name in TUPLE_UNIT_COLUMNS:
+            columns[name] = array.array('i', _read_block(f))
+
+    if is_swapped:
+        for values in list(layers.values()) + list(columns.values()):
+            values.byteswap()
+
+    field = FieldBoard(size_x, size_y, bool(is_compact))
+    field.light_metric = meta["light_metric"]
+    _restore_terrain(field, layers)
+    for lighter in meta["lighters"]:
+        field.add_lighter(Lighter(*lighter))
+
+    prototypes = {}  # species name -> unit made with constructor, other units copy it's tile
+    for i, species_name in enumerate(meta["species"]):
+        prototype = prototypes.get(species_name)
+        if prototype is None:
+            try:
+                species = get_species(species_name)
+            except KeyError:
+                raise ValueError(f"Species \"{species_name}\" of checkpoint \"{path}\" is not registered.")
+            prototype = species(0, 0)
+            prototypes[species_name] = prototype
+        # constructor is skipped, all stored attributes are set below
+        unit = type(prototype).__new__(type(prototype))
+        unit.tile = prototype.tile
+        for name in TUPLE_UNIT_COLUMNS[:-2]:
+            setattr(unit, name, columns[name][i])
+        unit.is_ready_to_reproduce = bool(columns["is_ready_to_reproduce"][i])
+        unit.life_state = "alive" if columns["is_alive"][i] else "dead"
+        unit.genome_set = meta["genomes"][i]
+        unit.instance_name = meta["names"][i]
+        field.add_creature(unit)
+
+    random_state = meta["random"]
+    random_service = RandomService(random_state["seed"], tuple(random_state["path"]))
+    random_service.set_state({name: (state[0], tuple(state[1]), state[2]) for name, state in random_state["streams"].items()})
+
+    logger.info(f"Checkpoint \"{path}\" restored: tick {tick}, board {size_x}X{size_y}, {len(meta['species'])} units.")
+
+    return (field, random_service, tick,)
+
+
+def _restore_terrain(field: FieldBoard, layers: dict) -> None:
+    if field.is_compact:
+        for name, values in layers.items():
+            # raw copy works for array, memoryview and numpy layers alike
+            memoryview(field.field.layers[name]).cast('B')[:] = values.tobytes()
+        return None
+
+    width = field.field_x
+    for y in range(field.field_y):
+        for x in range(width):
+            i = y * width + x
+            block = Ground(x, y, layers["illumination"][i], bool(layers["occupation"][i]))
+            block.fertility_value = layers["fertility"][i]
+            block.ground_type = layers["ground_type"][i]
+            block.speed_modifier = layers["speed_modifier"][i]
+            block.tile = TUPLE_GROUND_TILES[block.ground_type]
+            field.field[y][x] = block
+
+    return None
+
+
+class CheckpointWriter(object):
+    """
+    DESCR: Writes checkpoints periodically on background thread. Tick loop only captures a Snapshot,
+           serialization and disk writes are made by the writer thread. When previous checkpoint is still
+           being written, new one is skipped without capturing instead of stalling the simulation.
+    """
+
+    INT_DEFAULT_EVERY_TICKS = 1000
+
+    def __init__(self, path: str, every_ticks: int=None, start_tick: int=0) -> None:
+        """
+        ARGS:
+            - path: checkpoint file, replaced on every write
+            - every_ticks: period of checkpoints in ticks
+            - start_tick: count of ticks done before, e.g. tick of restored checkpoint
+        """
+        self.path = path
+        self.every_ticks = every_ticks if every_ticks is not None else self.INT_DEFAULT_EVERY_TICKS
+        self.tick = start_tick
+        self.queued_tick = start_tick  # tick of the last queued snapshot
+        self.last_snapshot = None  # last queued snapshot, it's terrain layers are reused by the next one
+
+        self.snapshots = queue.Queue(maxsize=1)
+        self.thread = None
+        self.written = 0
+        self.skipped = 0
+        self.failed = 0
+
+        return None
+
+    def _run(self,) -> None:
+        while True:
+            snapshot = self.snapshots.get()
+            if snapshot is None:
+                break
+            try:
+                size = write_snapshot(snapshot, self.path)
+                self.written += 1
+                logger.debug(f"Checkpoint of tick {snapshot.tick} written into \"{self.path}\", {size} bytes.")
+            except OSError as ex:
+                self.failed += 1
+                logger.warning(f"Checkpoint of tick {snapshot.tick} can not be written into \"{self.path}\": {ex}.")
+
+        return None
+
+    def start(self,) -> None:
+        self.thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self.thread.start()
+
+        return None
+
+    def stop(self,) -> None:
+        """
+        DESCR: Wait for queued checkpoint and stop the thread
+        """
+        if self.thread is None:
+            return None
+
+        self.snapshots.put(None)
+        self.thread.join()
+        self.thread = None
+
+        return None
+
+    def finish(self, field: FieldBoard, random_service: RandomService) -> None:
+        """
+        DESCR: Stop the thread and write state of the last tick, unless it has been queued already
+        """
+        self.stop()
+        if self.queued_tick != self.tick:
+            write_snapshot(take_snapshot(field, random_service, self.tick, self.last_snapshot), self.path)
+            self.queued_tick = self.tick
+            self.written += 1
+
+        return None
+
+    def on_tick(self, field: FieldBoard, random_service: RandomService) -> bool:
+        """
+        DESCR: Count finished tick and queue checkpoint when period has passed
+        RETURN: True if checkpoint has been queued
+        """
+        self.tick += 1
+        if self.every_ticks <= 0 or self.tick % self.every_ticks != 0:
+            return False
+        if self.snapshots.full():
+            self.skipped += 1
+            logger.info(f"Checkpoint of tick {self.tick} skipped, previous one is still being written.")
+            return False
+
+        return self.submit(take_snapshot(field, random_service, self.tick, self.last_snapshot))
+
+    def submit(self, snapshot: Snapshot) -> bool:
+        """
+        DESCR: Queue snapshot for writing, snapshot is dropped when writer is busy
+        RETURN: True if snapshot has been queued
+        """
+        try:
+            self.snapshots.put_nowait(snapshot)
+        except queue.Full:
+            self.skipped += 1
+            logger.info(f"Checkpoint of tick {snapshot.tick} skipped, previous one is still being written.")
+            return False
+        self.queued_tick = snapshot.tick
+        self.last_snapshot = snapshot
+
+        return True
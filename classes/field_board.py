@@ -1,8 +1,16 @@
+import collections
 import logging
 
 from classes.basic_object import BasicObject
+from classes.field_of_view import FieldOfView
+from classes.frame_renderer import FrameRenderer
 from classes.ground import Ground
+from classes.illumination import compute_light_field, compute_lights_field, get_light_bounds
+from classes.light_cache import LightStampCache
 from classes.lighter import Lighter
+from classes.population import Population
+from classes.spatial_index import SpatialHash
+from classes.terrain_grid import TerrainGrid
 from classes.unit_corpse import UnitCorpse
 
 
@@ -14,8 +22,16 @@ class FieldBoard(BasicObject):
     DESCR: Package class for all model objects
     """
     @BasicObject._general_logger
-    def __init__(self, size_x: int, size_y: int) -> None:
-        logger.debug(f"Object {self} at {id(self)} calling ancestor's method \"{super(object, self).__init__.__name__}\".")
+    def __init__(self, size_x: int, size_y: int, compact: bool=False) -> None:
+        """
+        DESCR: Create board of passed size
+        ARGS:
+            - size_x: horizontal board size, including borders
+            - size_y: vertical board size, including borders
+            - compact: store terrain in TerrainGrid typed arrays instead of list of lists of Ground objects
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Object {self} at {id(self)} calling ancestor's method \"{super(object, self).__init__.__name__}\".")
         super(FieldBoard, self).__init__(size_x, size_y)
 
         self.INT_MIN_SIDE_SIZE = 5  # minimum size of the field
@@ -26,6 +42,9 @@ class FieldBoard(BasicObject):
 
         self.field = []
         self.creatures = []
+        self.creatures_index = SpatialHash()
+        self.population = Population()
+        self.unit_views = FieldOfView(self)
 
         if self.x < self.INT_MIN_SIDE_SIZE:
             logger.info(f"{self} at {id(self)} was init with \"FieldBoard.x\" lower than allowed: {size_x} < {self.INT_MIN_SIDE_SIZE}. Min value applied instead.")
@@ -36,9 +55,22 @@ class FieldBoard(BasicObject):
         self.field_x = self.x - self.INT_FIELD_DIFF
         self.field_y = self.y - self.INT_FIELD_DIFF
 
-        self.field = [[None for j in range(self.field_x)] for i in range(self.field_y)]
+        self.lighters = []  # all light sources, FieldBoard.lighter is the first of them
+        self.light_metric = "euclidean"  # distance metric used for illumination calculation
+        self.light_cache = None
+        self.terrain_version = 0  # bumped by mark_terrain_changed
+        self.illumination_state = None  # (((lighter id, lighter version), ...), terrain version, metric) of current illumination
+        self.illumination_sources = None  # ((x, y, power), ...) of the lighters current illumination is made by
+
+        self.is_compact = compact
+        if self.is_compact:
+            self.field = TerrainGrid(self.field_x, self.field_y)
+        else:
+            self.field = [[None for j in range(self.field_x)] for i in range(self.field_y)]
+        self.renderer = FrameRenderer(self)
 
-        logger.debug(f"FieldBoard instance {self} at {id(self)} state after initialization: {vars(self)}.")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"FieldBoard instance {self} at {id(self)} state after initialization: {self._get_state()}.")
 
         return None
 
@@ -49,19 +81,36 @@ class FieldBoard(BasicObject):
         instance.blocks_occupied = None
 
         instance.creatures = None
+        instance.creatures_index = None
+        instance.population = None
+        instance.unit_views = None
+        instance.renderer = None
         instance.field_x = None
         instance.field_y = None
         instance.field = None
+        instance.is_compact = None
         instance.lighter = None
+        instance.lighters = None
+        instance.light_metric = None
+        instance.light_cache = None
+        instance.terrain_version = None
+        instance.illumination_state = None
+        instance.illumination_sources = None
 
         return instance
 
     @BasicObject._general_logger
     def _get_blocks_count(self,) -> int:
-        return sum([1 if elem is not None else 0 for elem in line for line in self.field])
+        if self.is_compact:
+            return self.field_x * self.field_y
+
+        return sum([1 if elem is not None else 0 for line in self.field for elem in line])
 
     @BasicObject._general_logger
     def _get_occupied_blocks_count(self,) -> int:
+        if self.is_compact:
+            return self.field.count_nonzero("occupation")
+
         count = 0
 
         for line in self.field:
@@ -83,41 +132,44 @@ class FieldBoard(BasicObject):
         return dist_x + dist_y
 
     @BasicObject._general_logger
-    def _get_rounded_euclidean_distance_between_block_and_lighter(self, block: Ground) -> int:
+    def _get_rounded_euclidean_distance_between_block_and_lighter(self, block: Ground, lighter: Lighter=None) -> int:
         """
-        DESCR: Gets Euclid's distance between self.lighter and passed block from self.field
+        DESCR: Gets Euclid's distance between lighter (self.lighter by default) and passed block from self.field
         ARGS:
             - block: exact ground segment of the field to which distance calculates to
-        RETURN: integer rounded value as distance between self.lighter and block from self.field
+        RETURN: integer rounded value as distance between lighter and block from self.field
         NOTE: direct calculation is not very effective
         """
+        lighter = lighter if lighter is not None else self.lighter
 
-        dist = int(((self.lighter.x - block.x) ** 2 + (self.lighter.y - block.y) ** 2) ** 0.5)
+        dist = int(((lighter.x - block.x) ** 2 + (lighter.y - block.y) ** 2) ** 0.5)
 
-        return 0
+        return dist
 
     @BasicObject._general_logger
-    def _get_manhattan_distance_between_block_and_lighter(self, block: Ground) -> int:
+    def _get_manhattan_distance_between_block_and_lighter(self, block: Ground, lighter: Lighter=None) -> int:
         """
-        DESCR: Gets Manhattans distance between self.lighter and passed block from self.field
+        DESCR: Gets Manhattans distance between lighter (self.lighter by default) and passed block from self.field
         ARGS:
             - block: exact ground segment of the field to which distance calculates to
-        RETURN: integer value as distance between self.lighter and block from self.field
+        RETURN: integer value as distance between lighter and block from self.field
         """
-        dist_x = abs(self.lighter.x - block.x)
-        dist_y = abs(self.lighter.y - block.y)
+        lighter = lighter if lighter is not None else self.lighter
+        dist_x = abs(lighter.x - block.x)
+        dist_y = abs(lighter.y - block.y)
 
         return dist_x + dist_y
 
     @BasicObject._general_logger
-    def _calculate_light_radiation(self, distance: int) -> int:
+    def _calculate_light_radiation(self, distance: int, lighter: Lighter=None) -> int:
         """
-        DESCR: calculate lumination value of self.lighter at passed distance radius
+        DESCR: calculate lumination value of lighter (self.lighter by default) at passed distance radius
         ARGS:
             - distance: radius at which illumination value need to be calculated
         RETURN: integer rounded value 
         """
-        rad_value = self.lighter.power - distance
+        lighter = lighter if lighter is not None else self.lighter
+        rad_value = lighter.power - distance
         if rad_value > 0:
             return rad_value
         
@@ -128,10 +180,44 @@ class FieldBoard(BasicObject):
     def add_creature(self, creature: UnitCorpse) -> None:
 
         self.creatures.append(creature)
-        logger.debug(f"{self} at {id(self)} added new creature {id(creature)} of type {type(creature)} to FieldBoard.creatures. Creatures total: {len(self.creatures)}")
+        self.creatures_index.insert(creature)
+        creature.spatial_index = self.creatures_index
+        self.population.add(creature)
+        logger.debug("%s at %s added new creature %s of type %s to FieldBoard.creatures. Creatures total: %s", self, id(self), id(creature), type(creature), len(self.creatures))
 
         return None
 
+    @BasicObject._general_logger
+    def get_creatures_in_radius(self, position_x: int, position_y: int, radius: int, metric: str="euclidean") -> list:
+        """
+        DESCR: Get creatures within distance from passed position
+        ARGS:
+            - position_x, position_y: center of the area
+            - radius: maximum distance, included
+            - metric: "euclidean" or "manhattan"
+        RETURN: list of creatures
+        """
+
+        return self.creatures_index.query_radius(position_x, position_y, radius, metric)
+
+    @BasicObject._general_logger
+    def get_creatures_in_rect(self, x_min: int, y_min: int, x_max: int, y_max: int) -> list:
+        """
+        DESCR: Get creatures within rectangle, boundaries are included
+        RETURN: list of creatures
+        """
+
+        return self.creatures_index.query_rect(x_min, y_min, x_max, y_max)
+
+    def get_lighters_state(self,) -> tuple:
+        """
+        DESCR: Get state of the board lighters, it changes when any lighter is moved, gets new power,
+               is added or removed
+        RETURN: tuple of (lighter id, lighter version) pairs
+        """
+
+        return tuple((id(lighter), lighter.version,) for lighter in self.lighters)
+
     @BasicObject._general_logger
     def get_size(self,) -> tuple:
         """
@@ -155,24 +241,48 @@ class FieldBoard(BasicObject):
         """
         DESCR: Draws pseudo graphical view of the field
         RETURN: list of lists containing lines of graphic interpretation
-        NOTE: think about better solution
+        NOTE: only cells changed since previous call are redrawn (see FieldBoard.renderer),
+              use redraw_changes or renderer.get_text to avoid building lists for the whole board
+        """
+        self.renderer.render()
+
+        return self.renderer.get_rows()
+
+    @BasicObject._general_logger
+    def redraw_changes(self,) -> list:
+        """
+        DESCR: Draws cells changed since previous redraw
+        RETURN: list of tuples (x, y, tile), coordinates include board borders
         """
-        
-        board = [['-' if self.field[y][x] is None else self.field[y][x].redraw() for x in range(self.field_x)] for y in range(self.field_y)]
 
-        for creature in self.creatures:
-            board[creature.y][creature.x] = creature.redraw()
+        return self.renderer.render()
 
-        for y in range(self.field_y):
-            board[y].insert(0, '-')
-            board[y].append('-')
+    @BasicObject._general_logger
+    def open_terrain_file(self, terrain_path: str, access: str="copy") -> bool:
+        """
+        DESCR: Replace field with terrain layers memory mapped from file created with TerrainGrid.create_file.
+               Board switches to compact mode, terrain pages are loaded on demand and shared between processes.
+        ARGS:
+            - terrain_path: path to terrain file
+            - access: "read", "write" or "copy" (changes are kept in this process only)
+        RETURN: True if terrain has been opened
+        """
 
-        board.insert(0, ['-' for _ in range(self.x)])
-        board.append(['-' for _ in range(self.x)])
+        grid = TerrainGrid.open_mapped(terrain_path, access)
+        if (grid.width, grid.height) != (self.field_x, self.field_y):
+            logger.info(f"Terrain file \"{terrain_path}\" size {grid.width}X{grid.height} differs from field size {(self.field_x, self.field_y)}. Opening aborted.")
+            grid.close()
+            return False
 
-        board[self.lighter.y][self.lighter.x] = self.lighter.redraw()
+        if self.is_compact:
+            self.field.close()
+        self.field = grid
+        self.is_compact = True
+        self.unit_views.reset()
+        self.mark_terrain_changed()
+        logger.debug("%s at %s field replaced with terrain file \"%s\".", self, id(self), terrain_path)
 
-        return board
+        return True
 
     @BasicObject._general_logger
     def remove_creature(self, creature_id: int) -> None:
@@ -181,44 +291,174 @@ class FieldBoard(BasicObject):
             return None
 
         banished = self.creatures.pop(creature_id)
-        logger.debug(f"Creature {id(banished)} removed from collection \"FieldBoard.creatures\".")
+        self.creatures_index.remove(banished)
+        banished.spatial_index = None
+        self.population.remove(banished)
+        logger.debug("Creature %s removed from collection \"FieldBoard.creatures\".", id(banished))
         del(banished)
 
         return None
 
+    @BasicObject._general_logger
+    def mark_terrain_changed(self,) -> None:
+        """
+        DESCR: Must be called after terrain cells have been replaced or changed outside of the board methods,
+               illumination is recalculated and the field is redrawn then
+        """
+        self.terrain_version += 1
+        self.renderer.mark_all()
+
+        return None
+
+    def _write_illumination(self, raster, x_min: int, y_min: int, x_max: int, y_max: int) -> int:
+        """
+        DESCR: Write raster of the rectangle (boundaries included) into illumination of the field
+        RETURN: count of written blocks
+        """
+        width = x_max - x_min + 1
+        blocks_recalculated = 0
+
+        if self.is_compact:
+            layer = self.field.layers["illumination"]
+            if width == self.field_x:
+                layer[y_min * width:(y_max + 1) * width] = raster
+            else:
+                for i, y in enumerate(range(y_min, y_max + 1)):
+                    start = y * self.field_x + x_min
+                    layer[start:start + width] = raster[i * width:(i + 1) * width]
+            return width * (y_max - y_min + 1)
+
+        for i, y in enumerate(range(y_min, y_max + 1)):
+            line = self.field[y]
+            offset = i * width - x_min
+            for x in range(x_min, x_max + 1):
+                elem = line[x]
+                if elem is not None:
+                    elem.illumination_value = int(raster[offset + x])
+                    blocks_recalculated += 1
+
+        return blocks_recalculated
+
     @BasicObject._general_logger
     def set_illumination(self,) -> int:
         """
-        DESCR: If FieldBoard.lighter exists calculate and illumination for all Ground exemplars in FieldBoard.field
+        DESCR: If FieldBoard.lighters exist calculate and illumination for all Ground exemplars in FieldBoard.field,
+               light of several lighters is summed and clamped to Ground.INT_ILLUMINATION_VALUE_MAX
+        NOTE: nothing is calculated while lighters (see Lighter.version), terrain (see mark_terrain_changed)
+              and metric stay the same. When only lighters have changed, just the cells within power
+              of changed lighters from old and new positions are recalculated, unless they cover most of the field.
+              Whole light field is calculated in one pass and then written into the field in bulk.
+        RETURN: count of recalculated blocks
         """
         blocks_recalculated = 0
 
-        if self.lighter is None:
-            logger.info(f"Method \"FieldBoard.set_illumination\" called when FieldBoard.lighter is None. Nothing to calculate")
+        if not self.lighters:
+            logger.info(f"Method \"FieldBoard.set_illumination\" called when FieldBoard.lighters is empty. Nothing to calculate")
+            return blocks_recalculated
         if self.field is None:
             logger.info(f"Method \"FieldBoard.set_illumination\" called when FieldBoard.field is None. Nothing to calculate")
+            return blocks_recalculated
+
+        state = (self.get_lighters_state(), self.terrain_version, self.light_metric,)
+        if state == self.illumination_state:
+            return blocks_recalculated
+        sources = tuple((lighter.x, lighter.y, lighter.power,) for lighter in self.lighters)
+
+        bounds = None
+        if self.illumination_state is not None and self.illumination_state[1:] == state[1:]:
+            # only lighters have changed: cells out of reach of changed lighters at both old and new positions keep their values
+            old_sources, new_sources = collections.Counter(self.illumination_sources), collections.Counter(sources)
+            changed = (old_sources - new_sources) + (new_sources - old_sources)
+            boxes = [b for b in (get_light_bounds(self.field_x, self.field_y, *source) for source in changed) if b is not None]
+            if len(boxes) == 0:
+                bounds = (0, 0, -1, -1,)
+            else:
+                bounds = (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes),)
+                if 2 * (bounds[2] - bounds[0] + 1) * (bounds[3] - bounds[1] + 1) >= self.field_x * self.field_y:
+                    # most of the field is affected, full raster (which may be cached) is cheaper
+                    bounds = None
+
+        if bounds is not None:
+            x_min, y_min, x_max, y_max = bounds
+            if x_min <= x_max:
+                raster = compute_lights_field(x_max - x_min + 1, y_max - y_min + 1,
+                                              [(x - x_min, y - y_min, power,) for x, y, power in sources], self.light_metric,
+                                              Ground.INT_ILLUMINATION_VALUE_MIN, Ground.INT_ILLUMINATION_VALUE_MAX,
+                                              cache=self.light_cache)
+                blocks_recalculated = self._write_illumination(raster, x_min, y_min, x_max, y_max)
+        elif len(sources) > 1:
+            # stamps of single lighters are cached, not the sums
+            raster = compute_lights_field(self.field_x, self.field_y, sources, self.light_metric,
+                                          Ground.INT_ILLUMINATION_VALUE_MIN, Ground.INT_ILLUMINATION_VALUE_MAX,
+                                          cache=self.light_cache)
+            blocks_recalculated = self._write_illumination(raster, 0, 0, self.field_x - 1, self.field_y - 1)
+        else:
+            source = sources[0]
+            raster = None
+            if self.light_cache is not None:
+                key = LightStampCache.make_key(self.field_x, self.field_y, source[0], source[1], source[2],
+                                               self.light_metric)
+                raster = self.light_cache.get(key)
+            if raster is None:
+                raster = compute_light_field(self.field_x, self.field_y, source[0], source[1], source[2],
+                                             self.light_metric, Ground.INT_ILLUMINATION_VALUE_MIN, Ground.INT_ILLUMINATION_VALUE_MAX)
+                if self.light_cache is not None:
+                    self.light_cache.put(key, raster)
+            blocks_recalculated = self._write_illumination(raster, 0, 0, self.field_x - 1, self.field_y - 1)
+
+        self.illumination_state = state
+        self.illumination_sources = sources
+        logger.debug("%s at %s recalculated illumination of %s blocks.", self, id(self), blocks_recalculated)
 
-        for i in range(self.field_y):
-            for j in range(self.field_x):
-                if self.field[i][j] is not None:
-                    logger.debug(f"{self} at {id(self)}, changing value Ground.illumination for object {type(field[i][j])} on {id(field[i][j])}...")
-                    dst = self._get_rounded_euclidean_distance_between_block_and_lighter(elem)
-                    elem.set_illumination(self._calculate_light_radiation(dst))  
-                    blocks_recalculated += 1
-                else:
-                    logger.debug(f"{self} at {id(self)} contains no element in FieldBoard.field on index {i};{j}.")
+        return blocks_recalculated
 
+    @BasicObject._general_logger
+    def set_light_cache(self, cache: LightStampCache) -> None:
+        """
+        DESCR: set cache of illumination rasters used by FieldBoard.set_illumination, None disables caching.
+        """
 
-        return blocks_recalculated
+        self.light_cache = cache
+        logger.debug("LightStampCache %s at %s has been set as board light cache with method FieldBoard.set_light_cache.", cache, id(cache))
+        return None
 
     @BasicObject._general_logger
     def set_lighter(self, lighter: Lighter) -> None:
         """
-        DESCR: set new Lighter object into lighter slot.
+        DESCR: set new Lighter object into lighter slot, other lighters are removed. None removes all lighters.
         """
 
         self.lighter = lighter
-        logger.debug(f"Lighter {lighter} at {id(lighter)} has been set as board lighter with method FieldBoard.set_lighter.")
+        self.lighters = [lighter] if lighter is not None else []
+        logger.debug("Lighter %s at %s has been set as board lighter with method FieldBoard.set_lighter.", lighter, id(lighter))
+        return None
+
+    @BasicObject._general_logger
+    def add_lighter(self, lighter: Lighter) -> None:
+        """
+        DESCR: add one more light source, the first added lighter takes lighter slot.
+        """
+
+        self.lighters.append(lighter)
+        if self.lighter is None:
+            self.lighter = lighter
+        logger.debug("Lighter %s at %s has been added to board lighters with method FieldBoard.add_lighter. Lighters total: %s", lighter, id(lighter), len(self.lighters))
+        return None
+
+    @BasicObject._general_logger
+    def remove_lighter(self, lighter: Lighter) -> None:
+        """
+        DESCR: remove light source, lighter slot takes the next lighter if removed one was there.
+        """
+        if lighter not in self.lighters:
+            logger.info(f"Method \"FieldBoard.remove_lighter\" called with lighter {id(lighter)} not on the board. Removing aborted.")
+            return None
+
+        self.lighters.remove(lighter)
+        if self.lighter is lighter:
+            self.lighter = self.lighters[0] if self.lighters else None
+        logger.debug("Lighter %s at %s removed from board lighters. Lighters total: %s", lighter, id(lighter), len(self.lighters))
+
         return None
 
     @BasicObject._general_logger
@@ -236,10 +476,10 @@ class FieldBoard(BasicObject):
         elif (new_x == self.x - 1 and (0 <= new_y < self.y)):
             pass
         else:
-            logger.debug(f"Got incorrect coordinates for object FieldBoard.Lighter. Position remains unchanged.")
+            logger.debug("Got incorrect coordinates for object FieldBoard.Lighter. Position remains unchanged.")
             return None
 
-        logger.debug(f"{self} at {id(self)} changed object FieldBoard.Lighter at {id(self.lighter)} attributes:[{self.lighter.get_position()} -> {tuple([new_x, new_y])}].")
+        logger.debug("%s at %s changed object FieldBoard.Lighter at %s attributes:[%s -> %s].", self, id(self), id(self.lighter), self.lighter.get_position(), tuple([new_x, new_y]))
         self.lighter.set_position(new_x, new_y)
 
         return None
\ No newline at end of file
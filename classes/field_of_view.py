@@ -0,0 +1,146 @@
+import functools
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def get_sight_offsets(sight: int, metric: str="euclidean") -> tuple:
+    """
+    DESCR: Get mask of cells visible from (0, 0) with passed sight value. Masks are calculated once per sight value.
+    ARGS:
+        - sight: sight radius, included
+        - metric: "euclidean" (circle) or "manhattan" (rhombus)
+    RETURN: tuple of (dx, dy) offsets, row by row
+    """
+    offsets = []
+    for dy in range(-sight, sight + 1):
+        for dx in range(-sight, sight + 1):
+            if metric == "manhattan":
+                if abs(dx) + abs(dy) <= sight:
+                    offsets.append((dx, dy,))
+            elif dx * dx + dy * dy <= sight * sight:
+                offsets.append((dx, dy,))
+
+    return tuple(offsets)
+
+
+@functools.lru_cache(maxsize=None)
+def get_sight_flat_offsets(sight: int, metric: str, width: int) -> tuple:
+    """
+    DESCR: Same mask as get_sight_offsets, expressed as offsets of flat row by row grid index of passed width
+    """
+
+    return tuple(dy * width + dx for dx, dy in get_sight_offsets(sight, metric))
+
+
+class UnitView(object):
+    """
+    DESCR: Part of the field visible from a position. Terrain is given as windows of the field rows
+           (zero-copy memoryviews or numpy views for TerrainGrid, lists of Ground objects otherwise).
+    """
+
+    __slots__ = ("x", "y", "sight", "metric", "bounds", "cells", "indexes", "terrain", "creatures",)
+
+    def __init__(self, position_x: int, position_y: int, sight: int, metric: str) -> None:
+        self.x = position_x
+        self.y = position_y
+        self.sight = sight
+        self.metric = metric
+
+        self.bounds = None  # (x_min, y_min, x_max, y_max) of visible window, included
+        self.cells = []  # visible cell coordinates (x, y)
+        self.indexes = []  # flat indexes of visible cells for TerrainGrid
+        self.terrain = []  # rows of visible window, for TerrainGrid - dictionary layer name -> rows
+        self.creatures = []
+
+        return None
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    def get_layer_values(self, layer) -> list:
+        """
+        DESCR: Get values of visible cells from flat layer buffer (TerrainGrid.layers item)
+        RETURN: list of values in the same order as UnitView.cells
+        """
+
+        return [layer[i] for i in self.indexes]
+
+
+class FieldOfView(object):
+    """
+    DESCR: Field of view engine of FieldBoard. Views are shared between units with the same position and sight
+           until reset() is called, which must happen once per tick.
+    """
+
+    def __init__(self, board, metric: str="euclidean") -> None:
+        """
+        ARGS:
+            - board: FieldBoard to look at
+            - metric: distance metric of the sight area
+        """
+        self.board = board
+        self.metric = metric
+
+        self.views = {}  # (x, y, sight) -> UnitView
+        self.hits = 0
+        self.misses = 0
+
+        return None
+
+    def _build_view(self, position_x: int, position_y: int, sight: int) -> UnitView:
+        board = self.board
+        width, height = board.field_x, board.field_y
+        view = UnitView(position_x, position_y, sight, self.metric)
+
+        x_min, x_max = max(position_x - sight, 0), min(position_x + sight, width - 1)
+        y_min, y_max = max(position_y - sight, 0), min(position_y + sight, height - 1)
+        if x_min > x_max or y_min > y_max:
+            return view
+        view.bounds = (x_min, y_min, x_max, y_max,)
+
+        offsets = get_sight_offsets(sight, self.metric)
+        if x_min == position_x - sight and x_max == position_x + sight and y_min == position_y - sight and y_max == position_y + sight:
+            # mask fits into the field, no boundary checks needed
+            view.cells = [(position_x + dx, position_y + dy,) for dx, dy in offsets]
+            base = position_y * width + position_x
+            view.indexes = [base + i for i in get_sight_flat_offsets(sight, self.metric, width)]
+        else:
+            view.cells = [(position_x + dx, position_y + dy,) for dx, dy in offsets
+                          if x_min <= position_x + dx <= x_max and y_min <= position_y + dy <= y_max]
+            view.indexes = [y * width + x for x, y in view.cells]
+
+        if board.is_compact:
+            view.terrain = {name: [board.field.get_row(name, y)[x_min:x_max + 1] for y in range(y_min, y_max + 1)]
+                            for name in board.field.layers}
+        else:
+            view.terrain = [board.field[y][x_min:x_max + 1] for y in range(y_min, y_max + 1)]
+
+        view.creatures = board.creatures_index.query_radius(position_x, position_y, sight, self.metric)
+
+        return view
+
+    def get_view(self, position_x: int, position_y: int, sight: int) -> UnitView:
+        """
+        DESCR: Get view from position, view is built once per position and sight until reset
+        """
+        key = (position_x, position_y, sight,)
+        view = self.views.get(key)
+        if view is None:
+            self.misses += 1
+            view = self._build_view(position_x, position_y, sight)
+            self.views[key] = view
+        else:
+            self.hits += 1
+
+        return view
+
+    def reset(self,) -> None:
+        """
+        DESCR: Forget views built so far, field or creatures have changed
+        """
+        self.views.clear()
+
+        return None
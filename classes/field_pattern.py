@@ -0,0 +1,267 @@
+import hashlib
+import logging
+import os
+import pathlib
+import struct
+
+from classes.ground import TUPLE_GROUND_TILES
+
+
+logger = logging.getLogger(__name__)
+
+
+BYTES_PATTERN_MAGIC = b"FCPT"
+INT_PATTERN_FORMAT_VERSION = 1
+STR_PATTERN_HEADER_FORMAT = "<4sHII"  # magic, version, width, height
+INT_PATTERN_HEADER_SIZE = struct.calcsize(STR_PATTERN_HEADER_FORMAT)
+STR_PATTERN_CACHE_DIR = ".pattern_cache"
+INT_INVALID_SYMBOL = 0xFF
+
+# byte -> ground_type translation table, symbols missing in docs/field_syntax.md are mapped to INT_INVALID_SYMBOL
+BYTES_SYMBOL_TABLE = bytes(TUPLE_GROUND_TILES.index(chr(b)) if chr(b) in TUPLE_GROUND_TILES else INT_INVALID_SYMBOL
+                           for b in range(256))
+
+
+class FieldPattern(object):
+    """
+    DESCR: Compiled field pattern: ground_type of every cell, one byte per cell, row by row.
+    """
+
+    __slots__ = ("width", "height", "ground_types",)
+
+    def __init__(self, width: int, height: int, ground_types: bytes) -> None:
+        if len(ground_types) != width * height:
+            raise ValueError(f"Pattern raster size {len(ground_types)} does not match {width}X{height}.")
+
+        self.width = width
+        self.height = height
+        self.ground_types = ground_types
+
+        return None
+
+    def get_row(self, y: int) -> bytes:
+        return self.ground_types[y * self.width:(y + 1) * self.width]
+
+
+def _translate_row(row: bytes, line_number: int) -> bytes:
+    """
+    DESCR: Translate single pattern row into ground types
+    NOTE: ValueError is raised on unknown symbols
+    """
+    data = row.translate(BYTES_SYMBOL_TABLE)
+    if INT_INVALID_SYMBOL in data:
+        position = data.index(INT_INVALID_SYMBOL)
+        symbol = row[position:position + 1].decode('utf-8', errors='replace')
+        raise ValueError(f"Pattern line {line_number} contains unknown symbol \"{symbol}\" at position {position}.")
+
+    return data
+
+
+def iter_pattern_rows(rows):
+    """
+    DESCR: Validate and translate pattern rows one by one, only current row is kept in memory
+    ARGS:
+        - rows: iterable of str, bytes (e.g. file opened in binary mode) or lists of single symbols.
+                Empty rows are skipped.
+    RETURN: generator of ground types rows, bytes with one byte per cell
+    NOTE: ValueError is raised on unknown symbols and rows of different length
+    """
+    width = None
+
+    for line_number, row in enumerate(rows, 1):
+        if isinstance(row, list):
+            row = ''.join(row)
+        if isinstance(row, str):
+            try:
+                row = row.encode('ascii')
+            except UnicodeEncodeError:
+                raise ValueError(f"Pattern line {line_number} contains non ASCII symbols.")
+        row = row.rstrip(b'\r\n')
+        if len(row) == 0:
+            continue
+
+        data = _translate_row(row, line_number)
+        if width is None:
+            width = len(data)
+        elif len(data) != width:
+            raise ValueError(f"Pattern line {line_number} has length {len(data)}, expected {width}.")
+
+        yield data
+
+
+def compile_pattern_rows(rows) -> FieldPattern:
+    """
+    DESCR: Translate text rows of the pattern into ground types raster
+    ARGS:
+        - rows: iterable of strings or lists of single symbols, empty rows are skipped
+    RETURN: FieldPattern
+    NOTE: ValueError is raised on unknown symbols and rows of different length
+    """
+    raster = bytearray()
+    width = 0
+    height = 0
+
+    for data in iter_pattern_rows(rows):
+        width = len(data)
+        raster += data
+        height += 1
+
+    return FieldPattern(width, height, bytes(raster))
+
+
+def compile_pattern_file(pattern_path: pathlib.Path, compiled_path: pathlib.Path) -> tuple:
+    """
+    DESCR: Compile text pattern into binary file row by row, memory usage does not depend on pattern size.
+           Compiled file is replaced atomically.
+    RETURN: tuple (width, height)
+    """
+    temporary = compiled_path.with_name(compiled_path.name + f".{os.getpid()}.tmp")
+    width = 0
+    height = 0
+
+    try:
+        with open(pattern_path, mode='rb') as source, open(temporary, mode='wb') as target:
+            target.write(struct.pack(STR_PATTERN_HEADER_FORMAT, BYTES_PATTERN_MAGIC, INT_PATTERN_FORMAT_VERSION, 0, 0))
+            for data in iter_pattern_rows(source):
+                width = len(data)
+                target.write(data)
+                height += 1
+            target.seek(0)
+            target.write(struct.pack(STR_PATTERN_HEADER_FORMAT, BYTES_PATTERN_MAGIC, INT_PATTERN_FORMAT_VERSION, width, height))
+        os.replace(temporary, compiled_path)
+    finally:
+        if temporary.exists():
+            temporary.unlink()
+
+    return (width, height,)
+
+
+def get_file_hash(path: pathlib.Path) -> str:
+    """
+    DESCR: sha256 of the file contents, file is read in chunks
+    """
+    digest = hashlib.sha256()
+    with open(path, mode='rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def read_compiled_pattern_header(path: pathlib.Path) -> tuple:
+    """
+    DESCR: Read size of compiled pattern without reading it's raster
+    RETURN: tuple (width, height) or None when file is missing or has unsupported format
+    """
+    try:
+        with open(path, mode='rb') as f:
+            header = f.read(INT_PATTERN_HEADER_SIZE)
+            size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return None
+
+    if len(header) < INT_PATTERN_HEADER_SIZE:
+        return None
+    magic, version, width, height = struct.unpack(STR_PATTERN_HEADER_FORMAT, header)
+    if magic != BYTES_PATTERN_MAGIC or version != INT_PATTERN_FORMAT_VERSION or size != INT_PATTERN_HEADER_SIZE + width * height:
+        return None
+
+    return (width, height,)
+
+
+def read_compiled_pattern(path: pathlib.Path) -> FieldPattern:
+    """
+    DESCR: Read compiled pattern file with a single read
+    RETURN: FieldPattern or None when file is missing or has unsupported format
+    """
+    try:
+        with open(path, mode='rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) < INT_PATTERN_HEADER_SIZE:
+        return None
+    magic, version, width, height = struct.unpack_from(STR_PATTERN_HEADER_FORMAT, data)
+    if magic != BYTES_PATTERN_MAGIC or version != INT_PATTERN_FORMAT_VERSION or len(data) != INT_PATTERN_HEADER_SIZE + width * height:
+        logger.info(f"Compiled pattern \"{path}\" has unsupported format. Ignored.")
+        return None
+
+    return FieldPattern(width, height, data[INT_PATTERN_HEADER_SIZE:])
+
+
+def write_compiled_pattern(path: pathlib.Path, pattern: FieldPattern) -> None:
+    """
+    DESCR: Store compiled pattern, file is replaced atomically
+    """
+    temporary = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with open(temporary, mode='wb') as f:
+        f.write(struct.pack(STR_PATTERN_HEADER_FORMAT, BYTES_PATTERN_MAGIC, INT_PATTERN_FORMAT_VERSION, pattern.width, pattern.height))
+        f.write(pattern.ground_types)
+    os.replace(temporary, path)
+
+    return None
+
+
+def get_compiled_pattern_path(pattern_path: pathlib.Path, cache_dir: pathlib.Path=None) -> pathlib.Path:
+    """
+    DESCR: Get compiled version of text pattern file, pattern is compiled (streaming) when not cached yet
+    ARGS:
+        - pattern_path: path to UTF-8 text pattern
+        - cache_dir: directory of compiled patterns, ".pattern_cache" near the pattern file by default
+    RETURN: path to compiled pattern file, named by hash of the source file
+    """
+    pattern_path = pathlib.Path(pattern_path)
+    cache_dir = pathlib.Path(cache_dir) if cache_dir is not None else pattern_path.parent / STR_PATTERN_CACHE_DIR
+    compiled_path = cache_dir / f"{get_file_hash(pattern_path)}.fcp"
+
+    if read_compiled_pattern_header(compiled_path) is not None:
+        logger.debug(f"Pattern \"{pattern_path}\" found in cache \"{compiled_path}\".")
+        return compiled_path
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    width, height = compile_pattern_file(pattern_path, compiled_path)
+    logger.debug(f"Pattern \"{pattern_path}\" {width}X{height} compiled into \"{compiled_path}\".")
+
+    return compiled_path
+
+
+def load_pattern(pattern_path: pathlib.Path, cache_dir: pathlib.Path=None) -> FieldPattern:
+    """
+    DESCR: Load text pattern file, compiled raster is cached on disk by hash of the source file
+    ARGS:
+        - pattern_path: path to UTF-8 text pattern
+        - cache_dir: directory of compiled patterns, ".pattern_cache" near the pattern file by default
+    RETURN: FieldPattern
+    """
+    try:
+        compiled_path = get_compiled_pattern_path(pattern_path, cache_dir)
+    except OSError as ex:
+        # cache is not writable, pattern is compiled in memory
+        logger.warning(f"Compiled pattern can not be stored: {ex}.")
+        with open(pattern_path, mode='rb') as f:
+            return compile_pattern_rows(f)
+
+    return read_compiled_pattern(compiled_path)
+
+
+def stream_pattern_into_grid(pattern_path: pathlib.Path, grid) -> tuple:
+    """
+    DESCR: Read text pattern row by row and write ground types straight into TerrainGrid.
+           Only current row is kept in memory. Rows and columns out of grid are ignored.
+    ARGS:
+        - pattern_path: path to UTF-8 text pattern
+        - grid: TerrainGrid to be filled
+    RETURN: tuple (pattern width, pattern height)
+    """
+    width = 0
+    height = 0
+
+    with open(pattern_path, mode='rb') as f:
+        for y, data in enumerate(iter_pattern_rows(f)):
+            if y < grid.height:
+                grid.set_ground_types_row(y, data)
+            width = len(data)
+            height = y + 1
+
+    return (width, height,)
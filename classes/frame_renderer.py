@@ -0,0 +1,181 @@
+import logging
+
+from classes.ground import TUPLE_GROUND_TILES
+
+
+logger = logging.getLogger(__name__)
+
+
+BYTES_BORDER_TILE = b"-"
+BYTES_EMPTY_TILE = b"-"
+
+
+class FrameRenderer(object):
+    """
+    DESCR: Text renderer of FieldBoard keeping persistent frame buffer. Only cells marked dirty are redrawn:
+           lighters moves are detected on render, creature moves come from the board spatial index,
+           terrain writers must call mark_cell, mark_field_rect or mark_all. Frame covers the whole board
+           with borders, one byte per cell, rows are separated with new lines.
+    """
+
+    def __init__(self, board) -> None:
+        """
+        ARGS:
+            - board: FieldBoard to draw, renderer subscribes to it's creatures index
+        """
+        self.board = board
+        self.width = board.x
+        self.height = board.y
+        self.stride = self.width + 1  # row with new line symbol
+
+        self.frame = bytearray((BYTES_BORDER_TILE * self.width + b"\n") * self.height)
+        self.dirty = set()  # flat frame indexes waiting for redraw
+        self.is_full_redraw = True
+        self.lighter_positions = ()  # positions of lighters in the frame
+        self.tile_bytes = {}  # tile symbol -> frame byte
+        self.frames_count = 0
+        self.cells_drawn = 0
+
+        board.creatures_index.add_watcher(self._on_creature_changed)
+
+        return None
+
+    def _on_creature_changed(self, creature, old_position: tuple, new_position: tuple) -> None:
+        if creature is None:
+            self.mark_all()
+            return None
+
+        # creatures live in field coordinates, frame has extra border
+        if old_position is not None:
+            self.mark_cell(old_position[0] + 1, old_position[1] + 1)
+        if new_position is not None:
+            self.mark_cell(new_position[0] + 1, new_position[1] + 1)
+
+        return None
+
+    def _get_tile_byte(self, tile: str) -> int:
+        value = self.tile_bytes.get(tile)
+        if value is None:
+            # non ASCII tiles are drawn as "?"
+            value = (tile or BYTES_EMPTY_TILE.decode()).encode("ascii", errors="replace")[0]
+            self.tile_bytes[tile] = value
+
+        return value
+
+    def _get_cell_tile(self, x: int, y: int) -> str:
+        """
+        DESCR: Resolve tile of the board cell: lighter, then creature, then terrain
+        """
+        board = self.board
+        for lighter in board.lighters:
+            if lighter.x == x and lighter.y == y:
+                return lighter.redraw()
+
+        if x == 0 or y == 0 or x == self.width - 1 or y == self.height - 1:
+            return BYTES_BORDER_TILE.decode()
+
+        field_x, field_y = x - 1, y - 1
+        creatures = board.creatures_index.query_rect(field_x, field_y, field_x, field_y)
+        if creatures:
+            return creatures[-1].redraw()
+
+        if board.is_compact:
+            return TUPLE_GROUND_TILES[board.field.layers["ground_type"][field_y * board.field_x + field_x]]
+
+        block = board.field[field_y][field_x]
+
+        return BYTES_EMPTY_TILE.decode() if block is None else block.redraw()
+
+    def mark_all(self,) -> None:
+        """
+        DESCR: Redraw whole frame on next render
+        """
+        self.is_full_redraw = True
+        self.dirty.clear()
+
+        return None
+
+    def mark_cell(self, x: int, y: int) -> None:
+        """
+        DESCR: Redraw cell on next render, coordinates include board border
+        """
+        if 0 <= x < self.width and 0 <= y < self.height and not self.is_full_redraw:
+            self.dirty.add(y * self.stride + x)
+
+        return None
+
+    def mark_field_rect(self, x_min: int, y_min: int, x_max: int, y_max: int) -> None:
+        """
+        DESCR: Redraw terrain cells within rectangle on next render, coordinates are field ones (without border),
+               boundaries are included
+        """
+        for y in range(max(y_min, 0) + 1, min(y_max + 1, self.height - 2) + 1):
+            for x in range(max(x_min, 0) + 1, min(x_max + 1, self.width - 2) + 1):
+                self.mark_cell(x, y)
+
+        return None
+
+    def render(self,) -> list:
+        """
+        DESCR: Bring frame up to date, cost depends on count of dirty cells only
+        RETURN: list of changed cells (x, y, tile), coordinates include board border
+        """
+        lighter_positions = tuple((lighter.x, lighter.y,) for lighter in self.board.lighters)
+        if lighter_positions != self.lighter_positions:
+            for position in self.lighter_positions + lighter_positions:
+                self.mark_cell(*position)
+            self.lighter_positions = lighter_positions
+
+        if self.is_full_redraw:
+            indexes = [y * self.stride + x for y in range(self.height) for x in range(self.width)]
+            self.is_full_redraw = False
+        else:
+            indexes = self.dirty
+        self.dirty = set()
+
+        frame = self.frame
+        stride = self.stride
+        changes = []
+        for i in indexes:
+            y, x = divmod(i, stride)
+            tile = self._get_cell_tile(x, y)
+            value = self._get_tile_byte(tile)
+            if frame[i] != value:
+                frame[i] = value
+                changes.append((x, y, tile,))
+
+        self.frames_count += 1
+        self.cells_drawn += len(indexes)
+
+        return changes
+
+    def get_cells(self,) -> list:
+        """
+        RETURN: every cell of current frame as list of (x, y, tile), e.g. to paint a new image,
+                coordinates include board border
+        """
+        stride = self.stride
+        frame = self.frame
+
+        return [(x, y, chr(frame[y * stride + x]),) for y in range(self.height) for x in range(self.width)]
+
+    def get_frame(self,) -> bytes:
+        """
+        RETURN: current frame as bytes, rows are separated with new lines
+        """
+
+        return bytes(self.frame)
+
+    def get_text(self,) -> str:
+        """
+        RETURN: current frame as single string, rows are separated with new lines
+        """
+
+        return self.frame.decode("ascii").rstrip("\n")
+
+    def get_rows(self,) -> list:
+        """
+        RETURN: current frame as list of lists of tile symbols
+        """
+
+        return [list(row) for row in self.get_text().split("\n")]
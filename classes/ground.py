@@ -6,21 +6,27 @@ from classes.basic_object import BasicObject
 logger = logging.getLogger(__name__)
 
 
+TUPLE_GROUND_TILES = ('G', 'D', 'i', '>', 'V', 'w', ':',)  # tile symbol for every ground_type value, see docs/field_syntax.md
+
+
 class Ground(BasicObject):
     """
     DESCR: Class represents terrain field object
     """
 
+    __slots__ = ("illumination_value", "fertility_value", "ground_type", "is_occupied", "speed_modifier",)
+
+    INT_ILLUMINATION_VALUE_MAX = int(100)  # maximum possible value of illumination
+    INT_ILLUMINATION_VALUE_MIN = int(0)  # minimum possible value of illumination
+    INT_FERTILITY_VALUE_MAX = int(100)
+    INT_FERTILITY_VALUE_MIN = int(0)
+
     @BasicObject._general_logger
     def __init__(self, position_x: int, position_y: int, illumination: int=None, occupation: bool=None) -> None:
-        logger.debug(f"Object {self} at {id(self)} calling ancestor's method \"{super(object, self).__init__.__name__}\".")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Object {self} at {id(self)} calling ancestor's method \"{super(object, self).__init__.__name__}\".")
         super(Ground, self).__init__(position_x, position_y)
-        
-        self.INT_ILLUMINATION_VALUE_MAX = int(100)  # maximum possible value of illumination
-        self.INT_ILLUMINATION_VALUE_MIN = int(0)  # minimum possible value of illumination
-        self.INT_FERTILITY_VALUE_MAX = int(100)
-        self.INT_FERTILITY_VALUE_MIN = int(0)
-        
+
         self.illumination_value = illumination if illumination is not None else 0  # how much light energy can be stored in this block (Producenses)
         self.fertility_value = 0  # current value of food (i.e. corpse) left in this block (Reducenses)
         
@@ -32,19 +38,16 @@ class Ground(BasicObject):
         
         self.tile = "G"
 
-        logger.debug(f"Ground instance {self} at {id(self)} state after initialization: {vars(self)}.")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Ground instance {self} at {id(self)} state after initialization: {self._get_state()}.")
 
         return None
 
     def __new__(cls, *args, **kwargs) -> BasicObject:
         instance = super(Ground, cls).__new__(cls, *args, **kwargs)
 
-        instance.INT_FERTILITY_VALUE_MAX = None
-        instance.INT_FERTILITY_VALUE_MIN = None
         instance.fertility_value = None
 
-        instance.INT_ILLUMINATION_VALUE_MAX = None
-        instance.INT_ILLUMINATION_VALUE_MIN = None
         instance.illumination_value = None
         
         instance.ground_type = None
@@ -126,7 +129,7 @@ class Ground(BasicObject):
             logger.info(f"Method \"Ground.set_fertility\" called with argument \"fertility\" higher than max bound: {fertility} > {self.INT_FERTILITY_VALUE_MIN}. Max value applied instead.")
         else:
             pass
-        logger.debug(f"Object's {self} at {id(self)} attribute \"fertility_value\" changed: {self.fertility_value} -> {fertility}.")
+        logger.debug("Object's %s at %s attribute \"fertility_value\" changed: %s -> %s.", self, id(self), self.fertility_value, fertility)
         self.fertility_value = fertility
 
         return None
@@ -147,14 +150,14 @@ class Ground(BasicObject):
             illumination = self.INT_ILLUMINATION_VALUE_MIN
         else:
             pass
-        logger.debug(f"Object's {self} at {id(self)} attribute \"illumination_value\" changed: {self.illumination_value} -> {illumination}.")
+        logger.debug("Object's %s at %s attribute \"illumination_value\" changed: %s -> %s.", self, id(self), self.illumination_value, illumination)
         self.illumination_value = illumination
 
         return None
 
     @BasicObject._general_logger
     def set_occupation(self, occupation: bool) -> None:
-        logger.debug(f"Object's {self} at {id(self)} attribute \"is_occupied\" changed: {self.is_occupied} -> {occupation}.")
+        logger.debug("Object's %s at %s attribute \"is_occupied\" changed: %s -> %s.", self, id(self), self.is_occupied, occupation)
         self.is_occupied = occupation;
 
         return None
\ No newline at end of file
@@ -0,0 +1,170 @@
+import array
+import logging
+import math
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, pure python kernel is used instead
+    numpy = None
+
+
+logger = logging.getLogger(__name__)
+
+
+TUPLE_DISTANCE_METRICS = ("euclidean", "manhattan",)
+
+
+def _get_distance(dx: int, dy: int, metric: str) -> int:
+    """
+    DESCR: Integer distance between two cells, euclidean distance is rounded down
+    """
+    if metric == "manhattan":
+        return abs(dx) + abs(dy)
+
+    return math.isqrt(dx * dx + dy * dy)
+
+
+def _compute_light_field_numpy(width: int, height: int, light_x: int, light_y: int, power: int, metric: str,
+                               value_min: int, value_max: int):
+    dx = numpy.abs(numpy.arange(width, dtype=numpy.int64) - light_x)[numpy.newaxis, :]
+    dy = numpy.abs(numpy.arange(height, dtype=numpy.int64) - light_y)[:, numpy.newaxis]
+
+    if metric == "manhattan":
+        distance = dx + dy
+    else:
+        distance = numpy.floor(numpy.sqrt(dx * dx + dy * dy)).astype(numpy.int64)
+
+    raster = numpy.clip(power - distance, max(value_min, 0), value_max)
+
+    return raster.astype(numpy.int16).ravel()
+
+
+def _compute_light_field_python(width: int, height: int, light_x: int, light_y: int, power: int, metric: str,
+                                value_min: int, value_max: int) -> array.array:
+    floor_value = max(value_min, 0)
+    raster = array.array('h', [floor_value]) * (width * height)
+    if power - floor_value <= 0:
+        return raster
+
+    # only cells closer than power are lighted, everything else keeps floor value
+    y_from, y_to = max(light_y - power + 1, 0), min(light_y + power, height)
+    x_from, x_to = max(light_x - power + 1, 0), min(light_x + power, width)
+    if y_from >= y_to or x_from >= x_to:
+        return raster
+
+    # value depends on |dx| and |dy| only: every row is built once per |dy| from mirrored slices
+    rows_cache = {}
+    k_max = max(abs(x_from - light_x), abs(x_to - 1 - light_x))
+    left_end, right_start = min(light_x, x_to), max(light_x, x_from)
+    for y in range(y_from, y_to):
+        dy = abs(y - light_y)
+        row = rows_cache.get(dy)
+        if row is None:
+            values = [min(max(power - _get_distance(k, dy, metric), floor_value), value_max) for k in range(k_max + 1)]
+            row = array.array('h')
+            if left_end > x_from:
+                row.extend(values[light_x - left_end + 1:light_x - x_from + 1][::-1])
+            if x_to > right_start:
+                row.extend(values[right_start - light_x:x_to - light_x])
+            rows_cache[dy] = row
+        start = y * width
+        raster[start + x_from:start + x_to] = row
+
+    return raster
+
+
+def compute_light_field(width: int, height: int, light_x: int, light_y: int, power: int, metric: str="euclidean",
+                        value_min: int=0, value_max: int=100, use_numpy: bool=None):
+    """
+    DESCR: Calculate illumination of every cell of the grid in a single pass.
+           Value of the cell is lighter power reduced by distance to lighter, but not lower than zero.
+    ARGS:
+        - width, height: grid size
+        - light_x, light_y: lighter coordinates
+        - power: lighter power
+        - metric: "euclidean" (rounded down) or "manhattan" distance
+        - value_min, value_max: boundaries of illumination value
+        - use_numpy: use numpy kernel, by default numpy is used when installed
+    RETURN: flat raster (row by row) of int16 values, numpy.ndarray or array.array
+    """
+    if metric not in TUPLE_DISTANCE_METRICS:
+        raise ValueError(f"Unknown distance metric \"{metric}\", expected one of {TUPLE_DISTANCE_METRICS}.")
+
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    if use_numpy and numpy is not None:
+        return _compute_light_field_numpy(width, height, light_x, light_y, power, metric, value_min, value_max)
+
+    return _compute_light_field_python(width, height, light_x, light_y, power, metric, value_min, value_max)
+
+
+def get_light_bounds(width: int, height: int, light_x: int, light_y: int, power: int) -> tuple:
+    """
+    DESCR: Get rectangle of the grid which may be lighted, cells outside of it are at floor value
+    RETURN: tuple (x_min, y_min, x_max, y_max), boundaries included, or None when no cell is lighted
+    """
+    x_min, x_max = max(light_x - power + 1, 0), min(light_x + power - 1, width - 1)
+    y_min, y_max = max(light_y - power + 1, 0), min(light_y + power - 1, height - 1)
+    if x_min > x_max or y_min > y_max:
+        return None
+
+    return (x_min, y_min, x_max, y_max,)
+
+
+def compute_lights_field(width: int, height: int, sources, metric: str="euclidean", value_min: int=0,
+                         value_max: int=100, use_numpy: bool=None, cache=None):
+    """
+    DESCR: Calculate illumination of every cell of the grid lighted by several lighters. Every lighter
+           makes a stamp of the cells within it's power only, stamps are summed in accumulation raster
+           and the sum is clamped to value_max.
+    ARGS:
+        - width, height: grid size
+        - sources: sequence of (light_x, light_y, power), lighters may be out of the grid
+        - metric, value_min, value_max, use_numpy: see compute_light_field
+        - cache: LightStampCache for stamps, stamps are not cached when None
+    RETURN: flat raster (row by row) of int16 values, numpy.ndarray or array.array
+    """
+    if len(sources) == 1:
+        return compute_light_field(width, height, *sources[0], metric, value_min, value_max, use_numpy)
+
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    use_numpy = use_numpy and numpy is not None
+    floor_value = max(value_min, 0)
+    if use_numpy:
+        raster = numpy.full((height, width), floor_value, dtype=numpy.int16)
+    else:
+        raster = array.array('h', [floor_value]) * (width * height)
+
+    for light_x, light_y, power in sources:
+        bounds = get_light_bounds(width, height, light_x, light_y, power)
+        if bounds is None:
+            continue
+        x_min, y_min, x_max, y_max = bounds
+        stamp_width, stamp_height = x_max - x_min + 1, y_max - y_min + 1
+
+        stamp = None
+        if cache is not None:
+            key = cache.make_key(stamp_width, stamp_height, light_x - x_min, light_y - y_min, power, metric)
+            stamp = cache.get(key)
+        if stamp is None:
+            stamp = compute_light_field(stamp_width, stamp_height, light_x - x_min, light_y - y_min, power, metric,
+                                        value_min, value_max, use_numpy)
+            if cache is not None:
+                cache.put(key, stamp)
+
+        if use_numpy:
+            # int16 does not overflow: both values are clamped to value_max before addition
+            region = raster[y_min:y_max + 1, x_min:x_max + 1]
+            region += numpy.asarray(stamp).reshape(stamp_height, stamp_width) - floor_value
+            numpy.minimum(region, value_max, out=region)
+        else:
+            for i in range(stamp_height):
+                start = (y_min + i) * width + x_min
+                raster[start:start + stamp_width] = array.array('h', [
+                    min(value + lighted - floor_value, value_max)
+                    for value, lighted in zip(raster[start:start + stamp_width],
+                                              stamp[i * stamp_width:(i + 1) * stamp_width])
+                ])
+
+    return raster.ravel() if use_numpy else raster
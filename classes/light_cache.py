@@ -0,0 +1,110 @@
+import collections
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class LightStampCache(object):
+    """
+    DESCR: LRU storage of finished illumination rasters. Lighter moves along a fixed path,
+           so after the first lap every light field can be copied from here instead of being calculated.
+    """
+
+    INT_DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # bytes
+
+    def __init__(self, memory_budget: int=None) -> None:
+        """
+        ARGS:
+            - memory_budget: maximum summary size of stored rasters in bytes
+        """
+        self.memory_budget = memory_budget if memory_budget is not None else self.INT_DEFAULT_MEMORY_BUDGET
+        self.memory_used = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.stamps = collections.OrderedDict()
+
+        return None
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self.stamps
+
+    def __len__(self) -> int:
+        return len(self.stamps)
+
+    @staticmethod
+    def _get_raster_size(raster) -> int:
+        """
+        DESCR: Size of raster buffer in bytes, works for array.array and numpy.ndarray
+        """
+        if hasattr(raster, "nbytes"):
+            return int(raster.nbytes)
+
+        return len(raster) * raster.itemsize
+
+    @staticmethod
+    def make_key(field_x: int, field_y: int, light_x: int, light_y: int, power: int, metric: str) -> tuple:
+        return (field_x, field_y, light_x, light_y, power, metric,)
+
+    def clear(self,) -> None:
+        self.stamps.clear()
+        self.memory_used = 0
+
+        return None
+
+    def get(self, key: tuple):
+        """
+        DESCR: Get stored raster and mark it as recently used
+        RETURN: raster or None if there is no raster for the key
+        NOTE: returned raster is shared, it must be copied before modification
+        """
+        raster = self.stamps.get(key)
+        if raster is None:
+            self.misses += 1
+            return None
+
+        self.stamps.move_to_end(key)
+        self.hits += 1
+
+        return raster
+
+    def get_stats(self,) -> dict:
+        """
+        RETURN: dictionary with cache counters
+        """
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stamps": len(self.stamps),
+            "memory_used": self.memory_used,
+            "memory_budget": self.memory_budget,
+        }
+
+    def put(self, key: tuple, raster) -> bool:
+        """
+        DESCR: Store raster, least recently used rasters are evicted to fit into memory budget
+        RETURN: True if raster has been stored
+        """
+        size = self._get_raster_size(raster)
+        if size > self.memory_budget:
+            logger.debug(f"Raster for key {key} ({size} bytes) does not fit into cache budget {self.memory_budget}. Not stored.")
+            return False
+
+        if key in self.stamps:
+            self.memory_used -= self._get_raster_size(self.stamps.pop(key))
+
+        while self.stamps and self.memory_used + size > self.memory_budget:
+            evicted_key, evicted = self.stamps.popitem(last=False)
+            self.memory_used -= self._get_raster_size(evicted)
+            self.evictions += 1
+            logger.debug(f"Raster for key {evicted_key} evicted from cache {id(self)}.")
+
+        self.stamps[key] = raster
+        self.memory_used += size
+
+        return True
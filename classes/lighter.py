@@ -11,16 +11,20 @@ class Lighter(BasicObject):
     DESCR: This class represents all movable objects in model
     """
 
+    __slots__ = ("power", "version",)
+
     @BasicObject._general_logger
     def __init__(self, position_x: int, position_y: int, light_power: int) -> None:
-        logger.debug(f"Object {self} at {id(self)} calling ancestor's method \"{super(object, self).__init__.__name__}\".")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Object {self} at {id(self)} calling ancestor's method \"{super(object, self).__init__.__name__}\".")
         super(Lighter, self).__init__(position_x, position_y)
 
         self.power = light_power
 
         self.tile = 'O'
 
-        logger.debug(f"Lighter instance {self} at {id(self)} state after initialization: {vars(self)}.")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Lighter instance {self} at {id(self)} state after initialization: {self._get_state()}.")
 
         return None
 
@@ -28,6 +32,7 @@ class Lighter(BasicObject):
         instance = super(Lighter, cls).__new__(cls, *args, **kwargs)
 
         instance.power = None
+        instance.version = 0  # bumped on every change of position or power, used by FieldBoard.set_illumination
 
         return instance
 
@@ -45,9 +50,22 @@ class Lighter(BasicObject):
         """
         DESCR: Sets new coordinates for thos object
         """
-        logger.debug(f"Object's {self} at {id(self)} attribute \"x\" changed: {self.x} -> {position_x}.")
+        if (position_x, position_y,) != (self.x, self.y,):
+            self.version += 1
+        logger.debug("Object's %s at %s attribute \"x\" changed: %s -> %s.", self, id(self), self.x, position_x)
         self.x = position_x
-        logger.debug(f"Object's {self} at {id(self)} attribute \"x\" changed: {self.y} -> {position_y}.")
+        logger.debug("Object's %s at %s attribute \"x\" changed: %s -> %s.", self, id(self), self.y, position_y)
         self.y = position_y
 
-        return None
\ No newline at end of file
+        return None
+
+    @BasicObject._general_logger
+    def set_power(self, light_power: int) -> None:
+        """
+        DESCR: Sets new light power
+        """
+        if light_power != self.power:
+            self.version += 1
+        self.power = light_power
+
+        return None
@@ -0,0 +1,118 @@
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class LighterPath(object):
+    """
+    DESCR: Closed path of the lighter with a cursor. Step to the next point costs O(1): cursor is used
+           while lighter stays on the path, position -> index map finds the place after lighter has been moved
+           elsewhere. For points visited more than once the first visit is found by the map.
+    """
+
+    def __init__(self, points) -> None:
+        """
+        ARGS:
+            - points: sequence of (x, y) positions
+        """
+        self.points = tuple(tuple(point) for point in points)
+        self.indexes = {}  # position -> index of it's first visit
+        for i, point in enumerate(self.points):
+            self.indexes.setdefault(point, i)
+        self.cursor = None  # index of the point lighter stands on, None until first step
+
+        return None
+
+    def __iter__(self):
+        return (self.get_point(i) for i in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def get_index(self, position: tuple) -> int:
+        """
+        RETURN: index of the first visit of the position, None if path does not go through it
+        """
+
+        return self.indexes.get(tuple(position))
+
+    def get_point(self, index: int) -> tuple:
+        return self.points[index]
+
+    def step(self, position: tuple) -> tuple:
+        """
+        DESCR: Get position following passed one and move cursor there
+        ARGS:
+            - position: current lighter position
+        RETURN: next position, None if passed position is not on the path
+        """
+        length = len(self)
+        if length == 0:
+            return None
+
+        if self.cursor is None or self.get_point(self.cursor) != tuple(position):
+            index = self.get_index(position)
+            if index is None:
+                return None
+            self.cursor = index
+
+        self.cursor = (self.cursor + 1) % length
+
+        return self.get_point(self.cursor)
+
+
+class PerimeterPath(LighterPath):
+    """
+    DESCR: Path going around the board border: down the left side, along the bottom, up the right side and
+           back along the top. Points are calculated from indexes, so path of any length takes no memory.
+    """
+
+    def __init__(self, size_x: int, size_y: int) -> None:
+        """
+        ARGS:
+            - size_x, size_y: board size, including borders, both at least 2
+        """
+        if size_x < 2 or size_y < 2:
+            raise ValueError(f"Perimeter path needs board of at least 2X2, got {size_x}X{size_y}.")
+
+        self.size_x = size_x
+        self.size_y = size_y
+        self.points = ()
+        self.indexes = {}
+        self.cursor = None
+
+        return None
+
+    def __len__(self) -> int:
+        return 2 * (self.size_x + self.size_y) - 4
+
+    def get_index(self, position: tuple) -> int:
+        x, y = position
+        width, height = self.size_x, self.size_y
+
+        if x == 0 and 0 <= y < height:
+            return y
+        if y == height - 1 and 0 < x < width:
+            return height + x - 1
+        if x == width - 1 and 0 <= y < height - 1:
+            return height + width - 1 + (height - 2 - y)
+        if y == 0 and 0 < x < width - 1:
+            return 2 * height + width - 2 + (width - 2 - x)
+
+        return None
+
+    def get_point(self, index: int) -> tuple:
+        width, height = self.size_x, self.size_y
+
+        if index < height:
+            return (0, index,)
+        index -= height
+        if index < width - 1:
+            return (index + 1, height - 1,)
+        index -= width - 1
+        if index < height - 1:
+            return (width - 1, height - 2 - index,)
+        index -= height - 1
+
+        return (width - 2 - index, 0,)
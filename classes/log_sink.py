@@ -0,0 +1,234 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+STR_LOG_FORMAT = "%(asctime)s:[%(levelname)s-%(levelno)s](module:%(module)s, file:%(filename)s, line:%(lineno)d, %(funcName)s) || %(message)s"
+TUPLE_LOG_FORMATS = ("text", "jsonl",)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    DESCR: Formats every record as a single line JSON object. Structured trace records are kept as objects.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "func": record.funcName,
+            "message": record.getMessage(),
+        }
+        trace = getattr(record, "trace", None)
+        if trace is not None:
+            data["trace"] = trace.as_dict()
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(data, default=repr, ensure_ascii=False)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    DESCR: Puts records into the queue as they are. Unlike logging.handlers.QueueHandler message is not
+           formatted on the calling thread, all formatting is made by the writer thread.
+           Queue is bounded: when writer falls behind, new records are dropped and counted instead of
+           growing memory or blocking the simulation.
+    NOTE: arguments of the record are formatted later, so they must not be changed after logging call
+    """
+
+    def __init__(self, records: queue.Queue) -> None:
+        super(LazyQueueHandler, self).__init__(records)
+
+        self.dropped = 0
+
+        return None
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+        return None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class BatchFileWriter(object):
+    """
+    DESCR: Background thread which takes records from the queue, formats them in batches and writes
+           every batch into the file with a single call. File is rotated when it exceeds size limit.
+    """
+
+    INT_DEFAULT_BATCH_SIZE = 1024
+    INT_DEFAULT_QUEUE_SIZE = 64 * 1024  # records waiting for writer, newer ones are dropped above it
+    INT_DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+    INT_DEFAULT_BACKUP_COUNT = 3
+    FLOAT_FLUSH_INTERVAL = 0.5  # seconds to wait for more records before writing incomplete batch
+
+    def __init__(self, records: queue.Queue, filename: str, formatter: logging.Formatter, batch_size: int=None,
+                 max_bytes: int=None, backup_count: int=None) -> None:
+        """
+        ARGS:
+            - records: queue filled by LazyQueueHandler
+            - filename: path to log file
+            - formatter: formatter applied to every record
+            - batch_size: maximum count of records written at once
+            - max_bytes: size of the file which triggers rotation, 0 disables rotation
+            - backup_count: count of rotated files kept as filename.1 ... filename.N
+        """
+        self.records = records
+        self.filename = filename
+        self.formatter = formatter
+        self.batch_size = batch_size if batch_size is not None else self.INT_DEFAULT_BATCH_SIZE
+        self.max_bytes = max_bytes if max_bytes is not None else self.INT_DEFAULT_MAX_BYTES
+        self.backup_count = backup_count if backup_count is not None else self.INT_DEFAULT_BACKUP_COUNT
+
+        self.handler = None  # LazyQueueHandler feeding the queue, detached on stop
+        self.stream = None
+        self.thread = None
+        self.dropped = 0
+
+        return None
+
+    def _open(self,) -> None:
+        self.stream = open(self.filename, mode='ab')
+
+        return None
+
+    def _rotate(self,) -> None:
+        """
+        DESCR: Shift filename.N-1 -> filename.N, ..., filename -> filename.1 and start a new file
+        """
+        self.stream.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = f"{self.filename}.{i}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.filename}.{i + 1}")
+            os.replace(self.filename, f"{self.filename}.1")
+        else:
+            os.remove(self.filename)
+        self._open()
+
+        return None
+
+    def _run(self,) -> None:
+        stop = False
+        while not stop:
+            try:
+                batch = [self.records.get(timeout=self.FLOAT_FLUSH_INTERVAL)]
+            except queue.Empty:
+                continue
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+
+            if batch[-1] is None:
+                stop = True
+            self._write_batch(batch)
+
+        return None
+
+    def _write_batch(self, batch: list) -> None:
+        lines = []
+        for record in batch:
+            if record is None:
+                continue
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                self.dropped += 1
+        if len(lines) == 0:
+            return None
+
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        if self.max_bytes > 0 and self.stream.tell() > 0 and self.stream.tell() + len(data) > self.max_bytes:
+            self._rotate()
+        self.stream.write(data)
+        self.stream.flush()
+
+        return None
+
+    def start(self,) -> None:
+        self._open()
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+        return None
+
+    def stop(self,) -> None:
+        """
+        DESCR: Write all queued records and stop the thread
+        """
+        if self.thread is None:
+            return None
+
+        if self.handler is not None:
+            logging.getLogger().removeHandler(self.handler)
+            if self.handler.dropped > 0:
+                message = f"{self.handler.dropped} log records dropped, writer has fallen behind."
+                self.records.put(logging.makeLogRecord({"name": __name__, "levelno": logging.WARNING,
+                                                        "levelname": "WARNING", "msg": message}))
+            self.handler = None
+        self.records.put(None)
+        self.thread.join()
+        self.thread = None
+        self.stream.close()
+
+        return None
+
+
+def setup_logging(filename: str, level: int=logging.DEBUG, log_format: str="text", asynchronous: bool=True,
+                  batch_size: int=None, max_bytes: int=None, backup_count: int=None, queue_size: int=None) -> BatchFileWriter:
+    """
+    DESCR: Configure root logger to write into the file
+    ARGS:
+        - filename: path to log file
+        - level: root logger level
+        - log_format: "text" (same layout as before) or "jsonl", one JSON object per line
+        - asynchronous: write from background thread in batches, otherwise use synchronous rotating file handler
+        - batch_size, max_bytes, backup_count: see BatchFileWriter
+        - queue_size: maximum count of records waiting for writer, records above it are dropped
+    RETURN: started BatchFileWriter, or None for synchronous mode. Writer is stopped at interpreter exit.
+    """
+    if log_format not in TUPLE_LOG_FORMATS:
+        raise ValueError(f"Unknown log format \"{log_format}\", expected one of {TUPLE_LOG_FORMATS}.")
+
+    formatter = JsonLinesFormatter() if log_format == "jsonl" else logging.Formatter(STR_LOG_FORMAT)
+    root = logging.getLogger()
+    root.setLevel(level)
+
+    if not asynchronous:
+        handler = logging.handlers.RotatingFileHandler(
+            filename, encoding="utf-8",
+            maxBytes=max_bytes if max_bytes is not None else BatchFileWriter.INT_DEFAULT_MAX_BYTES,
+            backupCount=backup_count if backup_count is not None else BatchFileWriter.INT_DEFAULT_BACKUP_COUNT)
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+        return None
+
+    records = queue.Queue(maxsize=queue_size if queue_size is not None else BatchFileWriter.INT_DEFAULT_QUEUE_SIZE)
+    writer = BatchFileWriter(records, filename, formatter, batch_size, max_bytes, backup_count)
+    writer.handler = LazyQueueHandler(records)
+    writer.start()
+    root.addHandler(writer.handler)
+    atexit.register(writer.stop)
+
+    logger.debug(f"Asynchronous logging into \"{filename}\" started, format: {log_format}.")
+
+    return writer
@@ -0,0 +1,135 @@
+import csv
+import json
+import logging
+import sys
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+TUPLE_METRICS_FORMATS = ("jsonl", "csv",)
+TUPLE_METRICS_FIELDS = ("tick", "phase", "calls", "seconds", "net_blocks_delta",)
+
+
+class TickMetrics(object):
+    """
+    DESCR: Counters of engine phases: call count, wall time and net blocks delta. Phase is measured with begin()
+           before and end() after it.
+           Counters are kept for the whole run and for the current dump period, which is appended
+           to the dump file every dump_every ticks.
+    NOTE: net blocks delta is the change of sys.getallocatedblocks() over the phase, i.e. count of memory blocks
+          the phase has left allocated. It is not a count of allocations: phase freeing what it allocates shows 0,
+          phase freeing objects of earlier phases shows negative value.
+    """
+
+    def __init__(self, dump_path: str=None, dump_every: int=0, dump_format: str="jsonl", labels: dict=None) -> None:
+        """
+        ARGS:
+            - dump_path: file the period counters are appended to, None disables dumps
+            - dump_every: dump period in ticks, 0 disables dumps
+            - dump_format: "jsonl" or "csv"
+            - labels: values added to every dumped row, e.g. board size and count of units
+        """
+        if dump_format not in TUPLE_METRICS_FORMATS:
+            raise ValueError(f"Unknown metrics format \"{dump_format}\", expected one of {TUPLE_METRICS_FORMATS}.")
+
+        self.dump_path = dump_path
+        self.dump_every = dump_every if dump_path is not None else 0
+        self.dump_format = dump_format
+        self.labels = dict(labels) if labels is not None else {}
+
+        self.ticks = 0
+        self.totals = {}  # phase -> [calls, nanoseconds, net blocks delta]
+        self.period = {}  # same counters since last dump
+
+        return None
+
+    def begin(self,) -> tuple:
+        """
+        RETURN: mark passed to end()
+        """
+
+        return (time.perf_counter_ns(), sys.getallocatedblocks(),)
+
+    def end(self, phase: str, mark: tuple) -> None:
+        """
+        DESCR: Count phase started at mark
+        """
+        elapsed = time.perf_counter_ns() - mark[0]
+        blocks = sys.getallocatedblocks() - mark[1]
+
+        for counters in (self.totals, self.period):
+            values = counters.get(phase)
+            if values is None:
+                counters[phase] = [1, elapsed, blocks]
+            else:
+                values[0] += 1
+                values[1] += elapsed
+                values[2] += blocks
+
+        return None
+
+    def end_tick(self,) -> None:
+        """
+        DESCR: Count finished tick, period counters are dumped when dump period has passed
+        """
+        self.ticks += 1
+        if self.dump_every > 0 and self.ticks % self.dump_every == 0:
+            self.dump()
+
+        return None
+
+    def get_rows(self, counters: dict=None) -> list:
+        """
+        RETURN: list of dictionaries with TUPLE_METRICS_FIELDS and labels, one per phase
+        """
+        counters = counters if counters is not None else self.totals
+
+        return [dict(self.labels, tick=self.ticks, phase=phase, calls=calls, seconds=nanoseconds / 1e9,
+                     net_blocks_delta=blocks)
+                for phase, (calls, nanoseconds, blocks) in counters.items()]
+
+    def get_stats(self,) -> dict:
+        """
+        RETURN: phase -> dictionary with calls, total seconds, mean seconds per call and net blocks delta
+                for the whole run
+        """
+
+        return {phase: {"calls": calls, "seconds": nanoseconds / 1e9, "mean_seconds": nanoseconds / 1e9 / calls,
+                        "net_blocks_delta": blocks}
+                for phase, (calls, nanoseconds, blocks) in self.totals.items()}
+
+    def dump(self,) -> int:
+        """
+        DESCR: Append counters of current period to the dump file and start a new period
+        RETURN: count of written rows
+        """
+        rows = self.get_rows(self.period)
+        self.period = {}
+        if self.dump_path is None or len(rows) == 0:
+            return 0
+
+        try:
+            if self.dump_format == "csv":
+                fields = list(self.labels) + list(TUPLE_METRICS_FIELDS)
+                with open(self.dump_path, mode='a', encoding='utf-8', newline='') as f:
+                    writer = csv.DictWriter(f, fieldnames=fields)
+                    if f.tell() == 0:
+                        writer.writeheader()
+                    writer.writerows(rows)
+            else:
+                with open(self.dump_path, mode='a', encoding='utf-8') as f:
+                    f.write(''.join(json.dumps(row) + '\n' for row in rows))
+        except OSError as ex:
+            logger.warning(f"Metrics can not be dumped into \"{self.dump_path}\": {ex}.")
+            return 0
+
+        return len(rows)
+
+    def reset(self,) -> None:
+        self.ticks = 0
+        self.totals.clear()
+        self.period.clear()
+
+        return None
@@ -0,0 +1,107 @@
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+DICT_TILE_COLORS = {  # tile symbol -> (red, green, blue)
+    '-': (40, 40, 40,),
+    'G': (86, 140, 60,),
+    'D': (196, 170, 110,),
+    'i': (170, 210, 230,),
+    '>': (120, 120, 120,),
+    'V': (60, 90, 50,),
+    'w': (50, 90, 180,),
+    ':': (150, 110, 70,),
+    'O': (255, 220, 40,),
+    'P': (30, 200, 30,),
+    'T': (110, 30, 30,),
+}
+TUPLE_UNKNOWN_TILE_COLOR = (255, 0, 255,)
+STR_BLANK_TILE = '-'  # tile of every cell of a new FrameRenderer frame
+
+
+class PixelFrame(object):
+    """
+    DESCR: Offscreen RGB image of the board, every cell is a square of cell_size pixels.
+           It is updated with changed cells of FrameRenderer.render, so drawing cost depends on changes only.
+           Painted cells are collected until taken with pop_painted, GUI copies them into it's image.
+           New image is filled with STR_BLANK_TILE color, like new FrameRenderer frame, so changes of
+           a new renderer are enough to draw the board. Frame of a used renderer must be painted fully first,
+           see FrameRenderer.get_cells.
+    """
+
+    def __init__(self, width: int, height: int, cell_size: int=8) -> None:
+        """
+        ARGS:
+            - width, height: board size in cells, including borders
+            - cell_size: side of a cell in pixels
+        """
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.pixel_width = width * cell_size
+        self.pixel_height = height * cell_size
+
+        self.pixels = bytearray(bytes(self.get_color(STR_BLANK_TILE)) * self.pixel_width * self.pixel_height)
+        self.painted = []  # (x, y, color) of cells painted since last pop_painted
+        self.is_fully_painted = False
+
+        return None
+
+    def get_color(self, tile: str) -> tuple:
+        return DICT_TILE_COLORS.get(tile, TUPLE_UNKNOWN_TILE_COLOR)
+
+    def get_pixel(self, pixel_x: int, pixel_y: int) -> tuple:
+        i = (pixel_y * self.pixel_width + pixel_x) * 3
+
+        return tuple(self.pixels[i:i + 3])
+
+    def paint(self, changes: list) -> int:
+        """
+        DESCR: Paint changed cells
+        ARGS:
+            - changes: list of (x, y, tile), as returned by FrameRenderer.render
+        RETURN: count of painted cells
+        """
+        size = self.cell_size
+        pixels = self.pixels
+        row_stride = self.pixel_width * 3
+
+        for x, y, tile in changes:
+            color = self.get_color(tile)
+            line = bytes(color) * size
+            start = y * size * row_stride + x * size * 3
+            for i in range(size):
+                offset = start + i * row_stride
+                pixels[offset:offset + size * 3] = line
+            self.painted.append((x, y, color,))
+
+        if len(self.painted) >= self.width * self.height:
+            # every cell has changed, whole image is cheaper to copy
+            self.painted.clear()
+            self.is_fully_painted = True
+
+        return len(changes)
+
+    def pop_painted(self,) -> list:
+        """
+        DESCR: Take cells painted since previous call
+        RETURN: list of (x, y, color), or None when the whole image has to be copied
+        """
+        if self.is_fully_painted:
+            self.is_fully_painted = False
+            self.painted.clear()
+            return None
+
+        painted = self.painted
+        self.painted = []
+
+        return painted
+
+    def to_ppm(self,) -> bytes:
+        """
+        RETURN: image in binary PPM format, accepted by tkinter.PhotoImage and most image tools
+        """
+
+        return f"P6 {self.pixel_width} {self.pixel_height} 255\n".encode("ascii") + bytes(self.pixels)
@@ -0,0 +1,189 @@
+import array
+import itertools
+import logging
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, columns are processed with python loops instead
+    numpy = None
+
+
+logger = logging.getLogger(__name__)
+
+
+TUPLE_POPULATION_COLUMNS = ("hunger", "health",)  # unit stats kept in columns, written with Population.set_column
+
+
+class Population(object):
+    """
+    DESCR: Columnar storage of units state. While unit is attached, it's hunger, health and life state
+           are kept here (one typed array per stat) and UnitCorpse attributes read and write these columns.
+           Alive mask and count of alive units are maintained on every change.
+    """
+
+    def __init__(self, use_numpy: bool=None) -> None:
+        """
+        ARGS:
+            - use_numpy: process columns with numpy, by default numpy is used when installed
+        """
+        self.use_numpy = (numpy is not None) if use_numpy is None else (use_numpy and numpy is not None)
+
+        self.units = []
+        self.hunger = array.array('i')
+        self.hunger_max = array.array('i')
+        self.health = array.array('i')
+        self.health_min = array.array('i')
+        self.alive = array.array('b')
+        self.alive_count = 0
+
+        return None
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    def add(self, unit) -> None:
+        """
+        DESCR: Attach unit, it's current stats are moved into the columns
+        """
+        if unit.population is not None:
+            logger.info(f"Unit {id(unit)} is already attached to population {id(unit.population)}. Adding aborted.")
+            return None
+
+        is_alive = unit.life_state != "dead"
+        self.hunger.append(unit.hunger_value if unit.hunger_value is not None else 0)
+        self.hunger_max.append(unit.INT_HUNGER_VALUE_MAX if unit.INT_HUNGER_VALUE_MAX is not None else 0)
+        self.health.append(unit.health_value if unit.health_value is not None else 0)
+        self.health_min.append(unit.INT_HEALTH_VALUE_MIN if unit.INT_HEALTH_VALUE_MIN is not None else 0)
+        self.alive.append(1 if is_alive else 0)
+        self.alive_count += 1 if is_alive else 0
+
+        unit.population_index = len(self.units)
+        unit.population = self
+        self.units.append(unit)
+
+        return None
+
+    def apply_metabolism(self, hunger_increase: int=1, starvation_damage: int=1) -> list:
+        """
+        DESCR: Apply one tick of metabolism to all alive units at once: hunger grows up to it's maximum,
+               units with maximal hunger lose health, units without health die.
+        ARGS:
+            - hunger_increase: hunger gained by every alive unit
+            - starvation_damage: health lost by every starving unit
+        RETURN: list of units died on this tick
+        """
+        if self.alive_count == 0:
+            return []
+
+        if self.use_numpy:
+            died = self._apply_metabolism_numpy(hunger_increase, starvation_damage)
+        else:
+            died = self._apply_metabolism_python(hunger_increase, starvation_damage)
+
+        self.alive_count -= len(died)
+
+        return [self.units[i] for i in died]
+
+    def _apply_metabolism_numpy(self, hunger_increase: int, starvation_damage: int) -> list:
+        hunger = numpy.frombuffer(self.hunger, dtype=numpy.int32)
+        hunger_max = numpy.frombuffer(self.hunger_max, dtype=numpy.int32)
+        health = numpy.frombuffer(self.health, dtype=numpy.int32)
+        health_min = numpy.frombuffer(self.health_min, dtype=numpy.int32)
+        alive = numpy.frombuffer(self.alive, dtype=numpy.int8)
+
+        living = alive != 0
+        hunger[living] = numpy.minimum(hunger[living] + hunger_increase, hunger_max[living])
+        starving = living & (hunger >= hunger_max)
+        health[starving] = numpy.maximum(health[starving] - starvation_damage, health_min[starving])
+        dying = starving & (health <= 0)
+        alive[dying] = 0
+
+        return numpy.flatnonzero(dying).tolist()
+
+    def _apply_metabolism_python(self, hunger_increase: int, starvation_damage: int) -> list:
+        hunger, hunger_max = self.hunger, self.hunger_max
+        health, health_min = self.health, self.health_min
+        alive = self.alive
+        died = []
+
+        for i in itertools.compress(range(len(alive)), alive):
+            value = hunger[i] + hunger_increase
+            if value >= hunger_max[i]:
+                value = hunger_max[i]
+                damaged = max(health[i] - starvation_damage, health_min[i])
+                health[i] = damaged
+                if damaged <= 0:
+                    alive[i] = 0
+                    died.append(i)
+            hunger[i] = value
+
+        return died
+
+    def get_alive_units(self,) -> list:
+        """
+        RETURN: list of alive units, in order of adding
+        """
+
+        return list(itertools.compress(self.units, self.alive))
+
+    def remove(self, unit) -> None:
+        """
+        DESCR: Detach unit, it's stats are moved back into the unit. Last unit takes the place of removed one.
+        """
+        if unit.population is not self:
+            logger.info(f"Unit {id(unit)} is not attached to population {id(self)}. Removing aborted.")
+            return None
+
+        i = unit.population_index
+        hunger, health, is_alive = self.hunger[i], self.health[i], self.alive[i]
+
+        last = len(self.units) - 1
+        for column in (self.hunger, self.hunger_max, self.health, self.health_min, self.alive):
+            column[i] = column[last]
+            column.pop()
+        moved = self.units.pop()
+        if i != last:
+            self.units[i] = moved
+            moved.population_index = i
+        self.alive_count -= 1 if is_alive else 0
+
+        unit.population = None
+        unit.population_index = None
+        unit.hunger_value = hunger
+        unit.health_value = health
+        unit.life_state = "alive" if is_alive else "dead"
+
+        return None
+
+    def set_column(self, name: str, units: list, values) -> None:
+        """
+        DESCR: Write stat of attached units at once. Whole column is replaced when units are all units
+               of the population in their order.
+        ARGS:
+            - name: column from TUPLE_POPULATION_COLUMNS
+            - units: attached units
+            - values: new values, same order as units
+        """
+        if name not in TUPLE_POPULATION_COLUMNS:
+            raise ValueError(f"Unknown population column \"{name}\", expected one of {TUPLE_POPULATION_COLUMNS}.")
+
+        column = getattr(self, name)
+        if units == self.units:
+            column[:] = array.array('i', values)
+            return None
+
+        for unit, value in zip(units, values):
+            column[unit.population_index] = int(value)
+
+        return None
+
+    def set_alive(self, i: int, is_alive: bool) -> None:
+        """
+        DESCR: Change life state of the unit with passed index, keeps alive count up to date
+        """
+        value = 1 if is_alive else 0
+        if self.alive[i] != value:
+            self.alive[i] = value
+            self.alive_count += 1 if is_alive else -1
+
+        return None
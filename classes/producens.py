@@ -2,43 +2,38 @@ import logging
 
 from classes.unit_corpse import UnitCorpse
 from classes.basic_object import BasicObject
+from classes.species import TraitTable, register_species
 
 
 logger = logging.getLogger(__name__)
 
 
+@register_species
 class Producens(UnitCorpse):
+    __slots__ = ()
+
+    TRAITS = TraitTable(
+        damage=(0, 0, None),
+        speed=(0, 5, None),
+        health=(0, 10, None),
+        hunger=(0, 10, None),
+        sight=(1, 10, None),
+    )
+
+    LIFE_STATES = ("alive", "dead",)
+
     @BasicObject._general_logger
     def __init__(self, position_x: int, position_y: int, generation: int=0, phenotype: str="") -> None:
-        logger.debug(f"Object {self} at {id(self)} calling ancestor's method \"{super(object, self).__init__.__name__}\".")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Object {self} at {id(self)} calling ancestor's method \"{super(object, self).__init__.__name__}\".")
         super(Producens, self).__init__(position_x, position_y)
 
-        self.INT_DAMAGE_VALUE_MIN = 0
-        self.INT_DAMAGE_VALUE_MAX = 0
-        self.INT_DAMAGE_VALUE_DEVIATION = None
         self.damage_value = 0
-
-        self.INT_MOVING_SPEED_MIN = 0
-        self.INT_MOVING_SPEED_MAX = 5
-        self.INT_MOVING_SPEED_DEVIATION = None
         self.moving_speed = 1
-
-        self.INT_HEALTH_VALUE_MIN = 0
-        self.INT_HEALTH_VALUE_MAX = 10
-        self.INT_HEALTH_VALUE_DEVIATION = None
         self.health_value = 10
-        
-        self.INT_HUNGER_VALUE_MIN = 0
-        self.INT_HUNGER_VALUE_MAX = 10
-        self.INT_HUNGER_VALUE_DEVIATION = None
         self.hunger_value = 0
-
-        self.INT_SIGHT_VALUE_MIN = 1
-        self.INT_SIGHT_VALUE_MAX = 10
-        self.INT_SIGHT_VALUE_DEVIATION = None
         self.sight_value = 3
 
-        self.LIFE_STATES = ("alive", "dead",)
         self.life_state = "alive"
         
         self.generation = generation
@@ -50,7 +45,8 @@ class Producens(UnitCorpse):
 
         self.tile = 'P'
 
-        logger.debug(f"Producens instance {self} at {id(self)} state after initialization: {vars(self)}.")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Producens instance {self} at {id(self)} state after initialization: {self._get_state()}.")
 
         return None
 
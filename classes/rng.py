@@ -0,0 +1,123 @@
+import array
+import hashlib
+import logging
+import random
+import sys
+
+
+logger = logging.getLogger(__name__)
+
+
+# unsigned 32 bit array typecode, 'I' is 32 bit on all supported platforms
+STR_UINT32_TYPECODE = 'I'
+INT_UINT32_BITS = 32
+
+
+def derive_seed(seed: int, *path) -> int:
+    """
+    DESCR: Derive independent 64 bit seed from root seed and stream path. Result depends only on passed values,
+           so it is the same in every process and on every platform.
+    ARGS:
+        - seed: root seed
+        - path: stream names and indexes, e.g. ("worker", 3, "movement")
+    """
+    digest = hashlib.sha256(repr((seed,) + tuple(path)).encode("utf-8")).digest()
+
+    return int.from_bytes(digest[:8], "little")
+
+
+class RandomStream(random.Random):
+    """
+    DESCR: Independent random numbers source of one subsystem with bulk draws.
+           Bulk draws take 32 random bits per value with a single randbytes call.
+    """
+
+    def __init__(self, seed: int, name: str="") -> None:
+        super(RandomStream, self).__init__(seed)
+        self.name = name
+
+        return None
+
+    def get_uint32(self, count: int) -> array.array:
+        """
+        RETURN: array of count random 32 bit unsigned integers
+        """
+        values = array.array(STR_UINT32_TYPECODE)
+        values.frombytes(self.randbytes(count * 4))
+        if sys.byteorder == "big":
+            # random bytes are read as little-endian everywhere, so draws do not depend on the platform
+            values.byteswap()
+
+        return values
+
+    def get_ints(self, count: int, low: int, high: int) -> list:
+        """
+        DESCR: Draw count integers from [low, high] range, boundaries included
+        NOTE: values are scaled with multiplication, bias is below span / 2**32
+        """
+        span = high - low + 1
+
+        return [low + ((v * span) >> INT_UINT32_BITS) for v in self.get_uint32(count)]
+
+    def get_floats(self, count: int) -> list:
+        """
+        DESCR: Draw count floats from [0, 1) range with 32 bit resolution
+        """
+        scale = 1.0 / (1 << INT_UINT32_BITS)
+
+        return [v * scale for v in self.get_uint32(count)]
+
+
+class RandomService(object):
+    """
+    DESCR: Seeded random numbers service owned by the simulation. Every subsystem takes it's own named stream,
+           child services (per run, per worker) are split off by key. All seeds are derived from the root seed
+           and stream path only, so results do not depend on order of requests or count of processes.
+    """
+
+    def __init__(self, seed: int, path: tuple=()) -> None:
+        """
+        ARGS:
+            - seed: root seed
+            - path: keys of this service within the root one, empty for the root
+        """
+        self.seed = seed
+        self.path = tuple(path)
+        self.streams = {}  # name -> RandomStream
+
+        return None
+
+    def get_state(self,) -> dict:
+        """
+        RETURN: state of every created stream, name -> random.Random state
+        """
+
+        return {name: stream.getstate() for name, stream in self.streams.items()}
+
+    def set_state(self, state: dict) -> None:
+        """
+        DESCR: Restore streams from get_state result
+        """
+        for name, stream_state in state.items():
+            self.stream(name).setstate(stream_state)
+
+        return None
+
+    def spawn(self, *keys) -> "RandomService":
+        """
+        DESCR: Split off independent child service, e.g. spawn("worker", 2) or spawn("run", params_key)
+        """
+
+        return RandomService(self.seed, self.path + keys)
+
+    def stream(self, name: str) -> RandomStream:
+        """
+        DESCR: Get named stream, it is created on first request
+        """
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = RandomStream(derive_seed(self.seed, *self.path, name), name)
+            self.streams[name] = stream
+            logger.debug(f"Random stream \"{name}\" of service {self.path} created.")
+
+        return stream
@@ -0,0 +1,164 @@
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class Phase(object):
+    """
+    DESCR: Step of a tick. Action is called without arguments and returns False when it has changed nothing,
+           any other result means that everything from writes set has changed.
+    """
+
+    __slots__ = ("name", "action", "reads", "writes", "every", "on_change", "seen", "runs", "skips",)
+
+    def __init__(self, name: str, action, reads: tuple=(), writes: tuple=(), every: int=1, on_change: bool=False) -> None:
+        """
+        ARGS:
+            - name: unique name of the phase, also used as metrics phase name
+            - action: callable without arguments
+            - reads: names of board state read by the phase, e.g. ("lighter", "terrain",)
+            - writes: names of board state changed by the phase
+            - every: run on every Nth tick only (decimation)
+            - on_change: run only when something from reads set has changed since previous run
+        """
+        self.name = name
+        self.action = action
+        self.reads = tuple(reads)
+        self.writes = tuple(writes)
+        self.every = max(every, 1)
+        self.on_change = on_change
+
+        self.seen = None  # versions of reads set at previous run
+        self.runs = 0
+        self.skips = 0
+
+        return None
+
+
+class TickScheduler(object):
+    """
+    DESCR: Fixed-step tick loop running registered phases in order of registration. Every state name has
+           version counter bumped by phases writing it, so phases with on_change flag are skipped
+           while their inputs stay the same. Loop runs as fast as possible or at target tick rate,
+           optionally limited by wall-clock budget.
+    """
+
+    def __init__(self, metrics=None) -> None:
+        """
+        ARGS:
+            - metrics: TickMetrics measuring every phase, None disables measuring
+        """
+        self.metrics = metrics
+
+        self.phases = []
+        self.versions = {}  # state name -> version
+        self.tick = 0
+        self.is_stopped = False
+
+        return None
+
+    def add_phase(self, name: str, action, reads: tuple=(), writes: tuple=(), every: int=1, on_change: bool=False) -> Phase:
+        """
+        DESCR: Register phase after already registered ones, see Phase for arguments
+        RETURN: registered Phase
+        """
+        if any(phase.name == name for phase in self.phases):
+            raise ValueError(f"Phase \"{name}\" is already registered.")
+
+        phase = Phase(name, action, reads, writes, every, on_change)
+        for state in phase.reads + phase.writes:
+            self.versions.setdefault(state, 0)
+        self.phases.append(phase)
+
+        return phase
+
+    def get_stats(self,) -> dict:
+        """
+        RETURN: phase name -> dictionary with counts of runs and skips
+        """
+
+        return {phase.name: {"runs": phase.runs, "skips": phase.skips} for phase in self.phases}
+
+    def mark_changed(self, *states) -> None:
+        """
+        DESCR: Bump versions of state changed outside of phases, e.g. terrain loaded from file
+        """
+        for state in states:
+            self.versions[state] = self.versions.get(state, 0) + 1
+
+        return None
+
+    def run_tick(self,) -> None:
+        """
+        DESCR: Run single tick: every phase which is due and has changed inputs
+        """
+        versions = self.versions
+        metrics = self.metrics
+
+        for phase in self.phases:
+            if self.tick % phase.every != 0:
+                phase.skips += 1
+                continue
+            if phase.on_change:
+                seen = tuple(versions[state] for state in phase.reads)
+                if seen == phase.seen:
+                    phase.skips += 1
+                    continue
+                phase.seen = seen
+
+            if metrics is not None:
+                mark = metrics.begin()
+                result = phase.action()
+                metrics.end(phase.name, mark)
+            else:
+                result = phase.action()
+            phase.runs += 1
+
+            if result is not False:
+                for state in phase.writes:
+                    versions[state] += 1
+
+        self.tick += 1
+        if metrics is not None:
+            metrics.end_tick()
+
+        return None
+
+    def run(self, ticks: int=None, rate: float=None, budget: float=None) -> int:
+        """
+        DESCR: Run ticks until count of ticks is done, wall-clock budget is spent or stop() is called
+        ARGS:
+            - ticks: count of ticks, endless when None
+            - rate: target ticks per second, as fast as possible when None
+            - budget: wall-clock seconds, unlimited when None
+        RETURN: count of ticks done
+        """
+        self.is_stopped = False
+        time_start = time.perf_counter()
+        deadline = time_start + budget if budget is not None else None
+        step = 1.0 / rate if rate else 0.0
+        done = 0
+
+        while (ticks is None or done < ticks) and not self.is_stopped:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self.run_tick()
+            done += 1
+
+            if step > 0:
+                # fixed step: next tick is due at start + done * step, late ticks are not slept for
+                delay = time_start + done * step - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay if deadline is None else min(delay, max(deadline - time.perf_counter(), 0)))
+
+        return done
+
+    def stop(self,) -> None:
+        """
+        DESCR: Stop run() after current tick, may be called from phases or other threads
+        """
+        self.is_stopped = True
+
+        return None
@@ -0,0 +1,159 @@
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class SpatialHash(object):
+    """
+    DESCR: Uniform grid index of objects with "x" and "y" attributes. Plane is split into square buckets,
+           so neighbourhood queries look only into buckets overlapping the query area.
+    """
+
+    INT_DEFAULT_BUCKET_SIZE = 8
+
+    def __init__(self, bucket_size: int=None) -> None:
+        """
+        ARGS:
+            - bucket_size: side of a square bucket in cells
+        """
+        self.bucket_size = bucket_size if bucket_size is not None else self.INT_DEFAULT_BUCKET_SIZE
+
+        self.buckets = {}  # (bucket x, bucket y) -> {id(object): object}
+        self.locations = {}  # id(object) -> bucket key
+        self.watchers = []  # callables (object, old position or None, new position or None) notified on every change
+
+        return None
+
+    def __contains__(self, item: object) -> bool:
+        return id(item) in self.locations
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def _get_bucket_key(self, x: int, y: int) -> tuple:
+        return (x // self.bucket_size, y // self.bucket_size,)
+
+    def _notify(self, item: object, old_position: tuple, new_position: tuple) -> None:
+        for watcher in self.watchers:
+            watcher(item, old_position, new_position)
+
+        return None
+
+    def add_watcher(self, watcher) -> None:
+        """
+        DESCR: Subscribe callable to inserts, moves and removals of indexed objects,
+               it is called as watcher(object, old position or None, new position or None).
+               After clear() watchers receive (None, None, None).
+        """
+        self.watchers.append(watcher)
+
+        return None
+
+    def clear(self,) -> None:
+        for watcher in self.watchers:
+            watcher(None, None, None)
+        self.buckets.clear()
+        self.locations.clear()
+
+        return None
+
+    def insert(self, item: object) -> None:
+        """
+        DESCR: Add object into the index at it's current coordinates
+        """
+        key = self._get_bucket_key(item.x, item.y)
+        self.buckets.setdefault(key, {})[id(item)] = item
+        self.locations[id(item)] = key
+        if self.watchers:
+            self._notify(item, None, (item.x, item.y,))
+
+        return None
+
+    def remove(self, item: object) -> None:
+        key = self.locations.pop(id(item), None)
+        if key is None:
+            logger.debug(f"Object {id(item)} is not stored in index {id(self)}. Nothing to remove.")
+            return None
+
+        bucket = self.buckets[key]
+        del bucket[id(item)]
+        if len(bucket) == 0:
+            del self.buckets[key]
+        if self.watchers:
+            self._notify(item, (item.x, item.y,), None)
+
+        return None
+
+    def update(self, item: object, old_position: tuple=None) -> None:
+        """
+        DESCR: Move object to the bucket of it's current coordinates, must be called after coordinates change
+        ARGS:
+            - item: moved object
+            - old_position: coordinates before the move, passed to watchers
+        """
+        if self.watchers and id(item) in self.locations:
+            self._notify(item, old_position, (item.x, item.y,))
+
+        key = self._get_bucket_key(item.x, item.y)
+        old_key = self.locations.get(id(item))
+        if old_key == key:
+            return None
+
+        if old_key is not None:
+            bucket = self.buckets[old_key]
+            del bucket[id(item)]
+            if len(bucket) == 0:
+                del self.buckets[old_key]
+        self.buckets.setdefault(key, {})[id(item)] = item
+        self.locations[id(item)] = key
+
+        return None
+
+    def query_rect(self, x_min: int, y_min: int, x_max: int, y_max: int) -> list:
+        """
+        DESCR: Get objects within rectangle, boundaries are included
+        RETURN: list of objects
+        """
+        result = []
+        bx_min, by_min = self._get_bucket_key(x_min, y_min)
+        bx_max, by_max = self._get_bucket_key(x_max, y_max)
+
+        if (bx_max - bx_min + 1) * (by_max - by_min + 1) > len(self.buckets):
+            # area is wider than populated part of the index, checking filled buckets is cheaper
+            keys = [key for key in self.buckets if bx_min <= key[0] <= bx_max and by_min <= key[1] <= by_max]
+        else:
+            keys = [(bx, by) for by in range(by_min, by_max + 1) for bx in range(bx_min, bx_max + 1)]
+
+        for key in keys:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            for item in bucket.values():
+                if x_min <= item.x <= x_max and y_min <= item.y <= y_max:
+                    result.append(item)
+
+        return result
+
+    def query_radius(self, x: int, y: int, radius: int, metric: str="euclidean") -> list:
+        """
+        DESCR: Get objects within distance from passed point, boundary is included
+        ARGS:
+            - x, y: center of the area
+            - radius: maximum distance
+            - metric: "euclidean" or "manhattan"
+        RETURN: list of objects
+        """
+        result = []
+        radius_sq = radius * radius
+
+        for item in self.query_rect(x - radius, y - radius, x + radius, y + radius):
+            dx = item.x - x
+            dy = item.y - y
+            if metric == "manhattan":
+                if abs(dx) + abs(dy) <= radius:
+                    result.append(item)
+            elif dx * dx + dy * dy <= radius_sq:
+                result.append(item)
+
+        return result
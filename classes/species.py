@@ -0,0 +1,161 @@
+import array
+import logging
+
+from classes.population import TUPLE_POPULATION_COLUMNS
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, clamping is made with python lists instead
+    numpy = None
+
+
+logger = logging.getLogger(__name__)
+
+
+TUPLE_TRAITS = ("damage", "speed", "health", "hunger", "sight",)
+
+DICT_TRAIT_ATTRIBUTES = {  # trait -> (instance attribute, class constants prefix)
+    "damage": ("damage_value", "INT_DAMAGE_VALUE",),
+    "speed": ("moving_speed", "INT_MOVING_SPEED",),
+    "health": ("health_value", "INT_HEALTH_VALUE",),
+    "hunger": ("hunger_value", "INT_HUNGER_VALUE",),
+    "sight": ("sight_value", "INT_SIGHT_VALUE",),
+}
+
+INT_NO_DEVIATION = -1  # stored instead of None deviation
+
+dict_species_registry = {}
+
+
+class TraitTable(object):
+    """
+    DESCR: Immutable table of trait boundaries of a species. All values are stored in one read-only
+           int array (memoryview over bytes): (min, max, deviation) for every trait of TUPLE_TRAITS.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, **bounds) -> None:
+        """
+        ARGS:
+            - bounds: trait name -> tuple (min, max, deviation), deviation may be None
+        """
+        unknown = set(bounds) - set(TUPLE_TRAITS)
+        if unknown:
+            raise ValueError(f"Unknown traits {sorted(unknown)}, expected some of {TUPLE_TRAITS}.")
+
+        values = array.array('i')
+        for trait in TUPLE_TRAITS:
+            value_min, value_max, deviation = bounds.get(trait, (0, 0, None))
+            values.extend((value_min, value_max, INT_NO_DEVIATION if deviation is None else deviation))
+        object.__setattr__(self, "values", memoryview(values.tobytes()).cast('i'))
+
+        return None
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError("TraitTable is immutable")
+
+    def clamp(self, trait: str, value: int) -> int:
+        """
+        DESCR: Fit single value into trait boundaries
+        """
+        i = TUPLE_TRAITS.index(trait) * 3
+
+        return min(max(value, self.values[i]), self.values[i + 1])
+
+    def clamp_many(self, trait: str, values):
+        """
+        DESCR: Fit all values into trait boundaries at once
+        ARGS:
+            - trait: trait name
+            - values: numpy array or any iterable of numbers
+        RETURN: numpy array for numpy input, otherwise list
+        """
+        i = TUPLE_TRAITS.index(trait) * 3
+        value_min, value_max = self.values[i], self.values[i + 1]
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            return numpy.clip(values, value_min, value_max)
+
+        return [value_min if v < value_min else value_max if v > value_max else v for v in values]
+
+    def get_bounds(self, trait: str) -> tuple:
+        """
+        RETURN: tuple (min, max, deviation), deviation is None when not set
+        """
+        i = TUPLE_TRAITS.index(trait) * 3
+        deviation = self.values[i + 2]
+
+        return (self.values[i], self.values[i + 1], None if deviation == INT_NO_DEVIATION else deviation,)
+
+
+def register_species(cls: type) -> type:
+    """
+    DESCR: Class decorator. Registers unit class by name and exposes it's TraitTable
+           as INT_*_MIN, INT_*_MAX and INT_*_DEVIATION class constants.
+    """
+    if not isinstance(getattr(cls, "TRAITS", None), TraitTable):
+        raise TypeError(f"Species class {cls.__name__} must declare TRAITS as TraitTable.")
+
+    for trait in TUPLE_TRAITS:
+        prefix = DICT_TRAIT_ATTRIBUTES[trait][1]
+        value_min, value_max, deviation = cls.TRAITS.get_bounds(trait)
+        setattr(cls, f"{prefix}_MIN", value_min)
+        setattr(cls, f"{prefix}_MAX", value_max)
+        setattr(cls, f"{prefix}_DEVIATION", deviation)
+
+    dict_species_registry[cls.__name__] = cls
+    logger.debug(f"Species {cls.__name__} registered with traits {[cls.TRAITS.get_bounds(t) for t in TUPLE_TRAITS]}.")
+
+    return cls
+
+
+def get_species(name: str) -> type:
+    return dict_species_registry[name]
+
+
+def set_population_trait(units: list, trait: str, values) -> None:
+    """
+    DESCR: Set trait value for every unit, values are clamped in batch per species.
+           Traits kept in Population columns (see TUPLE_POPULATION_COLUMNS) are written into the columns at once,
+           other traits are set unit by unit.
+    ARGS:
+        - units: list of registered species units
+        - trait: trait name
+        - values: new values, same order as units
+    """
+    attribute = DICT_TRAIT_ATTRIBUTES[trait][0]
+
+    groups = {}
+    for i, unit in enumerate(units):
+        groups.setdefault(type(unit), []).append(i)
+
+    if len(groups) == 1:
+        clamped = next(iter(groups)).TRAITS.clamp_many(trait, values)
+    else:
+        clamped = [None] * len(units)
+        for species, indexes in groups.items():
+            for i, value in zip(indexes, species.TRAITS.clamp_many(trait, [values[i] for i in indexes])):
+                clamped[i] = value
+
+    if trait in TUPLE_POPULATION_COLUMNS:
+        populations = {}  # id(population) -> (population, units, values)
+        detached = []
+        for unit, value in zip(units, clamped):
+            if unit.population is None:
+                detached.append((unit, value,))
+                continue
+            group = populations.get(id(unit.population))
+            if group is None:
+                group = populations[id(unit.population)] = (unit.population, [], [],)
+            group[1].append(unit)
+            group[2].append(value)
+        for population, members, members_values in populations.values():
+            population.set_column(trait, members, members_values)
+        for unit, value in detached:
+            setattr(unit, attribute, int(value))
+        return None
+
+    for unit, value in zip(units, clamped):
+        setattr(unit, attribute, int(value))
+
+    return None
@@ -0,0 +1,450 @@
+import array
+import logging
+import mmap
+import pathlib
+import shutil
+import struct
+
+from classes.ground import Ground, TUPLE_GROUND_TILES
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, array module is used instead
+    numpy = None
+
+
+logger = logging.getLogger(__name__)
+
+
+BYTES_TERRAIN_MAGIC = b"FCTG"
+INT_TERRAIN_FORMAT_VERSION = 1
+STR_TERRAIN_HEADER_FORMAT = "<4sHHII"  # magic, version, layers count, width, height
+INT_LAYER_ALIGNMENT = 8
+
+DICT_MAPPING_ACCESS = {
+    "read": mmap.ACCESS_READ,  # layers can not be changed
+    "write": mmap.ACCESS_WRITE,  # changes are written into the file and seen by all processes mapping it
+    "copy": mmap.ACCESS_COPY,  # pages are shared until changed, changes stay in this process
+}
+
+
+class TerrainGrid(object):
+    """
+    DESCR: Compact storage for terrain of the field. Every Ground attribute lives in it's own
+           contiguous typed array (layer), cells are stored row by row: index = y * width + x.
+    """
+
+    DICT_LAYER_TYPECODES = {
+        "illumination": 'h',
+        "fertility": 'h',
+        "ground_type": 'b',
+        "occupation": 'b',
+        "speed_modifier": 'b',
+    }
+
+    def __init__(self, width: int, height: int, use_numpy: bool=None, layers: dict=None, mapping: mmap.mmap=None) -> None:
+        """
+        DESCR: Allocate all terrain layers filled with zeros
+        ARGS:
+            - width: horizontal size of the grid
+            - height: vertical size of the grid
+            - use_numpy: store layers as numpy arrays, by default numpy is used when installed
+            - layers: already allocated layers to be used instead, see TerrainGrid.open_mapped
+            - mapping: memory map holding passed layers
+        """
+        self.width = width
+        self.height = height
+        self.use_numpy = (numpy is not None) if use_numpy is None else (use_numpy and numpy is not None)
+        self.mapping = mapping
+
+        if layers is not None:
+            self.layers = layers
+        else:
+            self.layers = {}
+            for name, typecode in self.DICT_LAYER_TYPECODES.items():
+                self.layers[name] = self._allocate_layer(typecode)
+
+        logger.debug(f"TerrainGrid {width}X{height} at {id(self)} allocated. Numpy used: {self.use_numpy}.")
+
+        return None
+
+    def __getitem__(self, y: int) -> 'TerrainRow':
+        if y < 0 or y >= self.height:
+            raise IndexError(f"TerrainGrid row index out of range: {y}")
+
+        return TerrainRow(self, y)
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield TerrainRow(self, y)
+
+    def __len__(self) -> int:
+        return self.height
+
+    @classmethod
+    def _get_file_layout(cls, width: int, height: int) -> tuple:
+        """
+        DESCR: Get placement of layers in terrain file
+        RETURN: tuple (dictionary layer name -> offset in bytes, total file size)
+        """
+        offsets = {}
+        position = struct.calcsize(STR_TERRAIN_HEADER_FORMAT)
+        for name, typecode in cls.DICT_LAYER_TYPECODES.items():
+            position += -position % INT_LAYER_ALIGNMENT
+            offsets[name] = position
+            position += array.array(typecode).itemsize * width * height
+
+        return (offsets, position,)
+
+    @classmethod
+    def read_file_size(cls, path: pathlib.Path) -> tuple:
+        """
+        DESCR: Read grid size from the header of terrain file without mapping it
+        RETURN: tuple (width, height)
+        """
+        with open(path, mode='rb') as f:
+            header = f.read(struct.calcsize(STR_TERRAIN_HEADER_FORMAT))
+        if len(header) != struct.calcsize(STR_TERRAIN_HEADER_FORMAT):
+            raise ValueError(f"File \"{path}\" is not a terrain file of version {INT_TERRAIN_FORMAT_VERSION}.")
+        _, _, _, width, height = struct.unpack(STR_TERRAIN_HEADER_FORMAT, header)
+
+        return (width, height,)
+
+    @classmethod
+    def create_file(cls, path: pathlib.Path, width: int, height: int, ground_types: bytes=None) -> None:
+        """
+        DESCR: Create terrain file with zero filled layers, which can be opened with TerrainGrid.open_mapped
+        ARGS:
+            - path: path to new file, existing file is overwritten
+            - width, height: grid size
+            - ground_types: raster of ground types, one byte per cell (FieldPattern.ground_types),
+                            or binary file positioned at the start of such raster, it is copied in chunks
+        """
+        offsets, size = cls._get_file_layout(width, height)
+        with open(path, mode='wb') as f:
+            f.write(struct.pack(STR_TERRAIN_HEADER_FORMAT, BYTES_TERRAIN_MAGIC, INT_TERRAIN_FORMAT_VERSION,
+                                len(cls.DICT_LAYER_TYPECODES), width, height))
+            f.truncate(size)
+            if ground_types is not None:
+                f.seek(offsets["ground_type"])
+                if hasattr(ground_types, "read"):
+                    shutil.copyfileobj(ground_types, f)
+                else:
+                    f.write(ground_types)
+
+        logger.debug(f"Terrain file \"{path}\" {width}X{height} created, size {size} bytes.")
+
+        return None
+
+    @classmethod
+    def open_mapped(cls, path: pathlib.Path, access: str="copy", use_numpy: bool=None) -> 'TerrainGrid':
+        """
+        DESCR: Open terrain file created with TerrainGrid.create_file. Layers are not read, they are views
+               of memory mapped file, so pages are loaded on demand and shared between processes.
+        ARGS:
+            - path: terrain file
+            - access: "read", "write" or "copy", see DICT_MAPPING_ACCESS
+            - use_numpy: layers as numpy arrays, otherwise memoryviews
+        RETURN: TerrainGrid
+        NOTE: ValueError is raised for files of unknown format
+        """
+        with open(path, mode='r+b' if access == "write" else 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=DICT_MAPPING_ACCESS[access])
+
+        header_size = struct.calcsize(STR_TERRAIN_HEADER_FORMAT)
+        magic, version, layers_count, width, height = struct.unpack_from(STR_TERRAIN_HEADER_FORMAT, mapping)
+        offsets, size = cls._get_file_layout(width, height)
+        if magic != BYTES_TERRAIN_MAGIC or version != INT_TERRAIN_FORMAT_VERSION or layers_count != len(offsets) or len(mapping) != size:
+            mapping.close()
+            raise ValueError(f"File \"{path}\" is not a terrain file of version {INT_TERRAIN_FORMAT_VERSION}.")
+
+        use_numpy = (numpy is not None) if use_numpy is None else (use_numpy and numpy is not None)
+        layers = {}
+        for name, typecode in cls.DICT_LAYER_TYPECODES.items():
+            count = width * height
+            if use_numpy:
+                layers[name] = numpy.frombuffer(mapping, dtype=numpy.dtype(typecode), count=count, offset=offsets[name])
+            else:
+                itemsize = array.array(typecode).itemsize
+                layers[name] = memoryview(mapping)[offsets[name]:offsets[name] + count * itemsize].cast(typecode)
+
+        logger.debug(f"Terrain file \"{path}\" {width}X{height} mapped with access \"{access}\".")
+
+        return cls(width, height, use_numpy, layers, mapping)
+
+    def _allocate_layer(self, typecode: str):
+        """
+        DESCR: Create zero filled flat buffer for one layer
+        RETURN: numpy.ndarray or array.array of width * height elements
+        """
+        if self.use_numpy:
+            return numpy.zeros(self.width * self.height, dtype=numpy.dtype(typecode))
+
+        return array.array(typecode, bytes(array.array(typecode).itemsize * self.width * self.height))
+
+    def count_nonzero(self, layer: str) -> int:
+        """
+        DESCR: Count cells with non zero value in passed layer
+        """
+        buffer = self.layers[layer]
+        if self.use_numpy:
+            return int(numpy.count_nonzero(buffer))
+        if isinstance(buffer, memoryview):
+            values = array.array(self.DICT_LAYER_TYPECODES[layer])
+            values.frombytes(buffer)
+            buffer = values
+
+        return len(buffer) - buffer.count(0)
+
+    def fill(self, layer: str, value: int) -> None:
+        """
+        DESCR: Set same value for every cell of the layer
+        """
+        buffer = self.layers[layer]
+        if self.use_numpy:
+            buffer.fill(value)
+        else:
+            buffer[:] = array.array(self.DICT_LAYER_TYPECODES[layer], [value]) * len(buffer)
+
+        return None
+
+    def close(self,) -> None:
+        """
+        DESCR: Release memory map of the grid opened with TerrainGrid.open_mapped
+        """
+        if self.mapping is None:
+            return None
+
+        for name in list(self.layers):
+            if isinstance(self.layers[name], memoryview):
+                self.layers[name].release()
+        self.layers = {}
+        try:
+            self.mapping.close()
+        except BufferError:
+            logger.info(f"Memory map of TerrainGrid at {id(self)} is still used by views of it's layers. It will be closed when they are deleted.")
+        self.mapping = None
+
+        return None
+
+    def flush(self,) -> None:
+        """
+        DESCR: Write changes of memory mapped layers into the file, only for "write" access
+        """
+        if self.mapping is not None:
+            self.mapping.flush()
+
+        return None
+
+    def get_cell(self, x: int, y: int) -> 'GroundView':
+        """
+        DESCR: Get Ground-like view of a single cell
+        """
+
+        return GroundView(self, x, y)
+
+    def get_row(self, layer: str, y: int):
+        """
+        DESCR: Get values of a single row of the layer without copying them
+        RETURN: memoryview (array backend) or numpy view
+        """
+        start = y * self.width
+        if self.use_numpy:
+            return self.layers[layer][start:start + self.width]
+
+        return memoryview(self.layers[layer])[start:start + self.width]
+
+    def get_value(self, layer: str, x: int, y: int) -> int:
+        return int(self.layers[layer][y * self.width + x])
+
+    def get_tiles(self,) -> list:
+        """
+        DESCR: Get tile symbols of every cell according to ground_type layer
+        RETURN: list of lists with tile symbols
+        """
+        types = self.layers["ground_type"]
+        width = self.width
+
+        return [[TUPLE_GROUND_TILES[t] for t in types[y * width:(y + 1) * width]] for y in range(self.height)]
+
+    def set_ground_types(self, ground_types: bytes, width: int, height: int) -> None:
+        """
+        DESCR: Copy raster of ground types (one byte per cell, row by row) into ground_type layer.
+               Raster of other size is copied partially: only cells existing in both.
+        """
+        layer = self.layers["ground_type"]
+        if width == self.width and height == self.height:
+            if self.use_numpy:
+                layer[:] = numpy.frombuffer(ground_types, dtype=numpy.int8)
+            else:
+                layer[:] = array.array('b', ground_types)
+            return None
+
+        for y in range(min(height, self.height)):
+            self.set_ground_types_row(y, ground_types[y * width:(y + 1) * width])
+
+        return None
+
+    def set_ground_types_row(self, y: int, ground_types: bytes) -> None:
+        """
+        DESCR: Copy single row of ground types (one byte per cell) into ground_type layer,
+               cells out of grid width are ignored
+        """
+        row = ground_types[:self.width]
+        start = y * self.width
+        self.layers["ground_type"][start:start + len(row)] = numpy.frombuffer(row, dtype=numpy.int8) if self.use_numpy else array.array('b', row)
+
+        return None
+
+    def set_value(self, layer: str, x: int, y: int, value: int) -> None:
+        self.layers[layer][y * self.width + x] = value
+
+        return None
+
+    def store_ground(self, x: int, y: int, block: Ground) -> None:
+        """
+        DESCR: Copy attributes of passed Ground object into the cell
+        """
+        i = y * self.width + x
+        self.layers["illumination"][i] = block.illumination_value
+        self.layers["fertility"][i] = block.fertility_value
+        self.layers["ground_type"][i] = block.ground_type
+        self.layers["occupation"][i] = 1 if block.is_occupied else 0
+        self.layers["speed_modifier"][i] = block.speed_modifier
+
+        return None
+
+
+class TerrainRow(object):
+    """
+    DESCR: Single row of TerrainGrid, allows "grid[y][x]" access same as for list of lists
+    """
+
+    __slots__ = ("grid", "y",)
+
+    def __init__(self, grid: TerrainGrid, y: int) -> None:
+        self.grid = grid
+        self.y = y
+
+        return None
+
+    def __getitem__(self, x: int) -> 'GroundView':
+        if x < 0 or x >= self.grid.width:
+            raise IndexError(f"TerrainRow index out of range: {x}")
+
+        return GroundView(self.grid, x, self.y)
+
+    def __iter__(self):
+        for x in range(self.grid.width):
+            yield GroundView(self.grid, x, self.y)
+
+    def __len__(self) -> int:
+        return self.grid.width
+
+    def __setitem__(self, x: int, block: Ground) -> None:
+        self.grid.store_ground(x, self.y, block)
+
+        return None
+
+
+class GroundView(object):
+    """
+    DESCR: Lightweight Ground-like object which keeps no values by itself, all attributes are read from and
+           written to TerrainGrid layers. It is not a Ground subclass, so views carry no unused Ground slots;
+           Ground methods are shared, they use attributes only, which are properties here.
+    """
+
+    __slots__ = ("grid", "x", "y",)
+
+    INT_ILLUMINATION_VALUE_MAX = Ground.INT_ILLUMINATION_VALUE_MAX
+    INT_ILLUMINATION_VALUE_MIN = Ground.INT_ILLUMINATION_VALUE_MIN
+    INT_FERTILITY_VALUE_MAX = Ground.INT_FERTILITY_VALUE_MAX
+    INT_FERTILITY_VALUE_MIN = Ground.INT_FERTILITY_VALUE_MIN
+
+    _get_fertility_boundaries = Ground._get_fertility_boundaries
+    _get_illumination_boundaries = Ground._get_illumination_boundaries
+    get_fertility_value = Ground.get_fertility_value
+    get_ground_type = Ground.get_ground_type
+    get_illumination = Ground.get_illumination
+    get_occupation = Ground.get_occupation
+    get_speed_modifier = Ground.get_speed_modifier
+    set_fertility = Ground.set_fertility
+    set_illumination = Ground.set_illumination
+    set_occupation = Ground.set_occupation
+    redraw = Ground.redraw
+
+    def __init__(self, grid: TerrainGrid, position_x: int, position_y: int) -> None:
+        self.grid = grid
+        self.x = position_x
+        self.y = position_y
+
+        return None
+
+    def _get_layer_value(self, layer: str) -> int:
+        return int(self.grid.layers[layer][self.y * self.grid.width + self.x])
+
+    def _set_layer_value(self, layer: str, value: int) -> None:
+        self.grid.layers[layer][self.y * self.grid.width + self.x] = value
+
+        return None
+
+    def _get_state(self,) -> dict:
+        """
+        DESCR: Get current values of the cell, same attributes as Ground._get_state has
+        RETURN: dictionary attribute name -> value
+        """
+
+        return {"x": self.x, "y": self.y, "tile": self.tile, "illumination_value": self.illumination_value,
+                "fertility_value": self.fertility_value, "ground_type": self.ground_type,
+                "is_occupied": self.is_occupied, "speed_modifier": self.speed_modifier}
+
+    @property
+    def illumination_value(self) -> int:
+        return self._get_layer_value("illumination")
+
+    @illumination_value.setter
+    def illumination_value(self, value: int) -> None:
+        self._set_layer_value("illumination", value)
+
+    @property
+    def fertility_value(self) -> int:
+        return self._get_layer_value("fertility")
+
+    @fertility_value.setter
+    def fertility_value(self, value: int) -> None:
+        self._set_layer_value("fertility", value)
+
+    @property
+    def ground_type(self) -> int:
+        return self._get_layer_value("ground_type")
+
+    @ground_type.setter
+    def ground_type(self, value: int) -> None:
+        self._set_layer_value("ground_type", value)
+
+    @property
+    def is_occupied(self) -> bool:
+        return self._get_layer_value("occupation") != 0
+
+    @is_occupied.setter
+    def is_occupied(self, value: bool) -> None:
+        self._set_layer_value("occupation", 1 if value else 0)
+
+    @property
+    def speed_modifier(self) -> int:
+        return self._get_layer_value("speed_modifier")
+
+    @speed_modifier.setter
+    def speed_modifier(self, value: int) -> None:
+        self._set_layer_value("speed_modifier", value)
+
+    @property
+    def tile(self) -> str:
+        return TUPLE_GROUND_TILES[self._get_layer_value("ground_type")]
+
+    @tile.setter
+    def tile(self, value: str) -> None:
+        # tile is not stored, it is the symbol of ground type
+        if value not in TUPLE_GROUND_TILES:
+            raise ValueError(f"Tile \"{value}\" is not a ground tile, expected one of {TUPLE_GROUND_TILES}.")
+        self._set_layer_value("ground_type", TUPLE_GROUND_TILES.index(value))
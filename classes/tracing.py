@@ -0,0 +1,142 @@
+"""
+Tracing of model methods calls.
+
+Tracing is resolved once, when method is decorated: methods which are not traced are returned
+unwrapped, so they cost nothing. Configuration is read from environment variable FOODCYCLE_TRACE
+or passed to configure() before model modules are imported.
+
+Configuration is a comma separated list of "name=rate" rules, where name is a module, class or
+method qualified name (or "*" for everything) and rate is a share of calls to be traced, 0..1.
+The most specific rule wins. Example:
+
+    FOODCYCLE_TRACE="*=0.01,classes.field_board=1,classes.ground.Ground.get_illumination=0"
+"""
+
+import functools
+import logging
+import os
+
+
+logger = logging.getLogger(__name__)
+
+
+STR_TRACE_ENV_VARIABLE = "FOODCYCLE_TRACE"
+
+dict_sampling_rules = {}
+
+
+class TraceRecord(object):
+    """
+    DESCR: Structured description of a single traced call. Text is built only when record is formatted.
+    """
+
+    __slots__ = ("method", "obj", "args", "kwargs", "result", "error",)
+
+    def __init__(self, method: str, obj: object, args: tuple, kwargs: dict) -> None:
+        self.method = method
+        self.obj = obj
+        self.args = args
+        self.kwargs = kwargs
+        self.result = None
+        self.error = None
+
+        return None
+
+    def __str__(self) -> str:
+        if self.error is not None:
+            return f"Exception occured while executing {id(self.obj)}.{self.method}. Class: {self.error.__class__} ; Args: {self.error.args}."
+
+        return f"Object {self.obj} at {id(self.obj)} called \"{self.method}\" with args:{self.args}, and kwargs:{self.kwargs}. Result: {self.result}."
+
+    def as_dict(self,) -> dict:
+        return {
+            "method": self.method,
+            "object": id(self.obj),
+            "args": self.args,
+            "kwargs": self.kwargs,
+            "result": self.result,
+            "error": repr(self.error) if self.error is not None else None,
+        }
+
+
+def configure(spec: str=None) -> dict:
+    """
+    DESCR: Parse and apply sampling rules. Affects only methods decorated after the call.
+    ARGS:
+        - spec: rules string, by default value of FOODCYCLE_TRACE environment variable is used
+    RETURN: applied rules, name -> rate
+    """
+    if spec is None:
+        spec = os.environ.get(STR_TRACE_ENV_VARIABLE, "")
+
+    rules = {}
+    for rule in spec.split(','):
+        rule = rule.strip()
+        if len(rule) == 0:
+            continue
+        name, _, rate = rule.partition('=')
+        try:
+            rules[name.strip()] = min(max(float(rate), 0.0), 1.0) if rate else 1.0
+        except ValueError:
+            logger.warning(f"Tracing rule \"{rule}\" has incorrect rate. Rule skipped.")
+
+    dict_sampling_rules.clear()
+    dict_sampling_rules.update(rules)
+
+    return dict(dict_sampling_rules)
+
+
+def get_sampling_rate(qualified_name: str) -> float:
+    """
+    DESCR: Find rate of the most specific rule matching passed name
+    ARGS:
+        - qualified_name: "module.Class.method" or "module.function"
+    RETURN: share of calls to be traced, 0.0 if tracing is disabled for this name
+    """
+    name = qualified_name
+    while True:
+        if name in dict_sampling_rules:
+            return dict_sampling_rules[name]
+        if '.' not in name:
+            break
+        name = name.rsplit('.', 1)[0]
+
+    return dict_sampling_rules.get('*', 0.0)
+
+
+def traced(method):
+    """
+    DESCR: Decorator. Returns method unchanged when tracing is disabled for it,
+           otherwise wraps it to emit TraceRecord for sampled calls at DEBUG level.
+    NOTE: exceptions are logged and raised again
+    """
+    qualified_name = f"{method.__module__}.{method.__qualname__}"
+    rate = get_sampling_rate(qualified_name)
+    if rate <= 0.0:
+        return method
+
+    method_logger = logging.getLogger(method.__module__)
+    interval = max(int(round(1.0 / rate)), 1)
+    calls = [0]
+
+    @functools.wraps(method)
+    def decoration(*args, **kwargs):
+        calls[0] += 1
+        if calls[0] % interval != 0 or not method_logger.isEnabledFor(logging.DEBUG):
+            return method(*args, **kwargs)
+
+        record = TraceRecord(method.__name__, args[0] if args else None, args[1:], kwargs)
+        try:
+            record.result = method(*args, **kwargs)
+        except Exception as ex:
+            record.error = ex
+            method_logger.error("%s", record, extra={"trace": record})
+            raise
+        method_logger.debug("%s", record, extra={"trace": record})
+
+        return record.result
+
+    return decoration
+
+
+configure()
@@ -9,48 +9,62 @@ logger = logging.getLogger(__name__)
 class UnitCorpse(BasicObject):
     """
     DESCR: This class represents corpse of any unit. Also it's basic class for all units
+    NOTE: stat boundaries are shared by all units of a class, subclasses declare them once as TRAITS table
+          and are registered with classes.species.register_species, which fills INT_* constants from it
     """
 
+    __slots__ = ("damage_value", "moving_speed", "_health_value", "_hunger_value", "sight_value", "_life_state",
+                 "generation", "genome_set", "instance_name", "is_ready_to_reproduce", "spatial_index",
+                 "population", "population_index",)
+
+    TRAITS = None
+
+    INT_DAMAGE_VALUE_MIN = None
+    INT_DAMAGE_VALUE_MAX = None
+    INT_DAMAGE_VALUE_DEVIATION = None
+
+    INT_MOVING_SPEED_MIN = None
+    INT_MOVING_SPEED_MAX = None
+    INT_MOVING_SPEED_DEVIATION = None
+
+    INT_HEALTH_VALUE_MIN = None
+    INT_HEALTH_VALUE_MAX = None
+    INT_HEALTH_VALUE_DEVIATION = None
+
+    INT_HUNGER_VALUE_MIN = None
+    INT_HUNGER_VALUE_MAX = None
+    INT_HUNGER_VALUE_DEVIATION = None
+
+    INT_SIGHT_VALUE_MIN = None
+    INT_SIGHT_VALUE_MAX = None
+    INT_SIGHT_VALUE_DEVIATION = None
+
+    LIFE_STATES = None
+
     @BasicObject._general_logger
     def __init__(self, position_x: int, position_y: int) -> None:
-        logger.debug(f"Object {self} at {id(self)} calling ancestor's method \"{super(object, self).__init__.__name__}\".")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Object {self} at {id(self)} calling ancestor's method \"{super(object, self).__init__.__name__}\".")
         super(UnitCorpse, self).__init__(position_x, position_y)
 
         self.tile = 'T'
 
-        logger.debug(f"UnitCorpse instance {self} at {id(self)} state after initialization: {vars(self)}.")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"UnitCorpse instance {self} at {id(self)} state after initialization: {self._get_state()}.")
 
         return None
 
     def __new__(cls, *args, **kwargs) -> BasicObject:
         instance = super(UnitCorpse, cls).__new__(cls, *args, **kwargs)
 
-        instance.INT_DAMAGE_VALUE_MIN = None
-        instance.INT_DAMAGE_VALUE_MAX = None
-        instance.INT_DAMAGE_VALUE_DEVIATION = None
-        instance.damage_value = None
+        instance.population = None  # columnar storage of hunger, health and life state, see classes.population
+        instance.population_index = None
 
-        instance.INT_MOVING_SPEED_MIN = None
-        instance.INT_MOVING_SPEED_MAX = None
-        instance.INT_MOVING_SPEED_DEVIATION = None
+        instance.damage_value = None
         instance.moving_speed = None
-
-        instance.INT_HEALTH_VALUE_MIN = None
-        instance.INT_HEALTH_VALUE_MAX = None
-        instance.INT_HEALTH_VALUE_DEVIATION = None
         instance.health_value = None
-        
-        instance.INT_HUNGER_VALUE_MIN = None
-        instance.INT_HUNGER_VALUE_MAX = None
-        instance.INT_HUNGER_VALUE_DEVIATION = None
         instance.hunger_value = None
-
-        instance.INT_SIGHT_VALUE_MIN = None
-        instance.INT_SIGHT_VALUE_MAX = None
-        instance.INT_SIGHT_VALUE_DEVIATION = None
         instance.sight_value = None
-
-        instance.LIFE_STATES = None
         instance.life_state = None
 
         instance.generation = None
@@ -60,8 +74,48 @@ class UnitCorpse(BasicObject):
         
         instance.is_ready_to_reproduce = None
 
+        instance.spatial_index = None  # index of the board this unit is placed on
+
         return instance
 
+    @property
+    def health_value(self) -> int:
+        if self.population is not None:
+            return self.population.health[self.population_index]
+        return self._health_value
+
+    @health_value.setter
+    def health_value(self, value: int) -> None:
+        if self.population is not None:
+            self.population.health[self.population_index] = value
+        else:
+            self._health_value = value
+
+    @property
+    def hunger_value(self) -> int:
+        if self.population is not None:
+            return self.population.hunger[self.population_index]
+        return self._hunger_value
+
+    @hunger_value.setter
+    def hunger_value(self, value: int) -> None:
+        if self.population is not None:
+            self.population.hunger[self.population_index] = value
+        else:
+            self._hunger_value = value
+
+    @property
+    def life_state(self) -> str:
+        if self.population is not None:
+            return "alive" if self.population.alive[self.population_index] else "dead"
+        return self._life_state
+
+    @life_state.setter
+    def life_state(self, value: str) -> None:
+        if self.population is not None:
+            self.population.set_alive(self.population_index, value != "dead")
+        else:
+            self._life_state = value
 
     @BasicObject._general_logger
     def _calculate_genotype(self, phenotype: str=None) -> str:
@@ -108,7 +162,7 @@ class UnitCorpse(BasicObject):
         """
         DESCR: Set name for this instance to allow differentiation
         """
-        logger.debug(f"Object's {self} at {id(self)} attribute \"instance_name\" changed: {self.instance_name} -> {name}.")
+        logger.debug("Object's %s at %s attribute \"instance_name\" changed: %s -> %s.", self, id(self), self.instance_name, name)
         self.instance_name = name
 
         return None
@@ -185,9 +239,19 @@ class UnitCorpse(BasicObject):
         """
         DESCR: Change this object coordinates according to it's speed
         ARGS:
+            - new_position: tuple (coordinate X, coordinate Y)
         NOTE: Corpses cannot move, this is a parent method for this class subtree
         NOTE: All checks must be implemented somewhere else
+        NOTE: spatial index of the board holding this unit is updated too
         """
+        logger.debug("Object's %s at %s position changed: %s -> %s.", self, id(self), (self.x, self.y), new_position)
+        old_position = (self.x, self.y,)
+        self.x = new_position[0]
+        self.y = new_position[1]
+
+        if self.spatial_index is not None:
+            self.spatial_index.update(self, old_position)
+
         return None
 
     @BasicObject._general_logger
@@ -206,15 +270,15 @@ class UnitCorpse(BasicObject):
         DESCR: Set new speed value for this exemplar
         """
 
-        if speed > self.INT_DAMAGE_VALUE_MAX:
+        if damage > self.INT_DAMAGE_VALUE_MAX:
             logger.info(f"Method \"Ground.set_damage\" called with argument \"damage\" higher than max bound: {damage} > {self.INT_DAMAGE_VALUE_MAX}. Max value applied instead.")
             damage = self.INT_DAMAGE_VALUE_MAX
-        elif speed < self.INT_DAMAGE_VALUE_MIN:
+        elif damage < self.INT_DAMAGE_VALUE_MIN:
             logger.info(f"Method \"Ground.set_damage\" called with argument \"damage\" lower than min bound: {damage} < {self.INT_DAMAGE_VALUE_MIN}. Min value applied instead.")
             damage = self.INT_DAMAGE_VALUE_MIN
         else:
             pass
-        logger.debug(f"Object's {self} at {id(self)} attribute \"damage\" changed: {self.damage_value} -> {damage}.")
+        logger.debug("Object's %s at %s attribute \"damage\" changed: %s -> %s.", self, id(self), self.damage_value, damage)
         self.damage_value = damage
 
         return None
@@ -233,7 +297,7 @@ class UnitCorpse(BasicObject):
             speed = self.INT_MOVING_SPEED_MIN
         else:
             pass
-        logger.debug(f"Object's {self} at {id(self)} attribute \"moving_speed\" changed: {self.moving_speed} -> {speed}.")
+        logger.debug("Object's %s at %s attribute \"moving_speed\" changed: %s -> %s.", self, id(self), self.moving_speed, speed)
         self.moving_speed = speed
 
         return None
@@ -252,7 +316,7 @@ class UnitCorpse(BasicObject):
             health = self.INT_HEALTH_VALUE_MIN
         else:
             pass
-        logger.debug(f"Object's {self} at {id(self)} attribute \"health_value\" changed: {self.health_value} -> {health}.")
+        logger.debug("Object's %s at %s attribute \"health_value\" changed: %s -> %s.", self, id(self), self.health_value, health)
         self.health_value = health
 
         return None
@@ -271,7 +335,7 @@ class UnitCorpse(BasicObject):
             hunger = self.INT_HUNGER_VALUE_MIN
         else:
             pass
-        logger.debug(f"Object's {self} at {id(self)} attribute \"hunger_value\" changed: {self.hunger_value} -> {hunger}.")
+        logger.debug("Object's %s at %s attribute \"hunger_value\" changed: %s -> %s.", self, id(self), self.hunger_value, hunger)
         self.hunger_value = hunger
 
         return None
@@ -281,7 +345,7 @@ class UnitCorpse(BasicObject):
         """
         DESCR:  Set new is_ready_to_reproduce value for this exemplar
         """
-        logger.debug(f"Object's {self} at {id(self)} attribute \"is_ready_to_reproduce\" changed: {self.is_ready_to_reproduce} -> {is_ready}.")
+        logger.debug("Object's %s at %s attribute \"is_ready_to_reproduce\" changed: %s -> %s.", self, id(self), self.is_ready_to_reproduce, is_ready)
         self.is_ready_to_reproduce = is_ready
 
         return None
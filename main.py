@@ -4,65 +4,61 @@ The goal is to build simulator on basic components
 """
 
 import argparse
+import concurrent.futures
+import itertools
+import json
 import logging
 import pathlib
 import sys
 import time
-import tkinter
 
+try:
+    import tkinter
+except ImportError:  # GUI is optional, headless commands work without Tk
+    tkinter = None
 
-from classes.ground import Ground
+
+from classes import tracing
+from classes.checkpoint import CheckpointWriter, read_checkpoint
+from classes.ground import Ground, TUPLE_GROUND_TILES
 from classes.field_board import FieldBoard
+from classes.field_of_view import UnitView
+from classes.field_pattern import (FieldPattern, compile_pattern_rows, get_compiled_pattern_path, load_pattern,
+                                   iter_pattern_rows, read_compiled_pattern_header, stream_pattern_into_grid, INT_PATTERN_HEADER_SIZE)
+from classes.light_cache import LightStampCache
+from classes.log_sink import setup_logging
+from classes.metrics import TickMetrics, TUPLE_METRICS_FORMATS
 from classes.lighter import Lighter
+from classes.lighter_path import LighterPath, PerimeterPath
+from classes.pixel_frame import PixelFrame
 from classes.producens import Producens
+from classes.rng import RandomService, RandomStream, INT_UINT32_BITS
+from classes.scheduler import TickScheduler
+from classes.terrain_grid import GroundView, TerrainGrid
 from classes.unit_corpse import UnitCorpse
 
 
 logger = logging.getLogger(__name__)
 dt_start = time.strftime("%Y%m%d-%H%M%S")
-logging.basicConfig(filename=f"applog_{dt_start}.log", encoding="utf-8", level=logging.DEBUG, 
-                    format="%(asctime)s:[%(levelname)s-%(levelno)s](module:%(module)s, file:%(filename)s, line:%(lineno)d, %(funcName)s) || %(message)s")
-
-
-def _general_logger(method, *args, **kwargs):  # what type will it return?
-    """
-    DESCR: method used for debug purposses, does nothing but describes the execution
-    """
-    result = None
-    line = ""
-    def decoration(self, *args, **kwargs) -> None:
-        global result
-        global line
-
-        line = "Object {obj} at {id} calling \"{mth}\" with args:{a}, and kwargs:{kw}." 
-        line = line.format(obj=self, id=id(self), mth=method.__name__, a=args, kw=kwargs)
-        #print(line)
-        logger.debug(line)
-        try:
-            result = method(self, *args, **kwargs)
-            line = "The result of {obj}.{mth} is: {r}."
-            line = line.format(obj=id(self), mth=method.__name__, r=result)
-            #print(line)
-            logger.debug(line)
-        except Exception as e:
-            line = "Exception occured while executing {obj}.{mth}. " +\
-                   "Cause: {ex_ca} ; Class: {ex_cl} ; Context: {ex_co} ; Args: {ex_ar} ; Trace: {ex_tr}. " +\
-                   "None will be returned." 
-            line = line.format(obj=id(self), mth=method.__name__, ex_ca=e.__cause__, ex_cl=e.__class__,
-                              ex_co=e.__context__, ex_ar=e.args, ex_tr=e.with_traceback)
-            #print(line)
-            logger.error(line)
-            result = None
-        
-        return result
-    
-    return decoration
+
+
+def _general_logger(method, *args, **kwargs):
+    """
+    DESCR: method used for debug purposses, describes the execution when tracing is enabled for the method.
+           Resolved at decoration time: not traced methods are returned as is. See classes.tracing.
+    """
+
+    return tracing.traced(method)
 
 
 ### GUI methods
 
+INT_GUI_FRAME_INTERVAL_MS = 40  # delay between simulation chunks, GUI gets events processed in between
+FLOAT_GUI_CHUNK_BUDGET = 0.025  # seconds of simulation per chunk, only the last state of a chunk is drawn
+INT_GUI_RENDER_EVERY = 1  # ticks between renders of the board into offscreen image
+
 @_general_logger
-def gui_create_main_window(win_width: int, win_height: int, win_icon_path: str=None,) -> tkinter.Tk:
+def gui_create_main_window(win_width: int, win_height: int, win_icon_path: str=None,) -> "tkinter.Tk":
     """
     DESCR: Create main window of the application.
     """
@@ -72,63 +68,167 @@ def gui_create_main_window(win_width: int, win_height: int, win_icon_path: str=N
     win_main.geometry(f"{str(win_width)}x{str(win_height)}")
     win_main.resizable(False, False)
     
-    win_main.title("APP NAME HERE!")
-    win_main.iconbitmap(default=win_icon_path)
+    win_main.title("Food cycle simulation")
+    if win_icon_path is not None:
+        win_main.iconbitmap(default=win_icon_path)
 
     logger.debug(f"Object {win_main} at {id(win_main)} created. State: {vars(win_main)}")
     
     return win_main
 
 @_general_logger
-def gui_draw_field(screen:tkinter.Tk, field_pictogram: list) -> None:
+def gui_draw_field(image: "tkinter.PhotoImage", pixels: PixelFrame, changes: list) -> int:
     """
-    DESCR: Draws field in tk widget according to passed pictogram
+    DESCR: Draws changed cells of the field into single Tk image. Cells are painted into offscreen PixelFrame first,
+           then copied into the image as filled rectangles, or as whole PPM picture when everything has changed.
     ARGS:
-        - screen: Tkinter window
-        - field_pictogram: list of lists representing model objects placement
+        - image: Tk image shown in the window, None for headless drawing into PixelFrame only
+        - pixels: offscreen image of the field
+        - changes: list of changed cells (x, y, tile), see FieldBoard.redraw_changes
+    RETURN: count of drawn cells
     """
-    return None
+    drawn = pixels.paint(changes)
+    if image is None:
+        return drawn
+
+    painted = pixels.pop_painted()
+    if painted is None:
+        image.configure(data=pixels.to_ppm(), format="PPM")
+        return drawn
+
+    size = pixels.cell_size
+    for x, y, color in painted:
+        image.put("#%02x%02x%02x" % color, to=(x * size, y * size, (x + 1) * size, (y + 1) * size))
+
+    return drawn
+
+@_general_logger
+def gui_run_simulation(window: "tkinter.Tk", field: FieldBoard, lighter_path: LighterPath, random_service: RandomService,
+                       ticks: int=None, cell_size: int=8, metrics: TickMetrics=None,
+                       render_every: int=INT_GUI_RENDER_EVERY) -> "tkinter.PhotoImage":
+    """
+    DESCR: Show the field in the window and run simulation in fixed-step chunks scheduled with after().
+           Board is rendered into offscreen image by "redraw" phase every render_every ticks when it has changed,
+           every chunk simulates ticks for FLOAT_GUI_CHUNK_BUDGET seconds and copies the image into the window once,
+           so frames are dropped instead of slowing the simulation down.
+    ARGS:
+        - window: main window
+        - field: prepared FieldBoard with lighter and creatures
+        - lighter_path: path of the lighter
+        - random_service: random numbers service of the simulation
+        - ticks: count of ticks to simulate, endless when None
+        - cell_size: side of a cell in pixels
+        - metrics: counters of tick phases and drawing
+        - render_every: render board on every Nth tick only, the last tick is always rendered
+    RETURN: Tk image the field is drawn into
+    """
+    width, height = field.get_size()
+    pixels = PixelFrame(width, height, cell_size)
+    image = tkinter.PhotoImage(master=window, width=pixels.pixel_width, height=pixels.pixel_height)
+    label = tkinter.Label(window, image=image, borderwidth=0)
+    label.pack()
+    status = {"ticks": 0, "frames": 0}
+    scheduler = main_build_scheduler(field, lighter_path, random_service, metrics=metrics, pixels=pixels,
+                                     render_every=render_every)
+
+    def run_chunk() -> None:
+        status["ticks"] += scheduler.run(ticks - status["ticks"] if ticks is not None else None,
+                                         budget=FLOAT_GUI_CHUNK_BUDGET)
+        is_finished = ticks is not None and status["ticks"] >= ticks
+
+        # cells painted by "redraw" phase are copied into the window, state of the last tick is rendered here
+        mark = metrics.begin() if metrics is not None else None
+        gui_draw_field(image, pixels, field.redraw_changes() if is_finished else [])
+        if metrics is not None:
+            metrics.end("draw", mark)
+        status["frames"] += 1
+        window.title(f"Food cycle simulation - tick {status['ticks']}, alive {field.population.alive_count}")
+
+        if not is_finished:
+            window.after(INT_GUI_FRAME_INTERVAL_MS, run_chunk)
+        else:
+            logger.info(f"GUI simulation finished: {status['ticks']} ticks, {status['frames']} frames drawn.")
+
+        return None
+
+    # renderer may have drawn the board before, so the first frame is painted fully
+    field.redraw_changes()
+    gui_draw_field(image, pixels, field.renderer.get_cells())
+    window.after(INT_GUI_FRAME_INTERVAL_MS, run_chunk)
+
+    return image
+
+@_general_logger
+def gui_render_offscreen(field: FieldBoard, path: pathlib.Path, cell_size: int=8) -> int:
+    """
+    DESCR: Draw current state of the field into PPM image file, no display is needed
+    RETURN: count of drawn cells
+    """
+    width, height = field.get_size()
+    pixels = PixelFrame(width, height, cell_size)
+    field.redraw_changes()
+    drawn = gui_draw_field(None, pixels, field.renderer.get_cells())
+    with open(path, mode='wb') as f:
+        f.write(pixels.to_ppm())
+
+    return drawn
 
 
 ### ENGINE methods
 
 @_general_logger
-def eng_create_field(field_x: int, field_y: int, lighter_power: int, terrain_pattern: list=None) -> FieldBoard:
+def eng_create_field(field_x: int, field_y: int, lighter_power: int, terrain_pattern: list=None, compact: bool=False,
+                     light_cache_budget: int=LightStampCache.INT_DEFAULT_MEMORY_BUDGET, terrain_path: pathlib.Path=None) -> FieldBoard:
     """
     DESCR: Create field board of exact size and populate it with blocks of terrain
     ARGS:
         - field_x: horizontal field size
         - field_y: vertical field size
         - lighter_power: attached to field lighter's power
+        - compact: keep terrain in typed arrays (TerrainGrid), recommended for large boards
+        - light_cache_budget: memory budget in bytes for cached illumination rasters, 0 disables caching
+        - terrain_path: terrain file (see misc_build_terrain_file) mapped into memory instead of allocated terrain,
+                        it's size must match field size without borders
     RETURN: exemplar of class FieldBoard, with initiated field and lighter
+    NOTE: ValueError is raised when size of terrain file differs from field size
     """
 
-    logger.debug(f"Creating field {field_x}X{field_y}")
-    instance = FieldBoard(field_x, field_y)
+    logger.debug(f"Creating field {field_x}X{field_y}, compact mode: {compact}")
+    instance = FieldBoard(field_x, field_y, compact and terrain_path is None)
+
+    if terrain_path is not None:
+        logger.debug(f"Mapping terrain file {terrain_path}.")
+        if not instance.open_terrain_file(terrain_path):
+            width, height = TerrainGrid.read_file_size(terrain_path)
+            raise ValueError(f"Terrain file \"{terrain_path}\" size {width}X{height} differs from field size {instance.field_x}X{instance.field_y}.")
 
     logger.debug(f"Adding lighter with power {lighter_power}.")
     instance.set_lighter(Lighter(0, 0, lighter_power))
 
+    if light_cache_budget > 0:
+        logger.debug(f"Adding light cache with budget {light_cache_budget} bytes.")
+        instance.set_light_cache(LightStampCache(light_cache_budget))
+
     return instance
 
 @_general_logger
-def eng_move_lighter_on_field(field: FieldBoard, moving_pattern: list) -> None:
+def eng_move_lighter_on_field(field: FieldBoard, moving_pattern: LighterPath) -> None:
     """
     DESCR: Method changes coordinates of object Lighter, imnitating it's movement around the field
     ARGS:
         - field: FieldBoard object with lighter within it.
-        - moving_pattern: Path of the lighter
+        - moving_pattern: Path of the lighter, plain sequence of positions is wrapped into LighterPath
+                          on every call, so pass LighterPath to keep the step O(1)
     """
+    if not isinstance(moving_pattern, LighterPath):
+        moving_pattern = LighterPath(moving_pattern)
 
     lighter_pos = field.lighter.get_position()
-    for move in moving_pattern:
-        if lighter_pos == move:
-            logger.debug(f"Current coordinates of FieldBoard.Lighter at {id(field.lighter)} are {field.lighter.get_position()}, and matched with {moving_pattern.index(move)}'th fragment of moving pattern at {id(moving_pattern)}.")
-            ligter_new_pos = (moving_pattern.index(move) + 1) % len(moving_pattern)
-            logger.debug(f"New index of fragment from moving pattern at {id(moving_pattern)} is {ligter_new_pos}")
-            field.lighter.set_position(moving_pattern[ligter_new_pos][0], moving_pattern[ligter_new_pos][1])
-            logger.debug(f"New set of coordinates for FieldBoard.Lighter at {id(field.lighter)} is: {moving_pattern[ligter_new_pos]}")
-            break
+    ligter_new_pos = moving_pattern.step(lighter_pos)
+    if ligter_new_pos is not None:
+        logger.debug(f"Current coordinates of FieldBoard.Lighter at {id(field.lighter)} are {lighter_pos}, next index of moving pattern at {id(moving_pattern)} is {moving_pattern.cursor}.")
+        field.lighter.set_position(ligter_new_pos[0], ligter_new_pos[1])
+        logger.debug(f"New set of coordinates for FieldBoard.Lighter at {id(field.lighter)} is: {ligter_new_pos}")
 
     return None
 
@@ -167,7 +267,7 @@ def eng_check_choosen_object_is_a_cell(field: FieldBoard, position: tuple) -> bo
 
     result = True
     
-    if instance(field.field[position[1]][position[0]], Ground) is False:
+    if isinstance(field.field[position[1]][position[0]], (Ground, GroundView,)) is False:
         logger.info(f"Object at that position is not a Ground class or subclass.")
         result = False
 
@@ -188,7 +288,7 @@ def eng_check_field_cell_not_occupied(field: FieldBoard, position: tuple) -> boo
     if field.field[position[1]][position[0]] is None:
         logger.info(f"Given position, ({position[0]},{position[1]}) is None.")
         return False
-    result = not field.field[cell_pos[1]][cell_pos[0]].is_occupied
+    result = not field.field[position[1]][position[0]].is_occupied
     
     return result
 
@@ -215,54 +315,111 @@ def eng_check_unit_is_not_corpse(unit:UnitCorpse) -> bool:
     return True
 
 @_general_logger
-def eng_fill_field(field: FieldBoard, pattern: list=None) -> int:
+def eng_fill_field(field: FieldBoard, pattern=None) -> int:
     """
     DESCR: fills FieldBoard exemplar with ground blocks
     ARGS:
         - field: FieldBoard exemplar to be filled, 
                  it is a link-type so will be changed anyway
-        - pattern: text symbol matrix, containing field imprinting.
+        - pattern: FieldPattern or text symbol matrix (list of lists), containing field imprinting.
+                   Ground types are taken from the pattern, cells out of pattern are basic ground.
     RETURN: count of spawned blocks
-    NOTE: pattern usage not implemented yet
     """
     blocks_count = 0
 
-    if pattern is not None:
+    if pattern is None:
         logger.info(f"No pattern passed to method.")
     else:
         logger.info(f"Processing passed pattern - {id(pattern)} - on field {id(field)}.")
-        for y in range(field.field_y):
-            for x in range(field.field_x):
-                field.field[y][x] = Ground(x, y)
-                blocks_count += 1
+        if not isinstance(pattern, FieldPattern):
+            pattern = compile_pattern_rows(pattern)
+        if (pattern.width, pattern.height) != field.get_field_size():
+            logger.info(f"Pattern size {pattern.width}X{pattern.height} differs from field size {field.get_field_size()}.")
+
+    field.mark_terrain_changed()
+    if field.is_compact:
+        if pattern is not None:
+            field.field.set_ground_types(pattern.ground_types, pattern.width, pattern.height)
+        return field.field_x * field.field_y
+
+    for y in range(field.field_y):
+        for x in range(field.field_x):
+            block = Ground(x, y)
+            if pattern is not None and x < pattern.width and y < pattern.height:
+                block.ground_type = pattern.ground_types[y * pattern.width + x]
+                block.tile = TUPLE_GROUND_TILES[block.ground_type]
+            field.field[y][x] = block
+            blocks_count += 1
 
     return blocks_count
 
 @_general_logger
-def eng_get_unit_view(field: FieldBoard, unit: UnitCorpse) -> list:
+def eng_get_unit_view(field: FieldBoard, unit: UnitCorpse) -> UnitView:
     """
     DESCR: Get subselection of field to represent unit point of view
     ARGS:
         - field: FieldBoard used in model 
+        - unit: UnitCorpse or derived type object
+    RETURN: UnitView with visible cells, terrain windows and creatures within unit sight.
+            Views are shared by units with same position and sight until field.unit_views.reset() is called.
     """
 
     logger.info(f"Performing basic checks on unit {unit} at {id(unit)}.")
     if eng_check_unit_is_not_corpse(unit) is False:
         logger.debug(f"Not-corpse check failed. Corpse's FoW is emtpy.")
-        return []
+        return UnitView(unit.x, unit.y, 0, field.unit_views.metric)
 
     view_dist = unit.get_sight_value()
-    # TODO: 
 
-
-    return []
+    return field.unit_views.get_view(unit.x, unit.y, view_dist)
 
 @_general_logger
-def eng_move_unit_on_field(creature) -> None:
-    
+def eng_act_unit_on_field(field: FieldBoard, unit: UnitCorpse) -> None:
+    """
+    DESCR: Perform unit's actions for current tick
+    ARGS:
+        - field: FieldBoard used in model
+        - unit: UnitCorpse or derived type object
+    NOTE: corpses do not act
+    """
+
+    if eng_check_unit_is_not_corpse(unit) is False:
+        return None
+
+    unit.consume()
 
     return None
 
+@_general_logger
+def eng_move_units_on_field(field: FieldBoard, units: list, stream: RandomStream) -> int:
+    """
+    DESCR: Move every unit to random position within it's moving speed, random offsets of all units
+           are drawn at once. Same units and stream state give the same moves.
+    ARGS:
+        - field: FieldBoard used in model
+        - units: units to move, corpses are skipped
+        - stream: random numbers source
+    RETURN: count of moved units
+    """
+    draws = stream.get_uint32(2 * len(units))
+    max_x, max_y = field.field_x - 1, field.field_y - 1
+    moved = 0
+
+    for i, creature in enumerate(units):
+        if eng_check_unit_is_not_corpse(creature) is False:
+            continue
+        speed = creature.get_moving_speed()
+        if speed <= 0:
+            continue
+
+        span = 2 * speed + 1
+        new_x = min(max(creature.x + ((draws[2 * i] * span) >> INT_UINT32_BITS) - speed, 0), max_x)
+        new_y = min(max(creature.y + ((draws[2 * i + 1] * span) >> INT_UINT32_BITS) - speed, 0), max_y)
+        creature.move((new_x, new_y,))
+        moved += 1
+
+    return moved
+
 @_general_logger
 def eng_populate_field(field: FieldBoard, creatures: list=None) -> None:
 
@@ -289,16 +446,99 @@ def misc_parse_field_pattern(pattern: str) -> list:
         - pattern_path: Path to file with pattern
     RETURN: parsed pattern as list of lists with cell symbols
     """
-    logger.debug(f"Reading pattern...")
-    logger.debug(f"{pattern}")
+    logger.debug(f"Reading pattern of {len(pattern)} symbols...")
 
     field = [list(line) for line in pattern.split('\n')]
 
-    logger.debug(f"Pattern processed as next structure.")
-    logger.debug(f"{field}")
+    logger.debug(f"Pattern processed into {len(field)} rows.")
 
     return field
 
+@_general_logger
+def misc_build_terrain_file(pattern_path: pathlib.Path, terrain_path: pathlib.Path) -> bool:
+    """
+    DESCR: Convert field pattern file into terrain file, which boards open as memory map
+           (see eng_create_field and FieldBoard.open_terrain_file).
+    ARGS:
+        - pattern_path: path to UTF-8 file with pattern data
+        - terrain_path: path to terrain file to be created
+    RETURN: True if terrain file has been created
+    """
+
+    try:
+        compiled_path = get_compiled_pattern_path(pattern_path)
+        width, height = read_compiled_pattern_header(compiled_path)
+        with open(compiled_path, mode='rb') as f:
+            # raster is copied from compiled pattern in chunks, it is never loaded as a whole
+            f.seek(INT_PATTERN_HEADER_SIZE)
+            TerrainGrid.create_file(terrain_path, width, height, f)
+    except (OSError, ValueError) as ex:
+        logger.warning(f"Terrain file can not be built from pattern \"{pattern_path}\" ({ex}). Aborting.")
+        return False
+
+    logger.info(f"Terrain file \"{terrain_path}\" built from pattern \"{pattern_path}\".")
+
+    return True
+
+@_general_logger
+def misc_load_field_pattern(pattern_path: pathlib.Path) -> FieldPattern:
+    """
+    DESCR: Load field pattern file as compiled raster of ground types. Compiled pattern is cached on disk
+           in binary form by hash of the file, next loads of the same file read the cache only.
+    ARGS:
+        - pattern_path: path to UTF-8 file with pattern data, symbols are described in docs/field_syntax.md
+    RETURN: FieldPattern, or None if file can not be loaded
+    """
+
+    try:
+        pattern = load_pattern(pattern_path)
+    except (OSError, ValueError) as ex:
+        logger.warning(f"Pattern file at path \"{pattern_path}\" can not be loaded ({ex}). Aborting.")
+        return None
+
+    logger.info(f"Pattern \"{pattern_path}\" loaded, size {pattern.width}X{pattern.height}.")
+
+    return pattern
+
+@_general_logger
+def misc_stream_field_pattern(field: FieldBoard, pattern_path: pathlib.Path) -> int:
+    """
+    DESCR: Fill FieldBoard with ground blocks reading pattern file row by row. Compact boards receive
+           ground types straight into terrain storage, so only one pattern row is kept in memory.
+           Cells out of pattern are basic ground, pattern cells out of field are ignored.
+    ARGS:
+        - field: FieldBoard exemplar to be filled
+        - pattern_path: path to UTF-8 file with pattern data, symbols are described in docs/field_syntax.md
+    RETURN: count of spawned blocks, 0 if file can not be read
+    """
+
+    try:
+        if field.is_compact:
+            width, height = stream_pattern_into_grid(pattern_path, field.field)
+            blocks_count = field.field_x * field.field_y
+        else:
+            eng_fill_field(field)
+            width, height = 0, 0
+            with open(pattern_path, mode='rb') as f:
+                for y, data in enumerate(iter_pattern_rows(f)):
+                    for x, ground_type in enumerate(data[:field.field_x] if y < field.field_y else b""):
+                        block = field.field[y][x]
+                        block.ground_type = ground_type
+                        block.tile = TUPLE_GROUND_TILES[ground_type]
+                    width, height = len(data), y + 1
+            blocks_count = field.field_x * field.field_y
+    except (OSError, ValueError) as ex:
+        logger.warning(f"Pattern file at path \"{pattern_path}\" can not be streamed ({ex}). Aborting.")
+        return 0
+    finally:
+        field.mark_terrain_changed()
+
+    if (width, height) != field.get_field_size():
+        logger.info(f"Pattern size {width}X{height} differs from field size {field.get_field_size()}.")
+    logger.info(f"Pattern \"{pattern_path}\" streamed into field {id(field)}.")
+
+    return blocks_count
+
 @_general_logger
 def misc_find_and_read_pattern_file(pattern_path: pathlib.Path) -> str:
     """
@@ -348,22 +588,397 @@ def misc_find_and_read_pattern_file(pattern_path: pathlib.Path) -> str:
 
     return pattern_data
 
+@_general_logger
+def misc_setup_logging(log_path: str=None, level: int=logging.DEBUG, log_format: str="text", asynchronous: bool=True,
+                       max_bytes: int=None, backup_count: int=None) -> None:
+    """
+    DESCR: Configure application log. By default records are written into "applog_<start time>.log"
+           from a background thread in batches, file is rotated by size.
+    ARGS:
+        - log_path: path to log file
+        - level: minimal level of written records
+        - log_format: "text" or "jsonl"
+        - asynchronous: False to write every record synchronously
+        - max_bytes: log file size which triggers rotation
+        - backup_count: count of rotated log files kept
+    """
+    if log_path is None:
+        log_path = f"applog_{dt_start}.log"
+
+    setup_logging(log_path, level, log_format, asynchronous, max_bytes=max_bytes, backup_count=backup_count)
+
+    return None
+
+@_general_logger
+def misc_get_perimeter_path(size_x: int, size_y: int) -> PerimeterPath:
+    """
+    DESCR: Build lighter path going around the board border: down the left side, along the bottom,
+           up the right side and back along the top. Positions are calculated on the fly, so path
+           takes no memory for any board size.
+    ARGS:
+        - size_x, size_y: board size, including borders
+    RETURN: PerimeterPath
+    """
+
+    return PerimeterPath(size_x, size_y)
+
+@_general_logger
+def misc_parse_arguments(argv: list) -> argparse.Namespace:
+    """
+    DESCR: Parse command line arguments
+    ARGS:
+        - argv: arguments without program name
+    RETURN: parsed arguments, "command" is "interactive" when no command passed
+    """
+    parser = argparse.ArgumentParser(description="Food cycle simulation")
+    parser.add_argument("--log-level", default=None, help="level of application log records, DEBUG by default")
+    parser.add_argument("--log-format", default="text", choices=("text", "jsonl",), help="application log format")
+    commands = parser.add_subparsers(dest="command")
+
+    commands.add_parser("interactive", help="step simulation by pressing Enter, 'e' to exit")
+
+    run_parser = commands.add_parser("run", help="run simulation without any output until finished")
+    run_parser.add_argument("--ticks", type=int, default=1000, help="count of ticks to simulate")
+    run_parser.add_argument("--seed", type=int, default=0, help="random seed")
+    run_parser.add_argument("--size", type=int, default=5, help="board side size, including borders")
+    run_parser.add_argument("--lighter-power", type=int, default=3, help="power of the lighter")
+    run_parser.add_argument("--creatures", type=int, default=1, help="count of Producens spawned at random positions")
+    run_parser.add_argument("--compact", action="store_true", help="keep terrain in typed arrays")
+    run_parser.add_argument("--checkpoint", type=pathlib.Path, default=None, help="checkpoint file written periodically")
+    run_parser.add_argument("--checkpoint-every", type=int, default=CheckpointWriter.INT_DEFAULT_EVERY_TICKS,
+                            help="period of checkpoints in ticks")
+    run_parser.add_argument("--resume", action="store_true", help="continue from checkpoint file if it exists")
+    run_parser.add_argument("--rate", type=float, default=None, help="target ticks per second, as fast as possible by default")
+    run_parser.add_argument("--metrics", type=pathlib.Path, default=None, help="file tick phase counters are appended to")
+    run_parser.add_argument("--metrics-every", type=int, default=100, help="period of metrics dumps in ticks")
+    run_parser.add_argument("--metrics-format", default="jsonl", choices=TUPLE_METRICS_FORMATS, help="format of metrics file")
+    run_parser.add_argument("--render-every", type=int, default=0,
+                            help="render board offscreen on every Nth tick, measured as \"redraw\" phase, 0 disables rendering")
+
+    gui_parser = commands.add_parser("gui", help="show simulation in a window")
+    gui_parser.add_argument("--ticks", type=int, default=None, help="count of ticks to simulate, endless by default")
+    gui_parser.add_argument("--seed", type=int, default=0, help="random seed")
+    gui_parser.add_argument("--size", type=int, default=64, help="board side size, including borders")
+    gui_parser.add_argument("--lighter-power", type=int, default=16, help="power of the lighter")
+    gui_parser.add_argument("--creatures", type=int, default=50, help="count of Producens spawned at random positions")
+    gui_parser.add_argument("--compact", action="store_true", help="keep terrain in typed arrays")
+    gui_parser.add_argument("--cell-size", type=int, default=8, help="side of a cell in pixels")
+    gui_parser.add_argument("--render-every", type=int, default=INT_GUI_RENDER_EVERY, help="render board on every Nth tick only")
+    gui_parser.add_argument("--offscreen", type=pathlib.Path, default=None,
+                            help="simulate without window and draw final state into this PPM file")
+
+    sweep_parser = commands.add_parser("sweep", help="run simulations for all combinations of passed values")
+    sweep_parser.add_argument("--results", type=pathlib.Path, required=True, help="JSONL results file, existing runs are skipped")
+    sweep_parser.add_argument("--workers", type=int, default=None, help="count of worker processes")
+    sweep_parser.add_argument("--ticks", type=int, nargs='+', default=[1000])
+    sweep_parser.add_argument("--seed", type=int, nargs='+', default=[0])
+    sweep_parser.add_argument("--size", type=int, nargs='+', default=[5])
+    sweep_parser.add_argument("--lighter-power", type=int, nargs='+', default=[3])
+    sweep_parser.add_argument("--creatures", type=int, nargs='+', default=[1])
+    sweep_parser.add_argument("--compact", action="store_true", help="keep terrain in typed arrays")
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args.command = "interactive"
+
+    return args
+
 ### MAIN FUNCTION
 
 @_general_logger
-def main_loop() -> None:
+def main_build_scheduler(field: FieldBoard, lighter_path: LighterPath, random_service: RandomService,
+                         checkpoint: CheckpointWriter=None, metrics: TickMetrics=None, pixels: PixelFrame=None,
+                         render_every: int=INT_GUI_RENDER_EVERY) -> TickScheduler:
+    """
+    DESCR: Register phases of a tick: move lighter, watch terrain, illuminate field, metabolism, move creatures,
+           act creatures, redraw, checkpoint. "lighter" and "terrain" versions are bumped from the board's own counters
+           (FieldBoard.get_lighters_state, FieldBoard.terrain_version and light metric), so illumination phase
+           runs on their change only and agrees with FieldBoard.set_illumination about what needs recalculation.
+    ARGS:
+        - field: prepared FieldBoard with lighter and creatures
+        - lighter_path: path of the lighter
+        - random_service: random numbers service of the simulation, "movement" stream is used
+        - checkpoint: started writer of periodic checkpoints, snapshot is taken between ticks
+        - metrics: counters of phases, not measured when None
+        - pixels: offscreen image the board is rendered into by "redraw" phase, no rendering when None
+        - render_every: render board on every Nth tick only
+    RETURN: TickScheduler
+    """
+    scheduler = TickScheduler(metrics)
+    movement = random_service.stream("movement")
+    alive = []  # alive units of current tick, shared by unit phases
+    lighters_seen = [None]  # FieldBoard.get_lighters_state at previous tick
+    terrain_seen = [None]  # (FieldBoard.terrain_version, FieldBoard.light_metric) at previous tick
+
+    def move_lighter() -> bool:
+        # changes of any lighter made since previous tick, e.g. added lighter, count as well
+        if field.lighter is not None:
+            eng_move_lighter_on_field(field, lighter_path)
+        state = field.get_lighters_state()
+        is_changed = state != lighters_seen[0]
+        lighters_seen[0] = state
+        return is_changed
+
+    def watch_terrain() -> bool:
+        # terrain is changed outside of phases, e.g. filled or loaded from file, see FieldBoard.mark_terrain_changed
+        state = (field.terrain_version, field.light_metric,)
+        is_changed = state != terrain_seen[0]
+        terrain_seen[0] = state
+        return is_changed
+
+    def illuminate() -> bool:
+        return field.set_illumination() > 0
+
+    def metabolism() -> None:
+        field.unit_views.reset()
+        field.population.apply_metabolism()
+        alive[:] = field.population.get_alive_units()
+
+    def move_units() -> bool:
+        return eng_move_units_on_field(field, alive, movement) > 0
+
+    def act_units() -> None:
+        for unit in alive:
+            eng_act_unit_on_field(field, unit)
+
+    scheduler.add_phase("move_lighter", move_lighter, reads=("lighter",), writes=("lighter",))
+    scheduler.add_phase("watch_terrain", watch_terrain, writes=("terrain",))
+    scheduler.add_phase("illumination", illuminate, reads=("lighter", "terrain",), writes=("illumination",),
+                        on_change=True)
+    scheduler.add_phase("metabolism", metabolism, reads=("units",), writes=("units",))
+    scheduler.add_phase("move_units", move_units, reads=("units", "terrain",), writes=("units",))
+    scheduler.add_phase("act_units", act_units, reads=("units", "illumination",), writes=("units",))
+    if pixels is not None:
+        scheduler.add_phase("redraw", lambda: gui_draw_field(None, pixels, field.redraw_changes()),
+                            reads=("lighter", "illumination", "units",), every=render_every, on_change=True)
+    if checkpoint is not None:
+        scheduler.add_phase("checkpoint", lambda: checkpoint.on_tick(field, random_service),
+                            reads=("lighter", "terrain", "illumination", "units",))
+
+    return scheduler
+
+@_general_logger
+def main_loop(field: FieldBoard, ticks: int, lighter_path: LighterPath, random_service: RandomService,
+              checkpoint: CheckpointWriter=None, metrics: TickMetrics=None, rate: float=None, pixels: PixelFrame=None,
+              render_every: int=INT_GUI_RENDER_EVERY) -> int:
+    """
+    DESCR: Run ticks with TickScheduler, see main_build_scheduler for phases. No I/O is made here.
+    ARGS:
+        - field: prepared FieldBoard with lighter and creatures
+        - ticks: count of ticks to simulate
+        - lighter_path: path of the lighter
+        - random_service: random numbers service of the simulation
+        - checkpoint: started writer of periodic checkpoints
+        - metrics: counters of phases, not measured when None
+        - rate: target ticks per second, as fast as possible when None
+        - pixels: offscreen image the board is rendered into, no rendering when None
+        - render_every: render board on every Nth tick only
+    RETURN: count of simulated ticks
+    """
+    scheduler = main_build_scheduler(field, lighter_path, random_service, checkpoint, metrics, pixels, render_every)
+
+    return scheduler.run(ticks, rate)
+
+@_general_logger
+def main_prepare_field(random_service: RandomService, size: int=5, lighter_power: int=3, creatures_count: int=1, compact: bool=False) -> tuple:
+    """
+    DESCR: Create filled square field with Producens spawned at random positions
+    RETURN: tuple (FieldBoard, lighter path around the board)
+    """
+    field = eng_create_field(size, size, lighter_power, compact=compact)
+    eng_fill_field(field)
+    field_x, field_y = field.get_field_size()
+    spawn = random_service.stream("spawn")
+    eng_populate_field(field, [Producens(spawn.randrange(field_x), spawn.randrange(field_y)) for _ in range(creatures_count)])
+
+    return (field, misc_get_perimeter_path(*field.get_size()),)
+
+@_general_logger
+def main_run(ticks: int, seed: int, size: int=5, lighter_power: int=3, creatures_count: int=1, compact: bool=False,
+             checkpoint_path: pathlib.Path=None, checkpoint_every: int=CheckpointWriter.INT_DEFAULT_EVERY_TICKS,
+             resume: bool=False, metrics: TickMetrics=None, rate: float=None, render_every: int=0) -> dict:
+    """
+    DESCR: Prepare field and run headless simulation
+    ARGS:
+        - ticks: count of ticks to simulate
+        - seed: root seed of the run RandomService, same seed gives bit-for-bit same run in any process
+        - size: board side size, including borders
+        - lighter_power: power of the lighter
+        - creatures_count: count of Producens spawned at random positions
+        - compact: keep terrain in typed arrays
+        - checkpoint_path: checkpoint file written every checkpoint_every ticks and after the last tick
+        - checkpoint_every: period of checkpoints in ticks
+        - resume: continue from checkpoint_path if it exists, ticks already done there are not repeated
+        - metrics: counters of tick phases, their totals are added to the summary as "phases"
+        - rate: target ticks per second, as fast as possible when None
+        - render_every: render board into offscreen image on every Nth tick, measured as "redraw" phase,
+                        0 disables rendering
+    RETURN: dictionary with run summary: ticks, elapsed seconds, ticks per second
+    """
+    ticks_before = 0
+    if resume and checkpoint_path is not None and checkpoint_path.exists():
+        field, random_service, ticks_before = read_checkpoint(checkpoint_path)
+        field.set_light_cache(LightStampCache())
+        lighter_path = misc_get_perimeter_path(*field.get_size())
+    else:
+        random_service = RandomService(seed)
+        field, lighter_path = main_prepare_field(random_service, size, lighter_power, creatures_count, compact)
+
+    checkpoint = None
+    if checkpoint_path is not None:
+        checkpoint = CheckpointWriter(checkpoint_path, checkpoint_every, ticks_before)
+        checkpoint.start()
+
+    pixels = None
+    if render_every > 0:
+        pixels = PixelFrame(*field.get_size())
+        field.redraw_changes()
+        gui_draw_field(None, pixels, field.renderer.get_cells())
+
+    time_start = time.perf_counter()
+    ticks_done = main_loop(field, max(ticks - ticks_before, 0), lighter_path, random_service, checkpoint, metrics, rate,
+                           pixels, render_every)
+    elapsed = time.perf_counter() - time_start
+
+    if checkpoint is not None:
+        checkpoint.finish(field, random_service)
+
+    summary = {
+        "ticks": ticks_done,
+        "ticks_before": ticks_before,
+        "elapsed": elapsed,
+        "ticks_per_second": ticks_done / elapsed if elapsed > 0 else float("inf"),
+        "creatures_total": len(field.creatures),
+        "creatures_alive": field.population.alive_count,
+    }
+    if metrics is not None:
+        metrics.dump()
+        summary["phases"] = metrics.get_stats()
+
+    return summary
+
+def _init_sweep_worker() -> None:
+    """
+    DESCR: Worker process initializer. Log handlers inherited from the parent process are dropped,
+           their writer thread does not exist in the worker.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.WARNING)
+
+    return None
+
+def _get_sweep_run_key(params: dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+@_general_logger
+def main_sweep_point(params: dict) -> dict:
+    """
+    DESCR: Run single simulation of parameter sweep
+    ARGS:
+        - params: keyword arguments of main_run
+    RETURN: main_run summary extended with run parameters
+    """
+    summary = main_run(**params)
+    summary["params"] = params
+
+    return summary
+
+@_general_logger
+def main_sweep(grid: dict, results_path: pathlib.Path, workers: int=None):
+    """
+    DESCR: Run simulation for every combination of parameters from the grid in parallel processes.
+           Every run seeds it's own RandomService from it's "seed" parameter, so results do not depend
+           on count of workers or order of completion.
+           Every finished run is appended to results file as one JSON line, runs found in the file are skipped,
+           so interrupted sweep is resumed by calling it again with the same results file.
+    ARGS:
+        - grid: main_run argument name -> list of values, e.g. {"seed": [0, 1], "lighter_power": [2, 3], "ticks": [100]}
+        - results_path: JSONL file with results
+        - workers: count of worker processes, by default count of CPUs
+    RETURN: generator of run summaries, in order of completion
+    """
+    names = sorted(grid.keys())
+    points = [dict(zip(names, values)) for values in itertools.product(*[grid[name] for name in names])]
+
+    done = set()
+    if results_path.exists():
+        with open(results_path, mode='rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    done.add(_get_sweep_run_key(json.loads(line)["params"]))
+                except (ValueError, KeyError):
+                    logger.warning(f"Broken line in sweep results file \"{results_path}\" skipped.")
+    pending = [params for params in points if _get_sweep_run_key(params) not in done]
+    logger.info(f"Sweep of {len(points)} runs: {len(points) - len(pending)} already done, {len(pending)} pending.")
+
+    if len(pending) == 0:
+        return None
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker) as executor:
+        futures = [executor.submit(main_sweep_point, params) for params in pending]
+        with open(results_path, mode='at', encoding='utf-8') as f:
+            for future in concurrent.futures.as_completed(futures):
+                summary = future.result()
+                f.write(json.dumps(summary) + '\n')
+                f.flush()
+                yield summary
+
     return None
 
 if __name__ == '__main__':
+    args = misc_parse_arguments(sys.argv[1:])
+    log_level = args.log_level if args.log_level is not None else ("DEBUG" if args.command == "interactive" else "WARNING")
+    misc_setup_logging(level=logging.getLevelName(log_level.upper()), log_format=args.log_format)
     logger.critical(f"Application started.")
     logger.debug(f"Passed arguments: [{sys.argv}]")
 
-    #
+    if args.command == "run":
+        metrics = None
+        if args.metrics is not None:
+            metrics = TickMetrics(args.metrics, args.metrics_every, args.metrics_format,
+                                  {"size": args.size, "creatures": args.creatures, "compact": args.compact})
+        summary = main_run(args.ticks, args.seed, args.size, args.lighter_power, args.creatures, args.compact,
+                           args.checkpoint, args.checkpoint_every, args.resume, metrics, args.rate, args.render_every)
+        print(f"{summary['ticks']} ticks in {summary['elapsed']:.3f} s, {summary['ticks_per_second']:.1f} ticks/sec")
+        for phase, stats in summary.get("phases", {}).items():
+            print(f"  {phase}: {stats['calls']} calls, {stats['seconds']:.3f} s, {stats['net_blocks_delta']:+d} blocks net")
+        logger.info(f"Simulation finished. Cleaning up.")
+        sys.exit(0)
+
+    if args.command == "gui":
+        random_service = RandomService(args.seed)
+        field, lighter_path = main_prepare_field(random_service, args.size, args.lighter_power, args.creatures, args.compact)
+        if args.offscreen is not None:
+            main_loop(field, args.ticks if args.ticks is not None else 0, lighter_path, random_service)
+            gui_render_offscreen(field, args.offscreen, args.cell_size)
+            sys.exit(0)
+        if tkinter is None:
+            logger.critical(f"Tkinter is not available, use --offscreen to draw without window.")
+            sys.exit(1)
+        width, height = field.get_size()
+        window = gui_create_main_window(width * args.cell_size, height * args.cell_size)
+        image = gui_run_simulation(window, field, lighter_path, random_service, args.ticks, args.cell_size,
+                                   render_every=args.render_every)
+        window.mainloop()
+        logger.info(f"GUI closed. Cleaning up.")
+        sys.exit(0)
+
+    if args.command == "sweep":
+        grid = {
+            "ticks": args.ticks,
+            "seed": args.seed,
+            "size": args.size,
+            "lighter_power": args.lighter_power,
+            "creatures_count": args.creatures,
+            "compact": [args.compact],
+        }
+        for summary in main_sweep(grid, args.results, args.workers):
+            print(json.dumps(summary))
+        logger.info(f"Sweep finished. Cleaning up.")
+        sys.exit(0)
 
-    TUPLE_LIGHTER_PATH = ((0, 0,),(0, 1,),(0, 2,),(0, 3,),(0, 4,),
-                          (1, 4,),(2, 4,),(3, 4,),(4, 4,),
-                          (4, 3,),(4, 2,),(4, 1,),(4, 0,),
-                          (3, 0,),(2, 0,),(1, 0,),)
     STR_EXIT_SIGNAL = 'e'
     last_signal = ''
 
@@ -378,16 +993,16 @@ if __name__ == '__main__':
     field = eng_create_field(5, 5, 3)
     eng_fill_field(field)
     eng_populate_field(field)
+    lighter_path = misc_get_perimeter_path(*field.get_size())
 
-    #main = gui_create_main_window(640, 480)
-    # CYCLE
-    #main.mainloop()
+    # CYCLE, see "gui" command for windowed mode
     while last_signal.lower() != STR_EXIT_SIGNAL:
         print('cycle')
-        eng_move_lighter_on_field(field, TUPLE_LIGHTER_PATH)
+        eng_move_lighter_on_field(field, lighter_path)
         # move creatures
         # act creatures
-        print(field.redraw())
+        field.redraw_changes()
+        print(field.renderer.get_text())
         last_signal = input('signal:')
         print("signal", last_signal)
 
@@ -395,4 +1010,4 @@ if __name__ == '__main__':
     logger.info(f"Simulation finished. Cleaning up.")
     # CLEAN UP AND LEAVE
 
-sys.exit(0)
\ No newline at end of file
+    sys.exit(0)
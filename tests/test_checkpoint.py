@@ -0,0 +1,64 @@
+import main
+from classes.checkpoint import read_checkpoint, take_snapshot, write_snapshot
+from classes.rng import RandomService
+
+import pytest
+
+
+def get_state(field, random_service: RandomService) -> tuple:
+    if field.is_compact:
+        layers = {name: bytes(memoryview(layer).cast('B')) for name, layer in field.field.layers.items()}
+    else:
+        layers = [(block.illumination_value, block.fertility_value, block.ground_type, block.speed_modifier)
+                  for line in field.field for block in line]
+    units = [(type(unit).__name__, unit.x, unit.y, unit.hunger_value, unit.health_value, unit.life_state)
+             for unit in field.population.units]
+    lighters = [(lighter.x, lighter.y, lighter.power,) for lighter in field.lighters]
+
+    return (layers, units, lighters, random_service.get_state(),)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_resume_equals_uninterrupted_run(tmp_path, compact: bool) -> None:
+    path = tmp_path / "run.fcck"
+    main.main_run(7, 11, 12, 4, 30, compact, path, checkpoint_every=3)
+    main.main_run(20, 11, 12, 4, 30, compact, path, checkpoint_every=3, resume=True)
+    resumed = read_checkpoint(path)
+
+    random_service = RandomService(11)
+    field, lighter_path = main.main_prepare_field(random_service, 12, 4, 30, compact)
+    main.main_loop(field, 20, lighter_path, random_service)
+
+    assert resumed[2] == 20
+    assert get_state(resumed[0], resumed[1]) == get_state(field, random_service)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_snapshot_round_trip(tmp_path, compact: bool) -> None:
+    random_service = RandomService(5)
+    field, lighter_path = main.main_prepare_field(random_service, 9, 3, 10, compact)
+    main.main_loop(field, 4, lighter_path, random_service)
+
+    write_snapshot(take_snapshot(field, random_service, 4), tmp_path / "state.fcck")
+    restored, restored_random, tick = read_checkpoint(tmp_path / "state.fcck")
+
+    assert tick == 4
+    assert get_state(restored, restored_random) == get_state(field, random_service)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_terrain_is_copied_only_when_changed(compact: bool) -> None:
+    random_service = RandomService(6)
+    field, lighter_path = main.main_prepare_field(random_service, 9, 3, 5, compact)
+    main.main_loop(field, 2, lighter_path, random_service)
+
+    first = take_snapshot(field, random_service, 2)
+    main.main_loop(field, 2, lighter_path, random_service)
+    second = take_snapshot(field, random_service, 4, first)
+    assert second.layers is first.layers
+    assert second.light == (field.illumination_sources, field.light_metric,)
+
+    main.eng_fill_field(field)
+    main.main_loop(field, 1, lighter_path, random_service)
+    third = take_snapshot(field, random_service, 5, second)
+    assert third.layers is not second.layers
@@ -0,0 +1,33 @@
+import main
+from classes.frame_renderer import FrameRenderer
+from classes.lighter import Lighter
+from classes.rng import RandomService
+
+import pytest
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_incremental_render_equals_full_render(compact: bool) -> None:
+    random_service = RandomService(7)
+    field, lighter_path = main.main_prepare_field(random_service, 16, 5, 40, compact)
+    field.add_lighter(Lighter(15, 4, 3))
+    field.redraw()
+
+    for tick in range(30):
+        main.main_loop(field, 1, lighter_path, random_service)
+        if tick % 5 == 0:
+            field.lighters[1].set_position(15, tick % 16)
+        if tick == 10:
+            field.remove_creature(0)
+        field.redraw_changes()
+
+        full = FrameRenderer(field)
+        full.render()
+        assert field.renderer.get_frame() == full.get_frame()
+
+
+def test_changes_are_reported_once() -> None:
+    random_service = RandomService(8)
+    field, lighter_path = main.main_prepare_field(random_service, 10, 3, 5, False)
+    assert len(field.redraw_changes()) > 0
+    assert field.redraw_changes() == []
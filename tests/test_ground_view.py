@@ -0,0 +1,59 @@
+import random
+
+import main
+from classes.ground import Ground, TUPLE_GROUND_TILES
+from classes.terrain_grid import GroundView
+
+import pytest
+
+
+def get_blocks(field) -> list:
+    return [(block.x, block.y, block.tile, block.ground_type, block.illumination_value, block.fertility_value,
+             block.is_occupied, block.speed_modifier,) for line in field.field for block in line]
+
+
+def test_storage_modes_are_interchangeable() -> None:
+    fields = [main.eng_create_field(9, 7, 3, compact=compact) for compact in (False, True)]
+    for field in fields:
+        main.eng_fill_field(field)
+
+    rng = random.Random(4)
+    for _ in range(200):
+        x, y = rng.randrange(7), rng.randrange(5)
+        action = rng.randrange(7)
+        value = rng.randrange(100)
+        for field in fields:
+            block = field.field[y][x]
+            if action == 0:
+                block.tile = TUPLE_GROUND_TILES[value % len(TUPLE_GROUND_TILES)]
+                block.ground_type = value % len(TUPLE_GROUND_TILES)
+            elif action == 1:
+                block.set_illumination(value)
+            elif action == 2:
+                block.set_fertility(value)
+            elif action == 3:
+                block.set_occupation(value % 2 == 0)
+            elif action == 4:
+                block.speed_modifier = value % 5
+            elif action == 5:
+                block.illumination_value = value
+            else:
+                block.fertility_value = value
+        assert get_blocks(fields[0]) == get_blocks(fields[1])
+
+    view = fields[1].field[2][3]
+    assert view.get_illumination() == fields[0].field[2][3].get_illumination()
+    assert view._get_state()["tile"] == fields[0].field[2][3].tile
+
+
+def test_ground_view_is_slotted() -> None:
+    field = main.eng_create_field(6, 6, 3, compact=True)
+    view = field.field[1][1]
+    assert isinstance(view, GroundView) and not isinstance(view, Ground)
+    assert not hasattr(view, "__dict__")
+    assert main.eng_check_choosen_object_is_a_cell(field, (1, 1,))
+
+    view.tile = TUPLE_GROUND_TILES[3]
+    assert field.field.layers["ground_type"][field.field.width + 1] == 3
+    with pytest.raises(ValueError):
+        view.tile = "P"
@@ -0,0 +1,104 @@
+import math
+import random
+
+import pytest
+
+import main
+from classes import illumination
+from classes.light_cache import LightStampCache
+from classes.lighter import Lighter
+
+
+KERNELS = [False, pytest.param(True, marks=pytest.mark.skipif(illumination.numpy is None, reason="numpy is not installed"))]
+
+
+def get_reference(width: int, height: int, sources: list, metric: str) -> list:
+    """
+    DESCR: Illumination by definition: sum of lighter powers reduced by distance, clamped to 0..100
+    """
+    raster = []
+    for y in range(height):
+        for x in range(width):
+            total = 0
+            for light_x, light_y, power in sources:
+                dx, dy = light_x - x, light_y - y
+                distance = abs(dx) + abs(dy) if metric == "manhattan" else math.isqrt(dx * dx + dy * dy)
+                total += max(power - distance, 0)
+            raster.append(min(total, 100))
+
+    return raster
+
+
+def get_illumination(field) -> list:
+    if field.is_compact:
+        return [int(value) for value in field.field.layers["illumination"]]
+
+    return [block.illumination_value for line in field.field for block in line]
+
+
+@pytest.mark.parametrize("use_numpy", KERNELS)
+@pytest.mark.parametrize("metric", illumination.TUPLE_DISTANCE_METRICS)
+def test_compute_light_field(use_numpy: bool, metric: str) -> None:
+    rng = random.Random(1)
+    for _ in range(50):
+        width, height = rng.randint(1, 20), rng.randint(1, 20)
+        source = (rng.randint(-5, width + 5), rng.randint(-5, height + 5), rng.randint(0, 30),)
+        raster = illumination.compute_light_field(width, height, *source, metric, 0, 100, use_numpy)
+        assert [int(value) for value in raster] == get_reference(width, height, [source], metric)
+
+
+@pytest.mark.parametrize("use_numpy", KERNELS)
+@pytest.mark.parametrize("metric", illumination.TUPLE_DISTANCE_METRICS)
+@pytest.mark.parametrize("cache", [None, LightStampCache()], ids=["no-cache", "cache"])
+def test_compute_lights_field(use_numpy: bool, metric: str, cache: LightStampCache) -> None:
+    rng = random.Random(2)
+    for _ in range(50):
+        width, height = rng.randint(1, 20), rng.randint(1, 20)
+        sources = [(rng.randint(-5, width + 5), rng.randint(-5, height + 5), rng.randint(0, 80),)
+                   for _ in range(rng.randint(1, 5))]
+        raster = illumination.compute_lights_field(width, height, sources, metric, 0, 100, use_numpy, cache)
+        assert [int(value) for value in raster] == get_reference(width, height, sources, metric)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("metric", illumination.TUPLE_DISTANCE_METRICS)
+@pytest.mark.parametrize("lighters_count", [1, 3])
+def test_set_illumination(compact: bool, metric: str, lighters_count: int) -> None:
+    rng = random.Random(3)
+    field = main.eng_create_field(24, 17, 5, compact=compact)
+    main.eng_fill_field(field)
+    field.light_metric = metric
+    for _ in range(lighters_count - 1):
+        field.add_lighter(Lighter(rng.randint(0, 25), rng.randint(0, 18), rng.randint(1, 40)))
+
+    for _ in range(100):
+        lighter = rng.choice(field.lighters)
+        if rng.random() < 0.7:
+            lighter.set_position(rng.randint(-3, 27), rng.randint(-3, 20))
+        else:
+            lighter.set_power(rng.randint(0, 60))
+        field.set_illumination()
+        sources = [(lighter.x, lighter.y, lighter.power,) for lighter in field.lighters]
+        assert get_illumination(field) == get_reference(field.field_x, field.field_y, sources, metric)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_set_illumination_lighters_set(compact: bool) -> None:
+    field = main.eng_create_field(20, 20, 8, compact=compact)
+    main.eng_fill_field(field)
+    field.set_illumination()
+
+    second = Lighter(10, 10, 12)
+    field.add_lighter(second)
+    field.add_lighter(Lighter(10, 10, 12))
+    field.set_illumination()
+    assert get_illumination(field) == get_reference(18, 18, [(0, 0, 8,), (10, 10, 12,), (10, 10, 12,)], "euclidean")
+
+    field.remove_lighter(second)
+    field.set_illumination()
+    assert get_illumination(field) == get_reference(18, 18, [(0, 0, 8,), (10, 10, 12,)], "euclidean")
+
+    field.remove_lighter(field.lighter)
+    field.set_illumination()
+    assert field.lighter is field.lighters[0]
+    assert get_illumination(field) == get_reference(18, 18, [(10, 10, 12,)], "euclidean")
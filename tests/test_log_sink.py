@@ -0,0 +1,32 @@
+import logging
+import queue
+
+from classes.log_sink import BatchFileWriter, LazyQueueHandler
+
+
+def make_record(message: str) -> logging.LogRecord:
+    return logging.makeLogRecord({"name": "test", "levelno": logging.INFO, "levelname": "INFO", "msg": message})
+
+
+def test_full_queue_drops_records() -> None:
+    handler = LazyQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(make_record(f"record {i}"))
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_rotation_counts_bytes(tmp_path) -> None:
+    path = tmp_path / "app.log"
+    records = queue.Queue()
+    writer = BatchFileWriter(records, str(path), logging.Formatter("%(message)s"), batch_size=1, max_bytes=100,
+                             backup_count=2)
+    writer.start()
+    for _ in range(6):
+        records.put(make_record("ж" * 20))  # 20 characters, 40 bytes
+    writer.stop()
+
+    sizes = [p.stat().st_size for p in sorted(tmp_path.iterdir())]
+    assert len(sizes) == 3
+    assert all(size <= 100 for size in sizes)
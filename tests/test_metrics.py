@@ -0,0 +1,23 @@
+import csv
+
+import main
+from classes.metrics import TickMetrics, TUPLE_METRICS_FIELDS
+
+
+def test_run_measures_rendering(tmp_path) -> None:
+    path = tmp_path / "metrics.csv"
+    metrics = TickMetrics(path, 5, "csv", {"size": 16})
+    summary = main.main_run(10, 3, 16, 4, 20, metrics=metrics, render_every=2)
+
+    assert summary["phases"]["redraw"]["calls"] == 5
+    assert summary["phases"]["illumination"]["calls"] == 10
+    with open(path, encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == ["size"] + list(TUPLE_METRICS_FIELDS)
+    assert "net_blocks_delta" in TUPLE_METRICS_FIELDS
+    assert {row["phase"] for row in rows} >= {"move_lighter", "illumination", "redraw"}
+
+
+def test_run_without_rendering() -> None:
+    summary = main.main_run(4, 3, 16, 4, 20, metrics=TickMetrics())
+    assert "redraw" not in summary["phases"]
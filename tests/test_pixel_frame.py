@@ -0,0 +1,43 @@
+import main
+from classes.frame_renderer import FrameRenderer
+from classes.pixel_frame import PixelFrame, TUPLE_UNKNOWN_TILE_COLOR
+from classes.rng import RandomService
+
+import pytest
+
+
+def get_full_repaint(field, cell_size: int) -> bytes:
+    """
+    DESCR: Image with every cell painted from a fresh renderer
+    """
+    renderer = FrameRenderer(field)
+    renderer.render()
+    pixels = PixelFrame(*field.get_size(), cell_size)
+    pixels.paint([(x, y, tile,) for y, row in enumerate(renderer.get_rows()) for x, tile in enumerate(row)])
+
+    return pixels.to_ppm()
+
+
+@pytest.mark.parametrize("drawn_before", [False, True])
+def test_offscreen_image_equals_full_repaint(tmp_path, drawn_before: bool) -> None:
+    random_service = RandomService(3)
+    field, lighter_path = main.main_prepare_field(random_service, 10, 3, 3, False)
+    if drawn_before:
+        field.redraw()
+    main.main_loop(field, 5, lighter_path, random_service)
+
+    path = tmp_path / "field.ppm"
+    main.gui_render_offscreen(field, path, 1)
+    data = path.read_bytes()
+
+    assert data == get_full_repaint(field, 1)
+    assert bytes(TUPLE_UNKNOWN_TILE_COLOR) not in [data[i:i + 3] for i in range(data.index(b"\n") + 1, len(data), 3)]
+
+
+def test_new_image_matches_new_renderer() -> None:
+    random_service = RandomService(4)
+    field, lighter_path = main.main_prepare_field(random_service, 8, 3, 2, True)
+    pixels = PixelFrame(*field.get_size(), 2)
+    pixels.paint(field.redraw_changes())
+
+    assert pixels.to_ppm() == get_full_repaint(field, 2)
@@ -0,0 +1,40 @@
+import random
+
+import main
+from classes import population
+from classes.population import Population
+from classes.producens import Producens
+
+import pytest
+
+
+KERNELS = [False, pytest.param(True, marks=pytest.mark.skipif(population.numpy is None, reason="numpy is not installed"))]
+
+
+@pytest.mark.parametrize("use_numpy", KERNELS)
+def test_apply_metabolism_equals_unit_by_unit(use_numpy: bool) -> None:
+    rng = random.Random(4)
+    columnar = Population(use_numpy)
+    expected = []
+    for _ in range(200):
+        unit = Producens(0, 0)
+        unit.hunger_value = rng.randint(0, 10)
+        unit.health_value = rng.randint(0, 3)
+        expected.append([unit.hunger_value, unit.health_value, True])
+        columnar.add(unit)
+
+    for _ in range(6):
+        died = columnar.apply_metabolism(2, 1)
+        dead = []
+        for i, values in enumerate(expected):
+            if not values[2]:
+                continue
+            values[0] = min(values[0] + 2, Producens.INT_HUNGER_VALUE_MAX)
+            if values[0] >= Producens.INT_HUNGER_VALUE_MAX:
+                values[1] = max(values[1] - 1, Producens.INT_HEALTH_VALUE_MIN)
+                if values[1] <= 0:
+                    values[2] = False
+                    dead.append(columnar.units[i])
+        assert died == dead
+        assert [[unit.hunger_value, unit.health_value, unit.life_state == "alive"] for unit in columnar.units] == expected
+        assert columnar.alive_count == sum(1 for values in expected if values[2])
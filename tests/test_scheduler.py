@@ -0,0 +1,78 @@
+import main
+from classes.lighter import Lighter
+from classes.lighter_path import LighterPath
+from classes.rng import RandomService
+from classes.scheduler import TickScheduler
+
+from test_illumination import get_illumination, get_reference
+
+
+def test_phase_decimation_and_change_skipping() -> None:
+    scheduler = TickScheduler()
+    calls = {"every": 0, "changes": 0, "reader": 0}
+
+    def changes() -> bool:
+        calls["changes"] += 1
+        return calls["changes"] % 3 == 0
+
+    scheduler.add_phase("every", lambda: calls.__setitem__("every", calls["every"] + 1), every=4)
+    scheduler.add_phase("changes", changes, writes=("state",))
+    scheduler.add_phase("reader", lambda: calls.__setitem__("reader", calls["reader"] + 1), reads=("state",),
+                        on_change=True)
+    assert scheduler.run(12) == 12
+
+    assert calls == {"every": 3, "changes": 12, "reader": 5}
+    assert scheduler.get_stats()["reader"] == {"runs": 5, "skips": 7}
+
+
+def test_illumination_follows_power_and_terrain_changes() -> None:
+    random_service = RandomService(9)
+    field, _ = main.main_prepare_field(random_service, 14, 4, 3, False)
+    scheduler = main.main_build_scheduler(field, LighterPath([]), random_service)
+    scheduler.run(2)
+    version = scheduler.versions["illumination"]
+
+    runs = scheduler.get_stats()["illumination"]["runs"]
+
+    scheduler.run(2)
+    assert scheduler.versions["illumination"] == version
+    assert scheduler.get_stats()["illumination"]["runs"] == runs
+
+    field.lighter.set_power(9)
+    scheduler.run_tick()
+    assert get_illumination(field) == get_reference(12, 12, [(0, 0, 9,)], "euclidean")
+
+    main.eng_fill_field(field)
+    scheduler.run_tick()
+    assert get_illumination(field) == get_reference(12, 12, [(0, 0, 9,)], "euclidean")
+    assert scheduler.versions["illumination"] == version + 2
+
+    field.light_metric = "manhattan"
+    scheduler.run_tick()
+    assert get_illumination(field) == get_reference(12, 12, [(0, 0, 9,)], "manhattan")
+    assert scheduler.get_stats()["illumination"]["runs"] == runs + 3
+
+
+def test_secondary_lighter_changes_are_reported() -> None:
+    random_service = RandomService(10)
+    field, _ = main.main_prepare_field(random_service, 14, 4, 3, True)
+    scheduler = main.main_build_scheduler(field, LighterPath([]), random_service)
+    second = Lighter(6, 6, 5)
+    field.add_lighter(second)
+    scheduler.run_tick()
+
+    for x in range(3, 9):
+        version = scheduler.versions["lighter"]
+        second.set_position(x, 6)
+        scheduler.run_tick()
+        assert scheduler.versions["lighter"] == version + 1
+        assert get_illumination(field) == get_reference(12, 12, [(0, 0, 4,), (x, 6, 5,)], "euclidean")
+
+    version = scheduler.versions["lighter"]
+    scheduler.run_tick()
+    assert scheduler.versions["lighter"] == version
+
+    field.remove_lighter(second)
+    scheduler.run_tick()
+    assert scheduler.versions["lighter"] == version + 1
+    assert get_illumination(field) == get_reference(12, 12, [(0, 0, 4,)], "euclidean")
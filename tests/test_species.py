@@ -0,0 +1,32 @@
+import pytest
+
+from classes.population import Population
+from classes.producens import Producens
+from classes.species import set_population_trait
+
+
+def test_trait_table_is_read_only() -> None:
+    with pytest.raises(AttributeError):
+        Producens.TRAITS.values = None
+    with pytest.raises(TypeError):
+        Producens.TRAITS.values[0] = 100
+
+    assert Producens.TRAITS.get_bounds("speed") == (0, 5, None,)
+
+
+def test_set_population_trait_clamps_in_columns() -> None:
+    population = Population()
+    units = [Producens(0, 0) for _ in range(4)]
+    for unit in units:
+        population.add(unit)
+    detached = Producens(0, 0)
+
+    set_population_trait(population.units, "hunger", [1, 20, -3, 4])
+    assert list(population.hunger) == [1, 10, 0, 4]
+
+    set_population_trait([units[3], detached, units[0]], "health", [2, 30, -1])
+    assert list(population.health) == [0, 10, 10, 2]
+    assert detached.health_value == 10
+
+    set_population_trait(units, "speed", [9, 1, 2, -1])
+    assert [unit.moving_speed for unit in units] == [5, 1, 2, 0]
@@ -0,0 +1,21 @@
+import main
+from classes.terrain_grid import TerrainGrid
+
+import pytest
+
+
+def test_terrain_file_is_mapped(tmp_path) -> None:
+    path = tmp_path / "terrain.fctg"
+    TerrainGrid.create_file(path, 6, 6)
+    field = main.eng_create_field(8, 8, 5, terrain_path=path)
+    assert field.is_compact
+    assert (field.field.width, field.field.height) == (6, 6)
+    field.field.close()
+
+
+def test_terrain_file_size_mismatch(tmp_path) -> None:
+    path = tmp_path / "terrain.fctg"
+    TerrainGrid.create_file(path, 5, 5)
+    assert TerrainGrid.read_file_size(path) == (5, 5)
+    with pytest.raises(ValueError, match="size 5X5 differs from field size 6X6"):
+        main.eng_create_field(8, 8, 5, terrain_path=path)